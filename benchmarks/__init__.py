@@ -0,0 +1,89 @@
+"""
+Measure how this application performs, outside of the test suite.
+
+Functions:
+==========
+    create_app: Create the application under measurement.
+    prepare_database: Bring the scratch database up to date and seed it.
+    scratch_environment: Get the environment the application under measurement runs with.
+
+Modules:
+========
+    loadtest: Replay game sessions of concurrent virtual users against a running application.
+    prefork: Compare workers forked from a preloaded master against workers that start cold.
+    routes: Time in-process requests per route and compare their medians against a baseline.
+
+Notes:
+======
+    * Each module is a script, run from the root of the repository, e.g:
+        python -m benchmarks.prefork
+    * Except for routes (which measures tests.TEST_APPLICATION in-process), the application under
+        measurement runs in processes of its own, with the production configuration, against a
+        scratch database (seeded with the ISO 3166-1 countries) and without rate limiting.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import os
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scratch_environment(directory):
+    """
+    Get the environment the application under measurement runs with, i.e the production
+        configuration against a scratch database stored in a given directory.
+
+    :param directory: The (temporary) directory holding the scratch database.
+    :type directory: str
+    :return: A copy of the current environment, with the FLASK_* variables overridden.
+    :rtype: dict
+    """
+    environment = dict(
+        os.environ,
+        FLASK_ENV='production',
+        FLASK_DATABASE=os.path.join(directory, 'benchmark.db'),
+        FLASK_SECRET_KEY=os.environ.get('FLASK_SECRET_KEY', 'benchmark'),
+        PYTHONPATH=_BASE_DIR,
+    )
+    environment.pop('FLASK_RUN_FROM_CLI', None)
+    return environment
+
+
+def create_app():
+    """
+    Create the application under measurement, without rate limiting (every virtual user shares
+        the same IP address).
+
+    :return: The application.
+    :rtype: flask.app.Flask
+    """
+    # Imported here on purpose: cold workers (see prefork) must pay for the import once forked.
+    import knowlift
+
+    app = knowlift.create_app()
+    app.config['RATE_LIMIT_ENABLED'] = False
+    return app
+
+
+def prepare_database():
+    """
+    Bring the scratch database up to date and seed it with the ISO 3166-1 countries, within the
+        scratch environment.
+
+    :return: None
+    :rtype: None
+    """
+    from knowlift import countries
+    from knowlift import db
+
+    app = create_app()
+    engine = db.get_engine(app)
+    with engine.connect() as connection:
+        countries.seed(connection)
+    engine.dispose()
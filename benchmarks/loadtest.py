@@ -0,0 +1,344 @@
+"""
+Replay the game sessions of concurrent virtual users against a running application and report the
+    throughput & latency percentiles of every route.
+
+Functions:
+==========
+    main: Start the application (unless a URL is given), run the virtual users and report.
+    run: Run virtual users against an application for a while and report how it coped.
+
+Notes
+=====
+    * Usage: python -m benchmarks.loadtest [--users 10] [--duration 30] [--think 0]
+        [--url http://host:port] [--output report.json]
+    * Every virtual user plays sessions in a loop, the same way a browser does: GET / then GET
+        /grade, POST /play with one of the levels found on the grade page, then POST /result with
+        the form built by processFormData (utils.js), i.e the signed token of the question along
+        with an answer picked by the roulette button (generateRandomNumber). Cookies are kept per
+        virtual user.
+    * Without --url, the application is preloaded (see knowlift.preload) in a process of its own,
+        behind a threaded wsgiref server, within the scratch environment (see
+        benchmarks.scratch_environment). Point --url at a production-like server (e.g gunicorn)
+        to measure its capacity instead.
+    * The load generator only relies on the standard library. The report (--output) is JSON, e.g
+        to compare runs: {"config": {...}, "duration": 30.0, "requests": 5120, "throughput": 170.6,
+        "routes": {"/play": {"requests": 1280, "errors": {}, "throughput": 42.6, "p50": 4.1,
+        "p95": 9.8, "p99": 15.2, "max": 30.1}, ...}}, latencies in milliseconds.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import argparse
+import collections
+import http.client
+import http.cookies
+import json
+import math
+import random
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from html import parser
+from urllib import parse
+from wsgiref import simple_server
+
+# Project specific
+import benchmarks
+
+PERCENTILES = (50, 95, 99)
+
+
+class _PageParser(parser.HTMLParser):
+    # Collects what a browser would submit: the levels of the grade page & the question metadata.
+
+    def __init__(self):
+        super().__init__()
+        self.levels = []
+        self.metadata = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag != 'input':
+            return
+        if attributes.get('name') == 'level':
+            self.levels.append(attributes['value'])
+        elif attributes.get('id') == 'metadata':
+            self.metadata = json.loads(attributes['value'])
+
+
+def _parse_page(body):
+    page_parser = _PageParser()
+    page_parser.feed(body.decode('utf-8'))
+    page_parser.close()
+    return page_parser
+
+
+def _roulette_answer(metadata, rng):
+    # Mirrors generateRandomNumber (utils.js), as called by processFormData.
+    upper_bound = metadata['stop_internal'] - metadata['start_internal']
+    if metadata['left_glyph'] == '(' and metadata['right_glyph'] == ')':
+        upper_bound -= 1
+    elif metadata['left_glyph'] == '[' and metadata['right_glyph'] == ']':
+        upper_bound += 1
+    return rng.randint(0, max(upper_bound, 0))
+
+
+class _VirtualUser:
+
+    def __init__(self, url, think_time, seed):
+        address = parse.urlsplit(url)
+        self.connection = http.client.HTTPConnection(address.hostname, address.port, timeout=30)
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.cookies = http.cookies.SimpleCookie()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.defaultdict(collections.Counter)
+
+    def _request(self, method, path, form=None):
+        headers = {'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={c.value}' for name, c in self.cookies.items())
+        body = None
+        if form is not None:
+            body = parse.urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException) as ex:
+            self.connection.close()
+            self.errors[path][type(ex).__name__] += 1
+            return None
+        elapsed = time.perf_counter() - start
+
+        for cookie in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(cookie)
+        if response.status != 200:
+            self.errors[path][str(response.status)] += 1
+            return None
+        self.latencies[path].append(elapsed)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        return content
+
+    def play_session(self):
+        self._request('GET', '/')
+        grade_page = self._request('GET', '/grade')
+        levels = _parse_page(grade_page).levels if grade_page else ()
+        play_page = self._request('POST', '/play', {'level': self.rng.choice(levels or ('0',))})
+        metadata = _parse_page(play_page).metadata if play_page else None
+        if metadata is None:
+            return
+
+        answer = _roulette_answer(metadata, self.rng)
+        data = json.dumps({'token': metadata['token'], 'answer': answer}, separators=(',', ':'))
+        self._request('POST', '/result', {'data': data, 'roulette': ''})
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            self.play_session()
+        self.connection.close()
+
+
+def _percentile(sorted_values, percentile):
+    # Nearest-rank percentile.
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _build_report(users, elapsed, config):
+    latencies = collections.defaultdict(list)
+    errors = collections.defaultdict(collections.Counter)
+    for user in users:
+        for path, values in user.latencies.items():
+            latencies[path].extend(values)
+        for path, counter in user.errors.items():
+            errors[path].update(counter)
+
+    routes = {}
+    for path in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies[path])
+        route = {
+            'requests': len(values) + sum(errors[path].values()),
+            'errors': dict(errors[path]),
+            'throughput': round(len(values) / elapsed, 1),
+        }
+        for percentile in PERCENTILES:
+            route[f'p{percentile}'] = (
+                _milliseconds(_percentile(values, percentile)) if values else None
+            )
+        route['max'] = _milliseconds(values[-1]) if values else None
+        routes[path] = route
+
+    succeeded = sum(len(values) for values in latencies.values())
+    return {
+        'config': config,
+        'duration': round(elapsed, 2),
+        'requests': sum(route['requests'] for route in routes.values()),
+        'throughput': round(succeeded / elapsed, 1),
+        'routes': routes,
+    }
+
+
+def _format_report(report):
+    lines = [
+        f"{report['config']['users']} users, {report['duration']}s: {report['requests']} requests,"
+        f" {report['throughput']} req/s",
+        f"{'route':<8} {'requests':>8} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8}"
+        f" {'p99 ms':>8} {'max ms':>8}",
+    ]
+    for path, route in report['routes'].items():
+        timings = ' '.join(
+            f"{route[key]:>8.2f}" if route[key] is not None else f"{'-':>8}"
+            for key in ('p50', 'p95', 'p99', 'max')
+        )
+        lines.append(
+            f"{path:<8} {route['requests']:>8} {sum(route['errors'].values()):>6}"
+            f" {route['throughput']:>7.1f} {timings}"
+        )
+    return '\n'.join(lines)
+
+
+def run(url, users, duration, think_time=0, ramp_up=0, seed=None):
+    """
+    Run virtual users against an application for a while and report how it coped.
+
+    :param url: The base URL of the application, e.g http://127.0.0.1:8000
+    :type url: str
+    :param users: The number of concurrent virtual users.
+    :type users: int
+    :param duration: The number of seconds the virtual users keep playing for.
+    :type duration: float
+    :param think_time: The mean number of seconds a virtual user pauses after each response.
+    :type think_time: float
+    :param ramp_up: The number of seconds over which the virtual users are started.
+    :type ramp_up: float
+    :param seed: Seed the choices of the virtual users, for reproducible sessions.
+    :type seed: int
+    :return: The report, see the notes of this module.
+    :rtype: dict
+    """
+    seeds = random.Random(seed)
+    virtual_users = [_VirtualUser(url, think_time, seeds.random()) for _ in range(users)]
+    start = time.monotonic()
+    deadline = start + duration
+    threads = []
+    for index, user in enumerate(virtual_users):
+        thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+        threads.append(thread)
+        thread.start()
+        if ramp_up and index + 1 < users:
+            time.sleep(ramp_up / users)
+    for thread in threads:
+        thread.join()
+
+    config = {
+        'url': url, 'users': users, 'duration': duration, 'think_time': think_time,
+        'ramp_up': ramp_up, 'seed': seed,
+    }
+    return _build_report(virtual_users, time.monotonic() - start, config)
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, simple_server.WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default (5) leaves concurrent users waiting for SYN retries
+
+
+class _QuietHandler(simple_server.WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(host):
+    import knowlift
+
+    app = benchmarks.create_app()
+    knowlift.preload(app)
+    server = simple_server.make_server(
+        host, 0, app, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler
+    )
+    print(f'http://{host}:{server.server_port}', flush=True)
+    server.serve_forever()
+
+
+def main(arguments=None):
+    """
+    Start the application (unless --url is given), run the virtual users against it, then print
+        the report and write it to --output as JSON.
+
+    :param arguments: The command line arguments, defaults to sys.argv.
+    :type arguments: list
+    :return: None
+    :rtype: None
+    """
+    arguments_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    arguments_parser.add_argument('--users', type=int, default=10, help='Concurrent users.')
+    arguments_parser.add_argument('--duration', type=float, default=30, help='Seconds to run.')
+    arguments_parser.add_argument(
+        '--think', type=float, default=0, help='Mean pause (seconds) after each response.'
+    )
+    arguments_parser.add_argument(
+        '--ramp-up', type=float, default=0, help='Seconds over which the users are started.'
+    )
+    arguments_parser.add_argument('--seed', type=int, help='Seed the choices of the users.')
+    arguments_parser.add_argument('--url', help='Target a running application instead.')
+    arguments_parser.add_argument('--output', help='Write the report to this file, as JSON.')
+    arguments_parser.add_argument('--serve', metavar='HOST', help=argparse.SUPPRESS)
+    options = arguments_parser.parse_args(arguments)
+
+    if options.serve:  # within the process serving the application
+        _serve(options.serve)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        url = options.url
+        if url is None:
+            environment = benchmarks.scratch_environment(directory)
+            subprocess.run(
+                [sys.executable, '-c', 'import benchmarks; benchmarks.prepare_database()'],
+                cwd=directory, env=environment, check=True,
+            )
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.loadtest', '--serve', '127.0.0.1'],
+                cwd=directory, env=environment, stdout=subprocess.PIPE, text=True,
+            )
+            url = server.stdout.readline().strip()
+            if not url:
+                raise RuntimeError(f'The application exited with {server.wait()} on startup.')
+
+        try:
+            report = run(
+                url, options.users, options.duration, options.think, options.ramp_up,
+                options.seed,
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print(_format_report(report))
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
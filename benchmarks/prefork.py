@@ -0,0 +1,158 @@
+"""
+Compare workers forked from a preloaded master (see knowlift.preload) against workers that start
+    cold, i.e import knowlift and create the application after being forked.
+
+Functions:
+==========
+    main: Run both modes and report per worker memory and fork-to-ready time.
+
+Notes
+=====
+    * Usage: python -m benchmarks.prefork [--workers 4]
+    * Each mode runs in a process of its own (the master), which forks the workers. Each worker
+        serves the first request of a few routes, then reports how long it took since it was
+        forked (fork-to-ready). The memory of every worker is measured while all of them are alive:
+        RSS, PSS (shared pages are split among the processes sharing them) & USS (private pages),
+        as per /proc/<pid>/smaps_rollup, hence this runs on Linux only.
+    * The application runs within the scratch environment, see benchmarks.scratch_environment.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Project specific
+import benchmarks
+
+MODES = ('cold', 'preload')
+
+_REQUESTS = (
+    ('GET', '/', {}),
+    ('GET', '/grade', {}),
+    ('POST', '/play', {'data': {'level': 0}}),
+    ('POST', '/api/v1/play', {'json': {'level': 0}}),
+)
+_MEMORY_FIELDS = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}
+
+
+def _serve_first_requests(app):
+    client = app.test_client()
+    for method, path, body in _REQUESTS:
+        response = client.open(path, method=method, **body)
+        assert response.status_code == 200, f'{method} {path}: {response.status_code}'
+
+
+def _memory(pid):
+    usage = dict.fromkeys(_MEMORY_FIELDS.values(), 0)
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for line in smaps:
+            field, _, value = line.partition(':')
+            if field in _MEMORY_FIELDS:
+                usage[_MEMORY_FIELDS[field]] += int(value.split()[0]) * 1024
+    return usage
+
+
+def _run_workers(mode, workers):
+    app = None
+    if mode == 'preload':
+        import knowlift
+
+        app = benchmarks.create_app()
+        knowlift.preload(app)
+
+    release_read, release_write = os.pipe()
+    processes = []
+    for _ in range(workers):
+        ready_read, ready_write = os.pipe()
+        forked_at = time.monotonic()
+        pid = os.fork()
+        if pid == 0:  # worker
+            try:
+                os.close(release_write)
+                worker_app = app or benchmarks.create_app()
+                _serve_first_requests(worker_app)
+                os.write(ready_write, str(time.monotonic() - forked_at).encode())
+                os.close(ready_write)
+                os.read(release_read, 1)  # stay alive until the master measured every worker
+            finally:
+                os._exit(0)
+        os.close(ready_write)
+        processes.append((pid, ready_read))
+
+    reports = []
+    for pid, ready_read in processes:
+        with os.fdopen(ready_read) as ready:
+            ready_seconds = float(ready.read())
+        reports.append({'pid': pid, 'ready': ready_seconds})
+    for report in reports:
+        report.update(_memory(report['pid']))
+
+    os.close(release_write)
+    for pid, _ in processes:
+        os.waitpid(pid, 0)
+    return reports
+
+
+def _format_row(mode, reports):
+    mebibyte = 1024 * 1024
+    return (
+        f"{mode:<8} {len(reports):>7} "
+        f"{statistics.mean(r['ready'] for r in reports) * 1000:>10.1f} "
+        f"{max(r['ready'] for r in reports) * 1000:>9.1f} "
+        f"{statistics.mean(r['rss'] for r in reports) / mebibyte:>8.1f} "
+        f"{statistics.mean(r['pss'] for r in reports) / mebibyte:>8.1f} "
+        f"{statistics.mean(r['uss'] for r in reports) / mebibyte:>8.1f}"
+    )
+
+
+def main(arguments=None):
+    """
+    Run every mode in a process of its own and report the mean memory & fork-to-ready time of
+        their workers.
+
+    :param arguments: The command line arguments, defaults to sys.argv.
+    :type arguments: list
+    :return: None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--workers', type=int, default=4, help='Workers forked per mode.')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    options = parser.parse_args(arguments)
+
+    if options.mode:  # within the master of a mode
+        json.dump(_run_workers(options.mode, options.workers), sys.stdout)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        environment = benchmarks.scratch_environment(directory)
+        subprocess.run(
+            [sys.executable, '-c', 'import benchmarks; benchmarks.prepare_database()'],
+            cwd=directory, env=environment, check=True,
+        )
+
+        print(f"{'mode':<8} {'workers':>7} {'ready ms':>10} {'max ms':>9} "
+              f"{'RSS MiB':>8} {'PSS MiB':>8} {'USS MiB':>8}")
+        for mode in MODES:
+            process = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.prefork', '--mode', mode,
+                 '--workers', str(options.workers)],
+                cwd=directory, env=environment, check=True, stdout=subprocess.PIPE, text=True,
+            )
+            print(_format_row(mode, json.loads(process.stdout)))
+
+
+if __name__ == '__main__':
+    main()
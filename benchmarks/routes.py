@@ -0,0 +1,212 @@
+"""
+Time thousands of in-process requests per route (via the flask test client) and compare their
+    medians against a baseline, to catch a view or template change that slows a route down.
+
+Functions:
+==========
+    compare: Compare the medians of a run against the medians of a baseline.
+    main: Measure every route, then save the results as the baseline or compare them to it.
+    measure: Time a number of requests for every route.
+
+CONSTANTS:
+==========
+    BASELINE: The default path of the baseline.
+
+Notes
+=====
+    * Usage: python -m benchmarks.routes [--requests 2000] [--save | --compare]
+        [--baseline PATH] [--threshold 1.5]
+    * The routes run against tests.TEST_APPLICATION (i.e the test configuration and database):
+        index, grade, play (one route per level), result (both correct and incorrect answers) and
+        an unknown page (404). Each request is checked for the expected status code.
+    * Runs are deterministic: the questions answered by the result routes are drawn from a seeded
+        random generator, every route is warmed up before being timed, and logging is disabled
+        while timing (so the 404s don't flood the console).
+    * --compare exits with status 1 when the median of any route is more than --threshold times
+        its baseline. Baselines are machine specific, save them on the machine that compares them.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+# Project specific
+import tests
+
+from knowlift import number_distance
+from knowlift import tokens
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'routes.json')
+
+_QUESTIONS = 100
+
+
+def _result_form(question, offset):
+    answer = number_distance.count_integers(
+        question['left_glyph'], question['right_glyph'],
+        question['start_internal'], question['stop_internal'],
+    ) + offset
+    token = tokens.issue(question, tests.TEST_APPLICATION.config['SECRET_KEY'])
+    return {'data': {'data': json.dumps({'token': token, 'answer': answer})}}
+
+
+def _routes(seed):
+    # name: (method, path, expected status, an endless supply of request keyword arguments)
+    random.seed(seed)  # generate_interval draws from the global generator
+    questions = [
+        number_distance.generate_interval(number_distance.GAME_LEVELS[level])
+        for level in itertools.islice(
+            itertools.cycle(range(len(number_distance.GAME_LEVELS))), _QUESTIONS
+        )
+    ]
+
+    routes = {
+        'index': ('GET', '/', 200, itertools.repeat({})),
+        'grade': ('GET', '/grade', 200, itertools.repeat({})),
+    }
+    for level in range(len(number_distance.GAME_LEVELS)):
+        form = {'data': {'level': level}}
+        routes[f'play[{level}]'] = ('POST', '/play', 200, itertools.repeat(form))
+    routes['result[correct]'] = (
+        'POST', '/result', 200, itertools.cycle([_result_form(q, 0) for q in questions]),
+    )
+    routes['result[incorrect]'] = (
+        'POST', '/result', 200, itertools.cycle([_result_form(q, 1) for q in questions]),
+    )
+    routes['not_found'] = ('GET', '/knowlift/missing', 404, itertools.repeat({}))
+    return routes
+
+
+def measure(requests, seed=0):
+    """
+    Time a number of requests for every route, after warming each route up.
+
+    :param requests: The number of requests timed per route.
+    :type requests: int
+    :param seed: The seed of the questions answered by the result routes.
+    :type seed: int
+    :return: The median, 95th percentile & mean latency (in milliseconds) per route.
+    :rtype: dict
+    """
+    client = tests.TEST_APPLICATION.test_client()
+    results = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        for name, (method, path, status, arguments) in _routes(seed).items():
+            latencies = []
+            for index in range(requests + max(requests // 10, 1)):
+                keyword_arguments = next(arguments)
+                start = time.perf_counter()
+                response = client.open(path, method=method, **keyword_arguments)
+                elapsed = time.perf_counter() - start
+                if response.status_code != status:
+                    raise RuntimeError(f'{name}: expected {status}, got {response.status_code}.')
+                if index >= max(requests // 10, 1):  # past the warm up
+                    latencies.append(elapsed * 1000)
+
+            latencies.sort()
+            results[name] = {
+                'median': round(statistics.median(latencies), 4),
+                'p95': round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 4),
+                'mean': round(statistics.mean(latencies), 4),
+                'requests': requests,
+            }
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare the medians of a run against the medians of a baseline.
+
+    :param baseline: The results of the baseline, as returned by measure.
+    :type baseline: dict
+    :param current: The results of the run, as returned by measure.
+    :type current: dict
+    :param threshold: The ratio (current / baseline median) above which a route regressed.
+    :type threshold: float
+    :return: The name, baseline median, current median, ratio & whether it regressed, per route
+        (routes missing from the baseline are skipped).
+    :rtype: list
+    """
+    rows = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['median'], result['median']
+        ratio = after / before if before else float('inf')
+        rows.append((name, before, after, ratio, ratio > threshold))
+    return rows
+
+
+def main(arguments=None):
+    """
+    Measure every route, print the results, then save them as the baseline (--save) or compare
+        them to the baseline (--compare).
+
+    :param arguments: The command line arguments, defaults to sys.argv.
+    :type arguments: list
+    :return: The exit status, 1 if any route regressed, 0 otherwise.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--requests', type=int, default=2000, help='Requests timed per route.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the answered questions.')
+    parser.add_argument('--baseline', default=BASELINE, help='Path of the baseline (JSON).')
+    parser.add_argument(
+        '--threshold', type=float, default=1.5,
+        help='Flag routes whose median is more than this many times the baseline median.',
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--save', action='store_true', help='Save the results as the baseline.')
+    mode.add_argument('--compare', action='store_true', help='Compare the results to the baseline.')
+    options = parser.parse_args(arguments)
+
+    results = measure(options.requests, options.seed)
+
+    if options.compare:
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['routes']
+        rows = compare(baseline, results, options.threshold)
+        print(f"{'route':<18} {'baseline ms':>11} {'median ms':>10} {'ratio':>6}")
+        for name, before, after, ratio, regressed in rows:
+            flag = '  REGRESSED' if regressed else ''
+            print(f'{name:<18} {before:>11.4f} {after:>10.4f} {ratio:>6.2f}{flag}')
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print(f"{len(regressions)} route(s) regressed: {', '.join(regressions)}")
+            return 1
+        return 0
+
+    print(f"{'route':<18} {'median ms':>10} {'p95 ms':>8} {'mean ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['median']:>10.4f} {result['p95']:>8.4f} {result['mean']:>8.4f}")
+
+    if options.save:
+        os.makedirs(os.path.dirname(os.path.abspath(options.baseline)), exist_ok=True)
+        with open(options.baseline, 'w') as baseline_file:
+            json.dump(
+                {'python': sys.version.split()[0], 'requests': options.requests,
+                 'seed': options.seed, 'routes': results},
+                baseline_file, indent=2,
+            )
+        print(f'Saved the baseline to {options.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -97,6 +97,142 @@ class Config:
     # SECURITY WARNING: Set this to some random bytes. Keep this value secret in production!
     SECRET_KEY = '261c501ff27fc199718be6a7c8d2115d349c4ef7b26ab11222d95019112a7868'
 
+    # The number of seconds a question (i.e its signed token, see knowlift.tokens) can be answered.
+    QUESTION_TOKEN_MAX_AGE = 24 * 60 * 60
+
+    # The maximum number of compiled SQL statements the database engine keeps around for reuse.
+    COMPILED_CACHE_SIZE = 500
+
+    # Statements that take longer than this many seconds are logged by the slow query logger.
+    SLOW_QUERY_THRESHOLD = 0.1
+
+    # The fraction (0 to 1) of slow statements that actually get logged.
+    SLOW_QUERY_SAMPLE_RATE = 1.0
+
+    # Whether to send the time spent in the database to clients via the Server-Timing header.
+    DB_TIMING_HEADER = False
+
+    # The key derivation function used to hash passwords, either 'scrypt' or 'pbkdf2_sha256'.
+    # The cost parameters below can be changed at any time, outdated hashes are upgraded on login.
+    PASSWORD_HASHER = 'scrypt'
+    PASSWORD_SCRYPT_N = 2**14
+    PASSWORD_SCRYPT_R = 8
+    PASSWORD_SCRYPT_P = 1
+    PASSWORD_PBKDF2_ITERATIONS = 260000
+
+    # Passwords are hashed on a dedicated pool of processes, so that logins can't starve requests.
+    # The number of processes, the number of hashes allowed to wait for a process & the number of
+    # seconds a request waits for its hash before giving up.
+    PASSWORD_POOL_SIZE = 2
+    PASSWORD_POOL_MAX_PENDING = 32
+    PASSWORD_POOL_TIMEOUT = 5
+
+    # Answers are stored in monthly partitions. This many recent months are kept as individual
+    # answers by: flask answers rollup, older ones are compacted into daily aggregates.
+    ANSWER_PARTITIONS_KEPT = 2
+
+    # The number of seconds clients may reuse the pages served from the page cache without asking
+    # again. After that, they revalidate them via their ETags.
+    PAGE_CACHE_MAX_AGE = 3600
+
+    # The manifest written by: flask assets build. Static URLs resolve to the content hashed copies
+    # listed in it (served with a year long Cache-Control). None serves the original files instead.
+    ASSET_MANIFEST = os.path.join(BASE_DIR, 'knowlift', 'static', 'dist', 'manifest.json')
+
+    # Responses are gzip compressed, as they're streamed, at this level (1 is fastest, 9 smallest).
+    # Bodies known to be smaller than GZIP_MINIMUM_SIZE bytes and bodies whose content types start
+    # with any of GZIP_EXCLUDED_TYPES (i.e formats that are compressed already) are sent as is.
+    GZIP_LEVEL = 6
+    GZIP_MINIMUM_SIZE = 500
+    GZIP_EXCLUDED_TYPES = (
+        'image/', 'audio/', 'video/', 'font/woff', 'application/gzip', 'application/zip',
+        'application/octet-stream', 'text/event-stream',
+    )
+
+    # The directory compiled templates are persisted to, shared by every worker (None disables it).
+    TEMPLATE_BYTECODE_CACHE = os.path.join(BASE_DIR, '.jinja_cache')
+
+    # Whether to load every template while the application is created, i.e before serving traffic.
+    # Compare the first request with cold vs warm templates via: flask templates measure
+    TEMPLATE_WARM_UP = False
+
+    # Whether to create the database engine (bringing the schema up to date) and load the country
+    # cache while the application is created. By default both happen on first use, so creating the
+    # application costs no I/O. Enable it when the application is preloaded by a master process
+    # (e.g gunicorn --preload), the forked workers then start warm.
+    WARM_UP = False
+
+    # Whether to profile (via cProfile) a PROFILING_SAMPLE_RATE fraction (0 to 1) of the requests,
+    # as well as every request whose PROFILING_HEADER header is set to PROFILING_TOKEN (None
+    # disables such privileged requests). The most recent PROFILING_MAX_FILES profiles are kept in
+    # PROFILING_DIRECTORY and aggregated by: flask profiles top
+    PROFILING_ENABLED = False
+    PROFILING_SAMPLE_RATE = 0.01
+    PROFILING_HEADER = 'X-Profile'
+    PROFILING_TOKEN = None
+    PROFILING_DIRECTORY = os.path.join(BASE_DIR, 'profiles')
+    PROFILING_MAX_FILES = 500
+
+    # Metrics are exposed at /metrics. In pre-fork deployments, set METRICS_DIRECTORY to a directory
+    # shared by the worker processes (emptied before the server starts): each of them publishes its
+    # metrics to a METRICS_FILE_SIZE bytes memory mapped file there, every METRICS_PUBLISH_INTERVAL
+    # seconds, and a scrape served by any of them reports the metrics of all of them.
+    METRICS_DIRECTORY = None
+    METRICS_FILE_SIZE = 1024 * 1024
+    METRICS_PUBLISH_INTERVAL = 5
+
+    # The default & maximum number of questions of a drill streamed by /play/stream, as well as the
+    # maximum number of seconds between two of its questions.
+    DRILL_QUESTIONS = 60
+    DRILL_MAX_QUESTIONS = 200
+    DRILL_MAX_INTERVAL = 60
+
+    # The maximum number of answers graded (and stored) at once by /api/v1/result/batch.
+    BATCH_MAX_ANSWERS = 200
+
+    # Requests to RATE_LIMIT_ENDPOINTS take a token from the bucket of their IP & from the bucket of
+    # their client (see knowlift.rate_limit). Buckets hold up to *_BURST tokens and are refilled at
+    # *_RATE tokens per second. The 'memory' backend suits a single worker process, the 'shared'
+    # one keeps the buckets in RATE_LIMIT_SHARED_FILE, shared by every worker process. Either keeps
+    # at most RATE_LIMIT_MAX_KEYS buckets around.
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_ENDPOINTS = (
+        'play', 'result', 'api_play', 'api_result', 'play_stream', 'api_answer', 'api_result_batch',
+    )
+    RATE_LIMIT_IP_RATE = 10
+    RATE_LIMIT_IP_BURST = 60
+    RATE_LIMIT_CLIENT_RATE = 2
+    RATE_LIMIT_CLIENT_BURST = 20
+    RATE_LIMIT_COOKIE = 'knowlift_client'
+    RATE_LIMIT_BACKEND = 'memory'
+    RATE_LIMIT_SHARED_FILE = os.path.join(BASE_DIR, 'rate_limits.mmap')
+    RATE_LIMIT_MAX_KEYS = 65536
+
+    # The progress of the most recently used PROGRESS_CACHE_SIZE users is kept in memory by each
+    # worker (see knowlift.progress). Updates are written back every PROGRESS_FLUSH_INTERVAL seconds
+    # (0 only writes them back when the process exits), PROGRESS_FLUSH_BATCH_SIZE rows per
+    # transaction.
+    PROGRESS_CACHE_SIZE = 50000
+    PROGRESS_FLUSH_INTERVAL = 5
+    PROGRESS_FLUSH_BATCH_SIZE = 500
+
+    # The number of users inserted within a single transaction by: flask users import
+    IMPORT_CHUNK_SIZE = 500
+
+    # Identical log messages are logged once per LOG_AGGREGATION_WINDOW seconds, followed by their
+    # count, e.g: 404 /wp-admin x 1,342 in 60s. LOG_SAMPLE_RATES maps logger names to the fraction
+    # (0 to 1) of the repeated messages logged anyway (see knowlift.log_aggregation). Both apply to
+    # the 'aggregate' filters of LOGGING_CONFIG, unless these set a window or sample rates of their
+    # own.
+    LOG_AGGREGATION_WINDOW = 60
+    LOG_SAMPLE_RATES = {}
+
+    # Log records are handed over to a background thread (which formats & writes them) through a
+    # queue of up to LOG_QUEUE_SIZE records, records are dropped while it's full (0 logs them on the
+    # calling thread instead). Set LOG_JSON to log JSON objects, one per line, instead of text.
+    LOG_QUEUE_SIZE = 10000
+    LOG_JSON = False
+
     # Initial configuration for the logging machinery.
     LOGGING_CONFIG = {
         'version': 1,
@@ -105,10 +241,16 @@ class Config:
                 'format': f'[%(asctime)s] %(levelname)s in %(module)s, line %(lineno)d: %(message)s'
             },
         },
+        'filters': {
+            'aggregate': {
+                '()': 'knowlift.log_aggregation.AggregatingFilter',
+            },
+        },
         'handlers': {
             'default': {
                 'class': 'logging.StreamHandler',
                 'formatter': 'default',
+                'filters': ['aggregate'],
             },
         },
         # We need to set the loggers explicitly otherwise they will wind up disabled on config load.
@@ -145,6 +287,10 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     DATABASE = os.environ.get('FLASK_DATABASE')  # this can also be overridden via settings.py
+    SLOW_QUERY_SAMPLE_RATE = 0.1
+    TEMPLATE_WARM_UP = True
+    RATE_LIMIT_BACKEND = 'shared'
+    PROFILING_TOKEN = os.environ.get('FLASK_PROFILING_TOKEN')  # also overridable via settings.py
     SECRET_KEY = os.environ.get('FLASK_SECRET_KEY')  # this can also be overridden via settings.py
     LOGGING_CONFIG = {
         'version': 1,
@@ -160,18 +306,21 @@ class ProductionConfig(Config):
             'console_filter': {
                 '()': ConsoleFilter,
             },
+            'aggregate': {
+                '()': 'knowlift.log_aggregation.AggregatingFilter',
+            },
         },
         'handlers': {
             'default': {
                 'class': 'logging.StreamHandler',
                 'formatter': 'default',
-                'filters': ['console_filter'],
+                'filters': ['console_filter', 'aggregate'],
             },
             'file': {
                 'class': 'logging.handlers.RotatingFileHandler',
                 'formatter': 'default',
                 'filename': 'errors.log',
-                'filters': ['file_filter'],
+                'filters': ['file_filter', 'aggregate'],
                 'maxBytes': 500 * 1024 * 1024,
                 'backupCount': 1,
             },
@@ -204,6 +353,9 @@ class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
     DATABASE = os.path.join(Config.BASE_DIR, 'development.db')
+    DB_TIMING_HEADER = True
+    PAGE_CACHE_MAX_AGE = 0
+    ASSET_MANIFEST = None
     LOGGING_CONFIG = {
         'version': 1,
         'formatters': {
@@ -245,6 +397,14 @@ class TestConfig(Config):
     DEBUG = False
     TESTING = True
     DATABASE = os.path.join(Config.BASE_DIR, 'test.db')
+    PASSWORD_SCRYPT_N = 2**8
+    PASSWORD_PBKDF2_ITERATIONS = 1000
+    PASSWORD_POOL_SIZE = 1
+    ASSET_MANIFEST = None
+    TEMPLATE_BYTECODE_CACHE = None
+    RATE_LIMIT_ENABLED = False
+    LOG_QUEUE_SIZE = 0
+    PROGRESS_FLUSH_INTERVAL = 0
     LOGGING_CONFIG = {
         'version': 1,
         'formatters': {
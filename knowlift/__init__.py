@@ -4,19 +4,49 @@ Bundle core modules that, via their logic and/or configuration make this applica
 Functions:
 ==========
     create_app: Create and configure a flask application.
+    preload: Fully initialize an application in a master process, ahead of forking its workers.
+    warm_up: Initialize the subsystems that are otherwise initialized on first use.
 
 Modules:
 ========
+    assets: Fingerprint and precompress the static assets, then serve them for browsers to keep.
+    auth: Hash and verify passwords on a dedicated pool of processes.
+    bulk_import: Import users in bulk from CSV or JSON-lines sources.
+    cli: Expose maintenance commands through the flask command line interface.
+    compression: Compress responses on the fly, as they're streamed, for clients that accept gzip.
+    countries: Keep the country reference data in memory.
     db: Store logic that enables database interaction.
+    iso3166: Store the ISO 3166-1 reference data used to seed the country entity.
     lexicon: Implement a mechanism for building sentences from a given lexicon.
+    log_aggregation: Collapse bursts of identical log messages into a single line and a count.
+    log_queue: Keep log I/O off the request threads by handing records over to a background thread.
+    metrics: Count what the application does and expose it to Prometheus.
+    migrations: Bring the database schema up to date through an ordered series of migrations.
     models: Define entities (tables/relations) and relationships among them.
     number_distance: Build mathematical intervals based on upper and lower bounds.
+    page_cache: Serve pages that only depend on their templates from memory.
+    partitions: Store answers in monthly partitions and compact the old ones into daily rollups.
+    profiling: Profile a sample of the requests served and find out where their time goes.
+    progress: Keep the progress of each user in memory and write it back in batches.
+    rate_limit: Throttle the endpoints that are cheap to call but expensive to serve.
+    repository: Gather the hot queries of this application behind precompiled statements.
+    templating: Keep compiled templates around, across processes and ahead of the first request.
+    tokens: Issue and verify compact, signed tokens that describe a question.
     views: Handle HTTP requests.
 
 Notes:
 ======
     This package is intended to bundle all of the core functionality of this application.
 
+    Creating an application costs no I/O: the database engine (along with the migrations) and the
+        country cache are initialized on first use, or up front via warm_up (see WARM_UP). The
+        maintenance commands (knowlift.cli) are only imported by the flask command.
+
+    Pre-forking servers should load wsgi.py in the master process (e.g gunicorn --preload), which
+        calls preload: the workers then share whatever the master initialized, copy-on-write.
+        The database engines, the password hashing pool and the background threads (logging,
+        metrics) are recreated by each worker after the fork.
+
 Miscellaneous objects:
 ======================
     Except for the public objects exported by this module and their public APIs (if applicable),
@@ -24,14 +54,26 @@ Miscellaneous objects:
         over time.
 """
 
-# Standard Library
-from logging import config
+# Standard library
+import gc
+import os
 
 # Third-party
 import flask
 
 # Project specific
+from knowlift import assets
+from knowlift import compression
+from knowlift import countries
 from knowlift import db
+from knowlift import log_queue
+from knowlift import metrics
+from knowlift import number_distance
+from knowlift import page_cache
+from knowlift import profiling
+from knowlift import progress
+from knowlift import rate_limit
+from knowlift import templating
 from knowlift import views
 
 
@@ -48,20 +90,104 @@ def create_app():
     app.config.from_object(f'default_settings.{flask_environment}')
     app.config.from_pyfile('settings.py', silent=True)
 
-    config.dictConfig(app.config['LOGGING_CONFIG'])
+    log_queue.init_logging(app)
 
     db.init_db(app)
+    metrics.init_metrics(app)
+    progress.init_progress(app)
+    rate_limit.init_rate_limiter(app)
+    page_cache.init_cache(app)
+    templating.init_templates(app)
+    assets.load_manifest(app)
 
     app.add_url_rule('/', 'index', views.index)
     app.add_url_rule('/about', 'about', views.about)
     app.add_url_rule('/grade', 'grade', views.grade)
     app.add_url_rule('/ladder', 'ladder', views.ladder)
     app.add_url_rule('/legal', 'legal', views.legal)
+    app.add_url_rule('/metrics', 'metrics', views.export_metrics)
     app.add_url_rule('/play', 'play', views.play, methods=['POST'])
+    app.add_url_rule('/play/stream', 'play_stream', views.play_stream)
     app.add_url_rule('/result', 'result', views.result, methods=['POST'])
+    app.add_url_rule('/api/v1/answer', 'api_answer', views.api_answer, methods=['POST'])
+    app.add_url_rule('/api/v1/play', 'api_play', views.api_play, methods=['POST'])
+    app.add_url_rule('/api/v1/result', 'api_result', views.api_result, methods=['POST'])
+    app.add_url_rule(
+        '/api/v1/result/batch', 'api_result_batch', views.api_result_batch, methods=['POST']
+    )
+
+    app.url_defaults(assets.fingerprint_url)
+    app.view_functions['static'] = assets.send_static_file
 
     app.register_error_handler(404, views.page_not_found)
+    app.register_error_handler(429, views.too_many_requests)
     app.register_error_handler(500, views.internal_server_error)
 
+    app.wsgi_app = compression.GzipMiddleware(
+        app.wsgi_app,
+        level=app.config['GZIP_LEVEL'],
+        minimum_size=app.config['GZIP_MINIMUM_SIZE'],
+        excluded_types=app.config['GZIP_EXCLUDED_TYPES'],
+    )
+
+    app.before_request(metrics.start_request)
+    app.before_request(rate_limit.limit_request)
+    app.before_request(profiling.start_profiling)
+    app.after_request(db.report_request_stats)
+    app.after_request(metrics.record_request)
+    app.after_request(rate_limit.set_client_cookie)
+    app.teardown_request(profiling.stop_profiling)
     app.teardown_appcontext(db.close_connection)
+
+    # The workers serving requests don't need the maintenance commands (nor what they import).
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from knowlift import cli
+
+        app.cli.add_command(cli.answers_cli)
+        app.cli.add_command(cli.assets_cli)
+        app.cli.add_command(cli.countries_cli)
+        app.cli.add_command(cli.profiles_cli)
+        app.cli.add_command(cli.templates_cli)
+        app.cli.add_command(cli.users_cli)
+
+    if app.config['WARM_UP']:
+        warm_up(app)
     return app
+
+
+def warm_up(app):
+    """
+    Create the database engine (bringing the schema up to date) and load the country cache, which
+        are otherwise initialized by the first request that needs them.
+
+    :param app: The application to warm up.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    db.get_engine(app)
+    countries.init_cache(app)
+
+
+def preload(app):
+    """
+    Fully initialize an application in the master process of a pre-forking server, i.e warm it up
+        (see warm_up), validate the game levels, compile the templates & render the cached pages.
+
+    The objects that survived so far are then moved out of the garbage collector's reach (via
+        gc.freeze), so that collections within the workers don't write to (i.e copy) the memory
+        pages they share with the master.
+
+    :param app: The application to preload.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    warm_up(app)
+    number_distance.validate_game_levels(number_distance.GAME_LEVELS)
+    if not app.config['TEMPLATE_WARM_UP']:  # otherwise they're compiled by create_app already
+        templating.warm_up(app)
+    page_cache.prime(app, views.CACHED_PAGES)
+
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,182 @@
+"""
+Fingerprint and precompress the static assets, then serve them so that browsers cache them forever.
+
+Functions:
+==========
+    build: Write content hashed (and gzip compressed) copies of the static assets plus a manifest.
+    fingerprint_url: Point the URLs built for static assets to their content hashed copies.
+    load_manifest: Load the manifest written by build into the application's configuration.
+    send_static_file: Serve a static asset, precompressed and immutable if it's content hashed.
+
+CONSTANTS:
+==========
+    BUILD_FOLDER: The folder (within the static folder) the content hashed copies are written to.
+    CACHE_CONTROL: The Cache-Control header sent along with content hashed assets.
+    COMPRESSIBLE_EXTENSIONS: The file extensions worth compressing (e.g images already are).
+
+Notes
+=====
+    * Run flask assets build before each deployment. Since the name of each copy changes whenever
+        its content does, copies can be cached by browsers (and proxies) for a year, i.e repeat
+        visits only pay for the assets that actually changed.
+    * Templates must reference static assets via url_for('static', filename=...), the manifest is
+        then consulted transparently.
+    * Without a manifest (ASSET_MANIFEST is None or the build hasn't been run), the original files
+        are served as usual, e.g in development and while testing.
+    * Source maps keep their original names, since the assets referencing them do so by name. As
+        their content may change under the same name, they're served like the original files, i.e
+        they're never marked immutable.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+
+# Third-party
+import flask
+
+logger = logging.getLogger(__name__)
+
+BUILD_FOLDER = 'dist'
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt')
+
+
+def _fingerprint(relative_path, content):
+    if relative_path.endswith('.map'):
+        return relative_path
+
+    root, extension = os.path.splitext(relative_path)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+
+def build(static_folder, build_folder=None):
+    """
+    Write a content hashed copy of each static asset, a gzip compressed copy of each compressible
+        asset (if that makes it smaller) and a manifest mapping the original names to the copies.
+
+    The build folder is emptied beforehand, hence copies of stale assets don't pile up.
+
+    :param static_folder: The folder holding the original static assets.
+    :type static_folder: str
+    :param build_folder: The folder to write to, defaults to BUILD_FOLDER within static_folder.
+    :type build_folder: str
+    :return: The manifest, i.e a mapping of original names to content hashed names (both relative
+        to the static folder, using forward slashes).
+    :rtype: dict
+    """
+    build_folder = build_folder or os.path.join(static_folder, BUILD_FOLDER)
+    shutil.rmtree(build_folder, ignore_errors=True)
+
+    manifest = {}
+    for directory, directory_names, file_names in os.walk(static_folder):
+        if os.path.abspath(directory) == os.path.abspath(static_folder):
+            directory_names[:] = [name for name in directory_names if name != BUILD_FOLDER]
+        for file_name in sorted(file_names):
+            source = os.path.join(directory, file_name)
+            relative_path = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as asset:
+                content = asset.read()
+
+            hashed_path = _fingerprint(relative_path, content)
+            destination = os.path.join(build_folder, *hashed_path.split('/'))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            with open(destination, 'wb') as copy:
+                copy.write(content)
+
+            if file_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                compressed = gzip.compress(content, compresslevel=9, mtime=0)
+                if len(compressed) < len(content):
+                    with open(f'{destination}.gz', 'wb') as copy:
+                        copy.write(compressed)
+
+            manifest[relative_path] = f'{BUILD_FOLDER}/{hashed_path}'
+
+    with open(os.path.join(build_folder, 'manifest.json'), 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+    logger.info(f'Built {len(manifest)} static assets into {build_folder}.')
+    return manifest
+
+
+def load_manifest(app):
+    """
+    Load the manifest pointed to by ASSET_MANIFEST into STATIC_MANIFEST (empty if there's none),
+        and the names of the copies that are actually content hashed into STATIC_FINGERPRINTED.
+
+    :param app: The application to load the manifest for.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    manifest_path = app.config['ASSET_MANIFEST']
+    manifest = {}
+    if manifest_path:
+        try:
+            with open(manifest_path, encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            logger.warning(f'No asset manifest at {manifest_path}, run: flask assets build')
+
+    app.config['STATIC_MANIFEST'] = manifest
+    app.config['STATIC_FINGERPRINTED'] = frozenset(
+        copy for original, copy in manifest.items() if copy != f'{BUILD_FOLDER}/{original}'
+    )
+
+
+def fingerprint_url(endpoint, values):
+    """
+    Swap the filename of a static asset for the name of its content hashed copy (if any).
+
+    Meant to be registered via flask.Flask.url_defaults.
+
+    :param endpoint: The endpoint the URL is built for.
+    :type endpoint: str
+    :param values: The values the URL is built from, modified in place.
+    :type values: dict
+    :return: None
+    :rtype: None
+    """
+    if endpoint == 'static' and 'filename' in values:
+        manifest = flask.current_app.config['STATIC_MANIFEST']
+        values['filename'] = manifest.get(values['filename'], values['filename'])
+
+
+def send_static_file(filename):
+    """
+    Serve a static asset. Content hashed copies are cached for a year and, if the client accepts
+        it, sent gzip compressed straight from their precompressed variant.
+
+    Meant to replace the view function of the static endpoint.
+
+    :param filename: The path of the asset, relative to the static folder.
+    :type filename: str
+    :return: The asset.
+    :rtype: flask.Response
+    """
+    app = flask.current_app
+    if filename not in app.config['STATIC_FINGERPRINTED']:
+        return app.send_static_file(filename)
+
+    compressed = f'{filename}.gz'
+    accepts_gzip = flask.request.accept_encodings['gzip']
+    if accepts_gzip and os.path.isfile(flask.safe_join(app.static_folder, compressed)):
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = flask.send_from_directory(app.static_folder, compressed, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = flask.send_from_directory(app.static_folder, filename)
+
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
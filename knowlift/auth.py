@@ -0,0 +1,283 @@
+"""
+Hash and verify passwords without blocking the threads that serve requests.
+
+Key derivation functions (scrypt, PBKDF2) are slow by design, i.e tens of milliseconds of CPU per
+    call. Running them inline would starve the other requests (e.g /play, /result) during a burst
+    of logins, hence every derivation runs on a dedicated, bounded pool of processes.
+
+Classes:
+========
+    AuthError: Base class for the errors raised by this module.
+    PoolBusyError: Raise when too many derivations are already pending.
+    PoolTimeoutError: Raise when a derivation doesn't complete in due time.
+
+Functions:
+==========
+    authenticate: Check a user's credentials, upgrading the stored hash when its cost is outdated.
+    hash_password: Hash a password with the configured algorithm and cost parameters.
+    hash_passwords: Hash many passwords at once (e.g for bulk imports).
+    needs_rehash: Check whether a hash was produced with outdated cost parameters.
+    shutdown_pool: Stop the worker processes of the hashing pool.
+    verify_password: Check a password against a hash.
+
+CONSTANTS:
+==========
+    ALGORITHMS: The supported key derivation functions.
+
+Notes
+=====
+    * Hashes are stored as '$' separated strings of the form:
+        pbkdf2_sha256$<iterations>$<salt>$<digest>
+        scrypt$<n>$<r>$<p>$<salt>$<digest>
+    * The cost parameters (PASSWORD_*) can be tuned at any time. Existing hashes keep working and
+        are transparently upgraded on the next successful login.
+    * Forked processes (e.g workers forked from a preloaded master) start a pool of their own. The
+        pool of each process is shut down when the process exits.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import atexit
+import base64
+import concurrent.futures
+import datetime
+import hashlib
+import hmac
+import logging
+import os
+import threading
+
+# Third-party
+import flask
+
+# Project specific
+from knowlift import models
+from knowlift import repository
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ('pbkdf2_sha256', 'scrypt')
+
+_SALT_SIZE = 16
+_pool = None
+_pool_semaphore = None
+_pool_lock = threading.Lock()
+
+
+class AuthError(Exception):
+    """Base class for the errors raised while hashing or verifying passwords."""
+
+
+class PoolBusyError(AuthError):
+    """Raise when the number of pending derivations reached PASSWORD_POOL_MAX_PENDING."""
+
+
+class PoolTimeoutError(AuthError):
+    """Raise when a derivation doesn't complete within PASSWORD_POOL_TIMEOUT seconds."""
+
+
+def _derive(algorithm, params, password, salt):
+    # Runs within the worker processes, hence it must stay a picklable, module level function.
+    if algorithm == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, *params)
+    elif algorithm == 'scrypt':
+        n, r, p = params
+        maxmem = 128 * r * (n + p + 2)
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem)
+    else:
+        raise ValueError(f'Unknown algorithm: {algorithm}. Expected one of {ALGORITHMS}.')
+
+
+def _forget_pool_in_child():
+    # The pool (its worker processes & management thread) belongs to the parent process.
+    global _pool, _pool_semaphore, _pool_lock
+
+    _pool, _pool_semaphore, _pool_lock = None, None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool_in_child)
+
+
+def _get_pool():
+    global _pool, _pool_semaphore
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = flask.current_app.config
+                _pool_semaphore = threading.BoundedSemaphore(config['PASSWORD_POOL_MAX_PENDING'])
+                _pool = concurrent.futures.ProcessPoolExecutor(config['PASSWORD_POOL_SIZE'])
+    return _pool, _pool_semaphore
+
+
+def shutdown_pool(wait=True):
+    """
+    Stop the worker processes of the hashing pool. The pool is recreated on its next use.
+
+    :param wait: Whether to wait for the pending derivations to complete.
+    :type wait: bool
+    """
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+# Stopped before the interpreter tears down the modules its management thread relies upon.
+atexit.register(shutdown_pool)
+
+
+def _run(algorithm, params, password, salt):
+    pool, semaphore = _get_pool()
+    if not semaphore.acquire(blocking=False):
+        raise PoolBusyError('Too many passwords are being hashed at the moment.')
+
+    try:
+        future = pool.submit(_derive, algorithm, params, password, salt)
+    except Exception:
+        semaphore.release()
+        raise
+
+    future.add_done_callback(lambda _: semaphore.release())
+    try:
+        return future.result(timeout=flask.current_app.config['PASSWORD_POOL_TIMEOUT'])
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise PoolTimeoutError('Hashing the password took too long.')
+
+
+def _current_params():
+    config = flask.current_app.config
+    algorithm = config['PASSWORD_HASHER']
+    if algorithm == 'pbkdf2_sha256':
+        return algorithm, (config['PASSWORD_PBKDF2_ITERATIONS'],)
+    else:
+        return algorithm, (config['PASSWORD_SCRYPT_N'], config['PASSWORD_SCRYPT_R'],
+                           config['PASSWORD_SCRYPT_P'])
+
+
+def _encode(algorithm, params, salt, digest):
+    fields = (algorithm, *map(str, params), base64.b64encode(salt).decode(),
+              base64.b64encode(digest).decode())
+    return '$'.join(fields)
+
+
+def _decode(encoded):
+    algorithm, *params, salt, digest = encoded.split('$')
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Unknown algorithm: {algorithm}. Expected one of {ALGORITHMS}.')
+    return algorithm, tuple(map(int, params)), base64.b64decode(salt), base64.b64decode(digest)
+
+
+def hash_password(password):
+    """
+    Hash a password with the configured algorithm and cost parameters, on the hashing pool.
+
+    :param password: The password in plain text.
+    :type password: str
+    :return: The encoded hash, ready to be stored.
+    :rtype: str
+    :raise PoolBusyError: If too many derivations are already pending.
+    :raise PoolTimeoutError: If the derivation doesn't complete in due time.
+    """
+    algorithm, params = _current_params()
+    salt = os.urandom(_SALT_SIZE)
+    return _encode(algorithm, params, salt, _run(algorithm, params, password, salt))
+
+
+def hash_passwords(passwords):
+    """
+    Hash many passwords at once, spreading them over all the processes of the hashing pool.
+
+    This bypasses the limit on pending derivations, hence it's meant for offline jobs (e.g bulk
+        imports) rather than for serving requests.
+
+    :param passwords: The passwords in plain text.
+    :type passwords: list
+    :return: The encoded hashes, in the same order as the passwords.
+    :rtype: list
+    """
+    algorithm, params = _current_params()
+    salts = [os.urandom(_SALT_SIZE) for _ in passwords]
+    pool, _ = _get_pool()
+    digests = pool.map(
+        _derive, [algorithm] * len(passwords), [params] * len(passwords), passwords, salts
+    )
+    return [_encode(algorithm, params, *pair) for pair in zip(salts, digests)]
+
+
+def verify_password(password, encoded):
+    """
+    Check a password against a hash, on the hashing pool.
+
+    :param password: The password in plain text.
+    :type password: str
+    :param encoded: A hash produced by hash_password.
+    :type encoded: str
+    :return: True if the password matches the hash, False otherwise (including malformed hashes).
+    :rtype: bool
+    :raise PoolBusyError: If too many derivations are already pending.
+    :raise PoolTimeoutError: If the derivation doesn't complete in due time.
+    """
+    try:
+        algorithm, params, salt, digest = _decode(encoded)
+        derived = _run(algorithm, params, password, salt)  # the number of params may be off
+    except (TypeError, ValueError) as ex:
+        logger.warning(f'Unable to decode the password hash: {ex}')
+        return False
+    return hmac.compare_digest(derived, digest)
+
+
+def needs_rehash(encoded):
+    """
+    Check whether a hash was produced with an algorithm or cost parameters other than the current.
+
+    :param encoded: A hash produced by hash_password.
+    :type encoded: str
+    :return: True if the hash is outdated, False otherwise.
+    :rtype: bool
+    """
+    try:
+        algorithm, params, _, _ = _decode(encoded)
+    except (TypeError, ValueError):
+        return True
+    return (algorithm, params) != _current_params()
+
+
+def authenticate(connection, username, password):
+    """
+    Check a user's credentials and record the login.
+
+    When the stored hash was produced with outdated cost parameters, it's transparently replaced
+        with a hash produced with the current ones (the password is known at this point).
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param username: The username of the user.
+    :type username: str
+    :param password: The password in plain text.
+    :type password: str
+    :return: The authenticated user or None if the credentials don't match.
+    :rtype: sqlalchemy.engine.result.RowProxy
+    :raise PoolBusyError: If too many derivations are already pending.
+    :raise PoolTimeoutError: If the derivation doesn't complete in due time.
+    """
+    user = repository.get_user_by_username(connection, username)
+    if user is None or not verify_password(password, user.password):
+        return None
+
+    now = datetime.datetime.utcnow()
+    update_values = {'last_login': now}
+    if needs_rehash(user.password):
+        logger.info(f'Upgrading the password hash of user {user.id}.')
+        update_values.update(password=hash_password(password), last_updated=now)
+
+    connection.execute(models.user.update(models.user.c.id == user.id, update_values))
+    return repository.get_user_by_id(connection, user.id)
@@ -0,0 +1,217 @@
+"""
+Import users in bulk (e.g a whole class of students) from CSV or JSON-lines sources.
+
+Classes:
+========
+    ImportReport: Summarize the outcome of an import (imported rows, rejected rows, timings).
+
+Functions:
+==========
+    import_users: Validate and insert users in chunks, each chunk within its own transaction.
+    read_rows: Stream rows (mappings) out of a CSV or a JSON-lines source.
+
+CONSTANTS:
+==========
+    FORMATS: The source formats that can be imported.
+    REQUIRED_FIELDS: The fields that every imported row must have.
+
+Notes
+=====
+    * Countries are resolved through the country cache, i.e no query is issued per row.
+    * Usernames & emails are checked for uniqueness upfront via set lookups against every existing
+        user (one query) plus every row seen so far, so duplicates are rejected before inserting.
+    * A faulty row is rejected and reported, it never aborts the whole import.
+    * Passwords are hashed (see knowlift.auth) one chunk at a time, across the hashing pool.
+    * Importing requires an application context, which provides the country cache and settings.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import collections
+import csv
+import json
+import logging
+import time
+
+# Third party
+import sqlalchemy
+
+from sqlalchemy import exc
+
+# Project specific
+from knowlift import auth
+from knowlift import models
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl')
+REQUIRED_FIELDS = ('username', 'email', 'password', 'country')
+
+_TEXT_FIELDS = ('username', 'email', 'password')
+
+
+class ImportReport(collections.namedtuple('ImportReport', ('imported', 'rejected', 'elapsed'))):
+    """
+    Summarize an import.
+
+    Attributes:
+    ===========
+        imported: The number of rows inserted.
+        rejected: A list of (line number, reason) pairs, one for each row that was rejected.
+        elapsed: The duration of the import in seconds.
+    """
+
+    __slots__ = ()
+
+    @property
+    def rows_per_second(self):
+        processed = self.imported + len(self.rejected)
+        return processed / self.elapsed if self.elapsed else float(processed)
+
+
+def read_rows(stream, file_format):
+    """
+    Stream rows out of a source without loading it whole into memory.
+
+    :param stream: A file-like object opened in text mode.
+    :type stream: io.TextIOBase
+    :param file_format: One of FORMATS.
+    :type file_format: str
+    :return: An iterator of (line number, row) pairs. Rows that can't be parsed are yielded as None.
+    :rtype: collections.abc.Iterator
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as ex:
+                logger.debug(ex)
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f'Unknown format: {file_format}. Expected one of {FORMATS}.')
+
+
+def _fetch_existing(connection):
+    query = sqlalchemy.select([models.user.c.username, models.user.c.email])
+    usernames, emails = set(), set()
+    for username, email in connection.execute(query):
+        usernames.add(username)
+        emails.add(email.lower())
+    return usernames, emails
+
+
+def _build_user(row, country_cache):
+    if row is None:
+        return None, 'malformed row'
+
+    missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or '').strip()]
+    if missing:
+        return None, f'missing {", ".join(missing)}'
+
+    # JSON-lines rows may hold numbers, booleans, etc, which can't be stripped (nor hashed).
+    invalid = [field for field in _TEXT_FIELDS if not isinstance(row[field], str)]
+    if invalid:
+        return None, f'invalid {", ".join(invalid)}'
+
+    country = country_cache.resolve(str(row['country']))
+    if country is None:
+        return None, f'unknown country {row["country"]}'
+
+    user_values = {
+        'username': row['username'].strip(),
+        'email': row['email'].strip(),
+        'password': row['password'],
+        'country_id': country.id,
+        'first_name': row.get('first_name') or None,
+        'last_name': row.get('last_name') or None,
+    }
+    return user_values, None
+
+
+def _insert_chunk(connection, chunk, rejected):
+    hashes = auth.hash_passwords([user_values['password'] for _, user_values in chunk])
+    for (_, user_values), password_hash in zip(chunk, hashes):
+        user_values['password'] = password_hash
+
+    insert_query = models.user.insert()
+    try:
+        with connection.begin():
+            connection.execute(insert_query, [user_values for _, user_values in chunk])
+        return len(chunk)
+    except exc.IntegrityError as ex:
+        # Something slipped past the upfront checks (e.g a concurrent insert), isolate the culprit.
+        logger.warning(f'Chunk rejected ({ex.orig}), falling back to row by row inserts.')
+
+    inserted = 0
+    for line_number, user_values in chunk:
+        try:
+            with connection.begin():
+                connection.execute(insert_query, user_values)
+            inserted += 1
+        except exc.IntegrityError as ex:
+            rejected.append((line_number, str(ex.orig)))
+    return inserted
+
+
+def import_users(connection, rows, country_cache, chunk_size=500):
+    """
+    Validate rows and insert them as users in chunks via executemany.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param rows: An iterable of (line number, row) pairs, e.g as yielded by read_rows.
+    :type rows: collections.abc.Iterable
+    :param country_cache: The cache used to resolve the country of each user.
+    :type country_cache: knowlift.countries.CountryCache
+    :param chunk_size: The number of rows inserted within a single transaction.
+    :type chunk_size: int
+    :return: A summary of the import.
+    :rtype: ImportReport
+    """
+    assert chunk_size > 0, 'The chunk size must be a positive integer.'
+    start = time.perf_counter()
+    usernames, emails = _fetch_existing(connection)
+    imported, rejected, chunk = 0, [], []
+
+    for line_number, row in rows:
+        user_values, reason = _build_user(row, country_cache)
+        if user_values is None:
+            rejected.append((line_number, reason))
+            continue
+
+        email = user_values['email'].lower()
+        if user_values['username'] in usernames:
+            rejected.append((line_number, f'duplicate username {user_values["username"]}'))
+            continue
+        elif email in emails:
+            rejected.append((line_number, f'duplicate email {user_values["email"]}'))
+            continue
+
+        usernames.add(user_values['username'])
+        emails.add(email)
+        chunk.append((line_number, user_values))
+        if len(chunk) >= chunk_size:
+            imported += _insert_chunk(connection, chunk, rejected)
+            chunk = []
+
+    if chunk:
+        imported += _insert_chunk(connection, chunk, rejected)
+
+    report = ImportReport(imported, rejected, time.perf_counter() - start)
+    logger.info(
+        f'Imported {report.imported} users, rejected {len(report.rejected)} '
+        f'({report.rows_per_second:.0f} rows/s).'
+    )
+    return report
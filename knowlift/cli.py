@@ -0,0 +1,140 @@
+"""
+Expose maintenance commands through the flask command line interface.
+
+Global variables:
+=================
+    answers_cli: A group of commands that manage the stored answers.
+    assets_cli: A group of commands that manage the static assets.
+    countries_cli: A group of commands that manage the country reference data.
+    profiles_cli: A group of commands that inspect the stored request profiles.
+    templates_cli: A group of commands that manage the templates.
+    users_cli: A group of commands that manage users.
+
+Notes
+=====
+    * The commands below are registered on the application by create_app, hence they're available
+        as e.g: flask countries seed, flask users import students.csv, flask answers rollup
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import os
+
+# Third-party
+import click
+import flask
+
+from flask import cli
+
+# Project specific
+from knowlift import assets
+from knowlift import bulk_import
+from knowlift import countries
+from knowlift import db
+from knowlift import iso3166
+from knowlift import partitions
+from knowlift import profiling
+from knowlift import templating
+
+answers_cli = cli.AppGroup('answers', help='Manage the stored answers.')
+assets_cli = cli.AppGroup('assets', help='Manage the static assets.')
+countries_cli = cli.AppGroup('countries', help='Manage the country reference data.')
+profiles_cli = cli.AppGroup('profiles', help='Inspect the stored request profiles.')
+templates_cli = cli.AppGroup('templates', help='Manage the templates.')
+users_cli = cli.AppGroup('users', help='Manage users.')
+
+
+@countries_cli.command('seed')
+def seed_countries():
+    """Insert the ISO 3166-1 countries. Countries that already exist are left untouched."""
+    inserted = countries.seed(db.get_connection())
+    skipped = len(iso3166.COUNTRIES) - inserted
+    click.echo(f'Inserted {inserted} countries, skipped {skipped} already present.')
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option(
+    '--format', 'file_format', type=click.Choice(bulk_import.FORMATS),
+    help='The format of SOURCE. Inferred from its extension when omitted.',
+)
+@click.option(
+    '--chunk-size', type=click.IntRange(min=1),
+    help='The number of users inserted per transaction. Defaults to IMPORT_CHUNK_SIZE.',
+)
+def import_users(source, file_format, chunk_size):
+    """Import users from a CSV or JSON-lines SOURCE (use - for stdin)."""
+    if file_format is None:
+        extension = os.path.splitext(source.name)[1].lstrip('.').lower()
+        file_format = 'jsonl' if extension in ('jsonl', 'ndjson') else 'csv'
+
+    report = bulk_import.import_users(
+        db.get_connection(),
+        bulk_import.read_rows(source, file_format),
+        countries.get_cache(),
+        chunk_size or flask.current_app.config['IMPORT_CHUNK_SIZE'],
+    )
+    for line_number, reason in report.rejected:
+        click.echo(f'Rejected line {line_number}: {reason}', err=True)
+    click.echo(
+        f'Imported {report.imported} users, rejected {len(report.rejected)} '
+        f'in {report.elapsed:.2f}s ({report.rows_per_second:,.0f} rows/s).'
+    )
+
+
+@answers_cli.command('rollup')
+@click.option(
+    '--keep', type=click.IntRange(min=1),
+    help='The number of most recent monthly partitions left untouched. '
+         'Defaults to ANSWER_PARTITIONS_KEPT.',
+)
+def rollup_answers(keep):
+    """Compact the old monthly answer partitions into daily rollups."""
+    compacted = partitions.rollup(
+        db.get_connection(), keep or flask.current_app.config['ANSWER_PARTITIONS_KEPT']
+    )
+    click.echo(f'Compacted {len(compacted)} partitions: {", ".join(compacted) or "-"}.')
+
+
+@assets_cli.command('build')
+def build_assets():
+    """Write content hashed, precompressed copies of the static assets plus their manifest."""
+    manifest = assets.build(flask.current_app.static_folder)
+    click.echo(f'Built {len(manifest)} static assets into {assets.BUILD_FOLDER}.')
+
+
+@templates_cli.command('measure')
+@click.argument('paths', nargs=-1)
+def measure_templates(paths):
+    """Time the first request for PATHS (defaults to the static pages), cold vs warm templates."""
+    paths = paths or ('/', '/about', '/grade', '/ladder', '/legal')
+    click.echo(f'{"path":<12}{"cold":>12}{"bytecode":>12}{"warm":>12}')
+    for path, cold, cached, warm in templating.measure_first_request(flask.current_app, paths):
+        cached = '-' if cached is None else f'{cached * 1000:.2f}ms'
+        click.echo(f'{path:<12}{cold * 1000:>10.2f}ms{cached:>12}{warm * 1000:>10.2f}ms')
+
+
+@profiles_cli.command('top')
+@click.option('--limit', default=10, show_default=True, type=click.IntRange(min=1),
+              help='The number of hotspots per route.')
+@click.option('--endpoint', help='Only show this endpoint, e.g result.')
+def top_profiles(limit, endpoint):
+    """Show the top cumulative hotspots per route, out of the stored profiles."""
+    directory = flask.current_app.config['PROFILING_DIRECTORY']
+    routes = profiling.find_hotspots(directory, limit, endpoint)
+    if not routes:
+        click.echo(f'No profiles found in {directory}.')
+
+    for route, profile in routes.items():
+        click.echo(
+            f'{route}: {profile.requests} requests, mean latency {profile.mean_latency:.3f}ms'
+        )
+        for hotspot in profile.hotspots:
+            click.echo(
+                f'  {hotspot.cumulative_time * 1000:>12.3f}ms {hotspot.calls:>8} {hotspot.function}'
+            )
@@ -0,0 +1,207 @@
+"""
+Compress responses on the fly, as they're streamed, for clients that accept gzip.
+
+Classes:
+========
+    GzipMiddleware: WSGI middleware that gzip compresses response bodies incrementally.
+
+Notes
+=====
+    * Bodies are compressed chunk by chunk as the application yields them and each chunk is
+        flushed right away, hence streamed responses are never buffered whole and clients receive
+        each chunk as soon as it's produced.
+    * Responses are left untouched when: the client doesn't accept gzip, the request is a HEAD
+        request, the status has no body (e.g 304), the body is already encoded (e.g precompressed
+        static assets or cached pages, see knowlift.assets & knowlift.page_cache), the content type
+        is already compressed (e.g images), the body is known to be smaller than the threshold or
+        Cache-Control forbids transformations.
+    * A compressed body is a different representation, hence its strong ETag (if any) is suffixed
+        with -gz, the same way knowlift.page_cache tags its compressed pages. If-None-Match reaches
+        the application with both the ETags sent by the client and the same ETags without the
+        suffix (the application may only know the original ETag), the suffix is added back to the
+        ETag of the 304 responses that only matched without it.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import logging
+import threading
+import zlib
+
+# Third-party
+from werkzeug import datastructures
+from werkzeug import http
+
+logger = logging.getLogger(__name__)
+
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+_NO_BODY_STATUSES = ('1', '204', '206', '304')
+_GZIP_ETAG_SUFFIX = '-gz'
+
+
+def _gzip_etag(value):
+    # Weak ETags already allow for byte-wise differences between representations.
+    etag, weak = http.unquote_etag(value)
+    if etag is None or weak:
+        return value
+    return http.quote_etag(f'{etag}{_GZIP_ETAG_SUFFIX}')
+
+
+class GzipMiddleware:
+    """
+    Gzip compress the responses of a WSGI application incrementally, whenever the client accepts it.
+
+    Methods:
+    ========
+        get_stats: Get the number of responses compressed and the bytes saved so far.
+        record: Account for a compressed response.
+        should_compress: Tell whether a response is worth compressing.
+    """
+
+    def __init__(self, app, level=6, minimum_size=500, excluded_types=()):
+        """
+        :param app: The WSGI application to wrap.
+        :type app: callable
+        :param level: The compression level, from 1 (fastest) to 9 (smallest).
+        :type level: int
+        :param minimum_size: Bodies known to be smaller than this many bytes aren't compressed.
+        :type minimum_size: int
+        :param excluded_types: Prefixes of the content types that aren't compressed, e.g image/.
+        :type excluded_types: tuple
+        """
+        self.app = app
+        self.level = level
+        self.minimum_size = minimum_size
+        self.excluded_types = tuple(excluded_types)
+        self._stats = {'responses_compressed': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self._stats_lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        accepted = http.parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        if not accepted['gzip'] or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        response = _GzipResponse(self, start_response)
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if f'{_GZIP_ETAG_SUFFIX}"' in if_none_match:
+            # Applications that compress their own responses (e.g knowlift.page_cache) know the
+            # suffixed ETags, the others only the original ones.
+            response.if_none_match = http.parse_etags(if_none_match)
+            unsuffixed = if_none_match.replace(f'{_GZIP_ETAG_SUFFIX}"', '"')
+            environ = dict(environ, HTTP_IF_NONE_MATCH=f'{if_none_match}, {unsuffixed}')
+        response.app_iter = self.app(environ, response.start_response)
+        return response
+
+    def should_compress(self, status, headers):
+        """
+        Tell whether a response is worth compressing, based on its status and headers.
+
+        :param status: The status line of the response, e.g 200 OK.
+        :type status: str
+        :param headers: The headers of the response.
+        :type headers: werkzeug.datastructures.Headers
+        :return: True if the response should be compressed, False otherwise.
+        :rtype: bool
+        """
+        if status.startswith(_NO_BODY_STATUSES) or 'Content-Encoding' in headers:
+            return False
+        elif headers.get('Content-Type', '').startswith(self.excluded_types):
+            return False
+        elif 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+
+        content_length = headers.get('Content-Length', type=int)
+        return content_length is None or content_length >= self.minimum_size
+
+    def record(self, bytes_in, bytes_out):
+        """
+        Account for a compressed response.
+
+        :param bytes_in: The size of the body before compression.
+        :type bytes_in: int
+        :param bytes_out: The size of the body after compression.
+        :type bytes_out: int
+        :return: None
+        :rtype: None
+        """
+        with self._stats_lock:
+            self._stats['responses_compressed'] += 1
+            self._stats['bytes_in'] += bytes_in
+            self._stats['bytes_out'] += bytes_out
+
+    def get_stats(self):
+        """
+        Get the number of responses compressed and the number of bytes before & after compression.
+
+        :return: A mapping with the keys: responses_compressed, bytes_in, bytes_out, bytes_saved.
+        :rtype: dict
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        return stats
+
+
+class _GzipResponse:
+
+    def __init__(self, middleware, start_response):
+        self.middleware = middleware
+        self.app_iter = None
+        self.compressor = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.if_none_match = None  # set when the client sent back the ETag of a compressed body
+        self._start_response = start_response
+
+    def _matched_unsuffixed(self, status, headers):
+        if self.if_none_match is None or not status.startswith('304') or 'ETag' not in headers:
+            return False
+        etag, weak = http.unquote_etag(headers['ETag'])
+        return not weak and not self.if_none_match.contains(etag)
+
+    def start_response(self, status, headers, exc_info=None):
+        response_headers = datastructures.Headers(headers)
+        if self.middleware.should_compress(status, response_headers):
+            self.compressor = zlib.compressobj(self.middleware.level, zlib.DEFLATED, _GZIP_WBITS)
+            response_headers.remove('Content-Length')
+            response_headers['Content-Encoding'] = 'gzip'
+            vary = http.parse_set_header(response_headers.get('Vary'))
+            vary.add('Accept-Encoding')
+            response_headers['Vary'] = vary.to_header()
+            if 'ETag' in response_headers:
+                response_headers['ETag'] = _gzip_etag(response_headers['ETag'])
+        elif self._matched_unsuffixed(status, response_headers):
+            response_headers['ETag'] = _gzip_etag(response_headers['ETag'])
+
+        write = self._start_response(status, response_headers.to_wsgi_list(), exc_info)
+        if self.compressor is None:
+            return write
+        return lambda data: write(self._compress(data))
+
+    def _compress(self, chunk):
+        self.bytes_in += len(chunk)
+        data = self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.bytes_out += len(data)
+        return data
+
+    def __iter__(self):
+        for chunk in self.app_iter:
+            if self.compressor is None:
+                yield chunk
+            elif chunk:
+                yield self._compress(chunk)
+
+        if self.compressor is not None:
+            tail = self.compressor.flush(zlib.Z_FINISH)
+            self.bytes_out += len(tail)
+            self.middleware.record(self.bytes_in, self.bytes_out)
+            yield tail
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
@@ -0,0 +1,243 @@
+"""
+Keep the (static) country reference data in memory, so that lookups never hit the database.
+
+Classes:
+========
+    Country: An immutable record holding the attributes of a single country.
+    CountryCache: An immutable, tuple-backed store of countries indexed by their unique attributes.
+
+Functions:
+==========
+    get_cache: Get the country cache bound to the current application, loading it on first use.
+    init_cache: Load the country cache once and bind it to an application.
+    load_cache: Build a country cache from the records found in the database.
+    seed: Insert the ISO 3166-1 countries into the database in a single transaction.
+
+Notes
+=====
+    * The country entity is reference data, i.e it changes only when ISO 3166-1 changes, hence
+        loading it once (on first use, or when warming up) is enough. Restart the application
+        after (re)seeding.
+    * Views and user code should resolve countries through this module instead of querying.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import collections
+import logging
+import threading
+
+# Third-party
+import flask
+
+# Project specific
+from knowlift import db
+from knowlift import models
+from knowlift import repository
+
+logger = logging.getLogger(__name__)
+
+_cache_lock = threading.Lock()
+
+Country = collections.namedtuple(
+    'Country', ('id', 'english_short_name', 'alpha2_code', 'alpha3_code')
+)
+
+
+class CountryCache:
+    """
+    Store countries in a single tuple and index them by id, alpha2, alpha3 & english short name.
+
+    Each index maps a key onto a position within the tuple, therefore every country is stored
+        exactly once regardless of the number of indexes. Codes are matched case-insensitively.
+
+    Methods:
+    ========
+        get: Get a country by its id.
+        by_alpha2: Get a country by its ISO 3166-1 alpha-2 code.
+        by_alpha3: Get a country by its ISO 3166-1 alpha-3 code.
+        by_name: Get a country by its english short name.
+        resolve: Get a country by any of its codes or by its english short name.
+    """
+
+    __slots__ = ('_countries', '_by_id', '_by_alpha2', '_by_alpha3', '_by_name')
+
+    def __init__(self, rows=()):
+        countries = tuple(sorted((Country(*row) for row in rows), key=lambda c: c.id))
+        object.__setattr__(self, '_countries', countries)
+        object.__setattr__(self, '_by_id', {c.id: i for i, c in enumerate(countries)})
+        object.__setattr__(
+            self, '_by_alpha2', {c.alpha2_code.upper(): i for i, c in enumerate(countries)}
+        )
+        object.__setattr__(
+            self, '_by_alpha3', {c.alpha3_code.upper(): i for i, c in enumerate(countries)}
+        )
+        object.__setattr__(
+            self, '_by_name', {c.english_short_name.lower(): i for i, c in enumerate(countries)}
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self.__class__.__name__} is immutable.')
+
+    def __len__(self):
+        return len(self._countries)
+
+    def __iter__(self):
+        return iter(self._countries)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(countries={len(self)})'
+
+    def _lookup(self, index, key):
+        position = index.get(key)
+        return None if position is None else self._countries[position]
+
+    def get(self, country_id):
+        """
+        Get a country by its id.
+
+        :param country_id: The primary key of the country.
+        :type country_id: int
+        :return: The matching country or None.
+        :rtype: Country
+        """
+        return self._lookup(self._by_id, country_id)
+
+    def by_alpha2(self, code):
+        """
+        Get a country by its ISO 3166-1 alpha-2 code, e.g 'RO'.
+
+        :param code: A two letter country code.
+        :type code: str
+        :return: The matching country or None.
+        :rtype: Country
+        """
+        return self._lookup(self._by_alpha2, code.upper())
+
+    def by_alpha3(self, code):
+        """
+        Get a country by its ISO 3166-1 alpha-3 code, e.g 'ROU'.
+
+        :param code: A three letter country code.
+        :type code: str
+        :return: The matching country or None.
+        :rtype: Country
+        """
+        return self._lookup(self._by_alpha3, code.upper())
+
+    def by_name(self, name):
+        """
+        Get a country by its english short name, e.g 'Romania'.
+
+        :param name: The english short name of the country.
+        :type name: str
+        :return: The matching country or None.
+        :rtype: Country
+        """
+        return self._lookup(self._by_name, name.lower())
+
+    def resolve(self, value):
+        """
+        Get a country by either its alpha-2 code, alpha-3 code or english short name.
+
+        :param value: A country code or name, e.g 'RO', 'ROU' or 'Romania'.
+        :type value: str
+        :return: The matching country or None.
+        :rtype: Country
+        """
+        value = value.strip()
+        if len(value) == 2:
+            return self.by_alpha2(value)
+        elif len(value) == 3:
+            return self.by_alpha3(value) or self.by_name(value)
+        else:
+            return self.by_name(value)
+
+
+def load_cache(connection):
+    """
+    Build a country cache out of all the countries present in the database.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :return: A cache holding every country in the database.
+    :rtype: CountryCache
+    """
+    return CountryCache(
+        (row.id, row.english_short_name, row.alpha2_code, row.alpha3_code)
+        for row in repository.get_countries(connection)
+    )
+
+
+def init_cache(app):
+    """
+    Load the country cache once and store it in the flask config for the application's lifetime.
+
+    :param app: A Flask application.
+    :type app: flask.app.Flask
+    :return: The country cache.
+    :rtype: CountryCache
+    """
+    with _cache_lock:
+        country_cache = app.config.get('COUNTRY_CACHE')
+        if country_cache is None:
+            with db.get_engine(app).connect() as connection:
+                country_cache = load_cache(connection)
+            app.config['COUNTRY_CACHE'] = country_cache
+            logger.debug(f'Loaded {len(country_cache)} countries into the country cache.')
+    return country_cache
+
+
+def get_cache():
+    """
+    Get the country cache bound to the current application, loading it on first use.
+
+    :return: The country cache.
+    :rtype: CountryCache
+    """
+    country_cache = flask.current_app.config.get('COUNTRY_CACHE')
+    if country_cache is None:
+        country_cache = init_cache(flask.current_app)
+    return country_cache
+
+
+def seed(connection, countries=None):
+    """
+    Insert countries into the database using a single executemany within a single transaction.
+
+    Countries that are already present (i.e that would violate a unique constraint) are skipped,
+        which makes this procedure safe to be called multiple times.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param countries: A series of (english_short_name, alpha2_code, alpha3_code) triples, defaults
+        to the ISO 3166-1 countries.
+    :type countries: tuple
+    :return: The number of countries that were actually inserted.
+    :rtype: int
+    """
+    if countries is None:
+        # The reference data is only needed when seeding, don't pay for importing it otherwise.
+        from knowlift import iso3166
+
+        countries = iso3166.COUNTRIES
+
+    rows = [
+        {'english_short_name': name, 'alpha2_code': alpha2, 'alpha3_code': alpha3}
+        for name, alpha2, alpha3 in countries
+    ]
+    if not rows:
+        return 0
+
+    insert_query = models.country.insert().prefix_with('OR IGNORE')
+    with connection.begin():
+        result = connection.execute(insert_query, rows)
+    return result.rowcount
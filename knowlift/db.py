@@ -5,8 +5,26 @@ Functions:
 ==========
     close_connection: Close the DB API connection.
     get_connection: Get or create a single DB API connection.
+    get_engine: Get the database engine of an application, creating it on first use.
     init_db: Initialize the database.
-
+    instrument_engine: Time every statement executed by an engine.
+    report_request_stats: Report the database time spent by the current request.
+
+Global variables
+================
+    logger: An object that exposes several methods that can be used to log messages at runtime.
+    slow_query_logger: A logger dedicated to the statements that exceed SLOW_QUERY_THRESHOLD.
+
+Notes
+=====
+    * Every statement is timed, and both the number of statements and the total time spent in the
+        database (including the time spent waiting for a pooled connection) are kept on flask.g
+        for the lifetime of each request, i.e: db_query_count, db_time, db_checkout_time.
+    * Creating the engine (and bringing the schema up to date) is deferred until the database is
+        first used, so that creating an application costs no I/O. Call get_engine up front (see
+        knowlift.warm_up) to pay for it before serving requests instead.
+    * Engines created before a fork are disposed of in the child process, i.e workers forked from
+        a preloaded master never share the master's connections.
 
 Miscellaneous objects:
 ======================
@@ -17,15 +35,33 @@ Miscellaneous objects:
 
 # Standard library
 import logging
+import os
+import random
+import threading
+import time
+import weakref
 
 # Third-party
 import flask
 import sqlalchemy
 
 # Project specific
-from knowlift import models
+from knowlift import migrations
 
 logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(f'{__name__}.slow')
+
+_engine_lock = threading.Lock()
+_engines = weakref.WeakSet()
+
+
+def _dispose_engines_in_child():
+    # Connections opened before a fork belong to the parent, workers open connections of their own.
+    for engine in list(_engines):
+        engine.dispose()
+
+
+os.register_at_fork(after_in_child=_dispose_engines_in_child)
 
 
 def get_connection():
@@ -36,8 +72,10 @@ def get_connection():
     :rtype: sqlalchemy.engine.base.Connection
     """
     if 'db' not in flask.g:
-        engine = flask.current_app.config['DATABASE_ENGINE']
+        engine = get_engine(flask.current_app)
+        start = time.perf_counter()
         flask.g.db = engine.connect()
+        flask.g.db_checkout_time = time.perf_counter() - start
         return flask.g.db
     else:
         return flask.g.db
@@ -55,23 +93,92 @@ def close_connection(exception):
         logger.debug('The database does not exist on the application context.')
 
 
-def init_db(app):
+def instrument_engine(engine, slow_query_threshold, slow_query_sample_rate):
     """
-    Initialize the database.
+    Time every statement executed by an engine via the cursor execution events.
+
+    Each statement is logged (DEBUG) along with its latency, the number of affected rows and the
+        view that issued it. Statements slower than the threshold are logged (WARNING) through the
+        slow query logger, for a sampled fraction of them.
+
+    :param engine: The engine to instrument.
+    :type engine: sqlalchemy.engine.base.Engine
+    :param slow_query_threshold: The duration (in seconds) above which a statement is slow.
+    :type slow_query_threshold: float
+    :param slow_query_sample_rate: The fraction (0 to 1) of slow statements that get logged.
+    :type slow_query_sample_rate: float
+    """
+
+    # Start times are keyed by cursor, so that a failed statement can't shift the timings of the
+    # statements that follow it on the same (pooled) connection.
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', {})[id(cursor)] = time.perf_counter()
 
-    This procedure does the following:
-        - Creates all the tables bound to a metadata and their associated schema constructs.
-        - Creates the database engine & loads it in the flask config, where it's held globally for
-            the lifetime of the application.
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop(id(cursor))
+        view = flask.request.endpoint if flask.has_request_context() else None
 
-    Notes
-    =====
-        - models.metadata is a container object that keeps together many features of a database.
-        - The engine object created below is a mechanism that provides db connectivity and behavior.
+        if flask.has_app_context():
+            flask.g.db_query_count = flask.g.get('db_query_count', 0) + 1
+            flask.g.db_time = flask.g.get('db_time', 0.0) + elapsed
 
-    This procedure is safe to be called multiple times, as, by default, will not attempt to recreate
-        tables that are already present in the target database. Rebooting the server during
-        development or production won't affect the database.
+        logger.debug(
+            '%.3fms, rows: %s, view: %s, statement: %s',
+            elapsed * 1000, cursor.rowcount, view, statement,
+        )
+        if elapsed >= slow_query_threshold and random.random() < slow_query_sample_rate:
+            slow_query_logger.warning(
+                'Slow query (%.3fms, rows: %s, view: %s): %s',
+                elapsed * 1000, cursor.rowcount, view, statement,
+            )
+
+    sqlalchemy.event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    sqlalchemy.event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    def handle_error(exception_context):
+        # after_cursor_execute isn't called for statements that fail.
+        conn, context = exception_context.connection, exception_context.execution_context
+        cursor = exception_context.cursor or getattr(context, 'cursor', None)
+        if conn is not None and cursor is not None:
+            conn.info.get('query_start_time', {}).pop(id(cursor), None)
+
+    sqlalchemy.event.listen(engine, 'handle_error', handle_error)
+
+
+def report_request_stats(response):
+    """
+    Report the number of statements and the time spent in the database by the current request.
+
+    When DB_TIMING_HEADER is enabled, the timings are also sent to the client via the Server-Timing
+        header, which lets one tell DB-bound requests apart from render-bound ones in the browser.
+
+    :param response: The response about to be sent.
+    :type response: flask.wrappers.Response
+    :return: The same response.
+    :rtype: flask.wrappers.Response
+    """
+    query_count = flask.g.get('db_query_count', 0)
+    db_time = flask.g.get('db_time', 0.0) * 1000
+    checkout_time = flask.g.get('db_checkout_time', 0.0) * 1000
+    logger.debug(
+        '%s: %d queries, %.3fms in database, %.3fms waiting for a connection.',
+        flask.request.endpoint, query_count, db_time, checkout_time,
+    )
+    if flask.current_app.config['DB_TIMING_HEADER']:
+        response.headers.add(
+            'Server-Timing', f'db;dur={db_time:.3f};desc="{query_count} queries"'
+        )
+        response.headers.add('Server-Timing', f'db-checkout;dur={checkout_time:.3f}')
+    return response
+
+
+def init_db(app):
+    """
+    Initialize the database, i.e check its configuration. The engine itself is created lazily, on
+        first use, see get_engine.
+
+    Engine hooks (callables that take the engine) can be appended to DATABASE_ENGINE_HOOKS by the
+        other subsystems, they're called once the engine is created, e.g to instrument its pool.
 
     :param app: A Flask application.
     :type app: flask.app.Flask
@@ -82,12 +189,63 @@ def init_db(app):
         ' mode (via CLI) and not with this application.'
     )
     assert app.config['DATABASE'], assertion_error
-    database_engine = sqlalchemy.create_engine(f"sqlite:///{app.config['DATABASE']}")
-    models.metadata.create_all(bind=database_engine)
-    app.config['DATABASE_ENGINE'] = database_engine
-    logger.debug(
-        f'Engine name: {database_engine.name}, '
-        f'Engine driver: {database_engine.driver}, '
-        f'Database: {database_engine.url}, '
-        f'Current database tables: {database_engine.table_names()}',
-    )
+    app.config['DATABASE_ENGINE'] = None
+    app.config['DATABASE_ENGINE_HOOKS'] = []
+
+
+def get_engine(app):
+    """
+    Get the database engine of an application, creating it on first use.
+
+    Creating the engine does the following:
+        - Brings the schema up to date via knowlift.migrations. When the schema is already up to
+            date this costs a single query, i.e no DDL is issued.
+        - Creates the database engine, instruments it (see instrument_engine), calls the engine
+            hooks & loads it in the flask config, where it's held globally for the lifetime of the
+            application. The engine caches the compiled form of the statements it executes, so
+            statements that are built once (e.g knowlift.repository) are compiled once as well.
+
+    This is safe to be called multiple times (and concurrently), the engine is only created once
+        and only the migrations that the target database hasn't seen yet are applied. Rebooting the
+        server during development or production won't affect the database.
+
+    :param app: A Flask application, initialized via init_db.
+    :type app: flask.app.Flask
+    :return: The database engine of the application.
+    :rtype: sqlalchemy.engine.base.Engine
+    """
+    database_engine = app.config['DATABASE_ENGINE']
+    if database_engine is not None:
+        return database_engine
+
+    with _engine_lock:
+        if app.config['DATABASE_ENGINE'] is not None:
+            return app.config['DATABASE_ENGINE']
+
+        database_engine = sqlalchemy.create_engine(
+            f"sqlite:///{app.config['DATABASE']}",
+            execution_options={
+                'compiled_cache': sqlalchemy.util.LRUCache(app.config['COMPILED_CACHE_SIZE']),
+            },
+        )
+        instrument_engine(
+            database_engine,
+            app.config['SLOW_QUERY_THRESHOLD'],
+            app.config['SLOW_QUERY_SAMPLE_RATE'],
+        )
+        schema_version = migrations.migrate(database_engine)
+        for hook in app.config['DATABASE_ENGINE_HOOKS']:
+            hook(database_engine)
+        _engines.add(database_engine)
+        app.config['DATABASE_ENGINE'] = database_engine
+
+    # Listing the tables means reflecting the schema, only pay for that when it's actually logged.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f'Engine name: {database_engine.name}, '
+            f'Engine driver: {database_engine.driver}, '
+            f'Database: {database_engine.url}, '
+            f'Schema version: {schema_version}, '
+            f'Current database tables: {database_engine.table_names()}',
+        )
+    return database_engine
@@ -0,0 +1,186 @@
+"""
+Collapse bursts of identical log messages into a single line and a count.
+
+Classes:
+========
+    AggregatingFilter: A logging filter that deduplicates & samples identical messages.
+
+Notes
+=====
+    * The first occurrence of a message (i.e same logger, level & formatted message) within a window
+        is logged in full, later occurrences within the same window are counted instead. Once the
+        window is over, a summary is logged, e.g: 404 /wp-admin x 1,342 in 60s
+    * Sample rates (per logger, inherited by the child loggers) let a fraction of the repeated
+        occurrences through anyway, e.g {'knowlift.views': 0.01} logs 1% of them.
+    * Summaries are logged as soon as the message occurs again after its window, or otherwise
+        along with the next record going through the filter (or when the interpreter exits). They
+        go through the same handlers as the original message.
+    * The filter is meant to be attached to handlers via logging.config.dictConfig, e.g:
+        'filters': {'aggregate': {'()': 'knowlift.log_aggregation.AggregatingFilter', 'window': 60}}
+        Handlers sharing the filter share its state, a record is only accounted for once. Within
+        LOGGING_CONFIG, the window & sample rates default to LOG_AGGREGATION_WINDOW &
+        LOG_SAMPLE_RATES (see knowlift.log_queue.init_logging).
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import atexit
+import logging
+import random
+import threading
+import time
+import weakref
+
+_SWEEP_INTERVAL = 1
+
+_filters = weakref.WeakSet()
+
+
+class _Window:
+    __slots__ = ('record', 'start', 'count', 'suppressed')
+
+    def __init__(self, record, start):
+        self.record = record
+        self.start = start
+        self.count = 1
+        self.suppressed = 0
+
+
+class AggregatingFilter(logging.Filter):
+    """
+    Let the first occurrence of each message within a window through, count the others and log a
+        summary of them once the window is over.
+
+    Methods:
+    ========
+        filter: Tell whether a record should be logged.
+        flush: Log the summaries of every window with suppressed occurrences.
+        sample_rate: Get the sample rate of a logger.
+    """
+
+    def __init__(self, window=60, sample_rates=None, max_keys=10000):
+        """
+        :param window: The number of seconds occurrences of the same message are aggregated for.
+        :type window: float
+        :param sample_rates: A mapping of logger names to the fraction (0 to 1) of the repeated
+            occurrences logged anyway. Loggers inherit the sample rate of their parents, defaults
+            to 0.
+        :type sample_rates: dict
+        :param max_keys: The maximum number of distinct messages aggregated at once. Messages
+            beyond that are logged as usual.
+        :type max_keys: int
+        """
+        super().__init__()
+        self.window = window
+        self.sample_rates = dict(sample_rates or {})
+        self.max_keys = max_keys
+        self._windows = {}
+        self._rates = {}
+        self._next_sweep = 0
+        self._lock = threading.Lock()
+        _filters.add(self)
+
+    def sample_rate(self, name):
+        """
+        Get the sample rate of a logger, i.e the one of its closest configured ancestor.
+
+        :param name: The name of the logger, e.g knowlift.views.
+        :type name: str
+        :return: The fraction (0 to 1) of repeated occurrences logged anyway.
+        :rtype: float
+        """
+        rate = self._rates.get(name)
+        if rate is None:
+            ancestor = name
+            while ancestor not in self.sample_rates and '.' in ancestor:
+                ancestor = ancestor.rpartition('.')[0]
+            rate = self._rates[name] = self.sample_rates.get(ancestor, 0)
+        return rate
+
+    def _summarize(self, window):
+        record = window.record
+        message = f'{record.getMessage()} x {window.count:,} in {self.window:g}s'
+        if window.suppressed != window.count - 1:
+            message += f' ({window.suppressed:,} not logged)'
+        summary = logging.LogRecord(
+            record.name, record.levelno, record.pathname, record.lineno, message, None, None,
+            record.funcName,
+        )
+        summary.aggregated = True
+        return summary
+
+    def _sweep(self, now):
+        summaries = []
+        for key, window in list(self._windows.items()):
+            if now - window.start >= self.window:
+                del self._windows[key]
+                if window.suppressed:
+                    summaries.append(self._summarize(window))
+        return summaries
+
+    def _emit(self, summaries):
+        for summary in summaries:
+            logging.getLogger(summary.name).handle(summary)
+
+    def flush(self):
+        """
+        Log the summaries of every window with suppressed occurrences, whether it's over or not.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            summaries = self._sweep(float('inf'))
+        self._emit(summaries)
+
+    def filter(self, record):
+        """
+        Tell whether a record should be logged, i.e it's either the first occurrence of its message
+            within the window, a sampled repeated occurrence or a summary.
+
+        :param record: The record about to be logged.
+        :type record: logging.LogRecord
+        :return: True if the record should be logged, False otherwise.
+        :rtype: bool
+        """
+        decision = getattr(record, 'aggregated', None)
+        if decision is not None:  # a summary, or seen by another handler sharing this filter
+            return decision
+
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        summaries = []
+        with self._lock:
+            if now >= self._next_sweep:
+                self._next_sweep = now + _SWEEP_INTERVAL
+                summaries = self._sweep(now)
+
+            window = self._windows.get(key)
+            if window is None or now - window.start >= self.window:
+                if window is not None and window.suppressed:
+                    summaries.append(self._summarize(window))
+                if window is not None or len(self._windows) < self.max_keys:
+                    self._windows[key] = _Window(record, now)
+                decision = True
+            else:
+                window.count += 1
+                decision = random.random() < self.sample_rate(record.name)
+                window.suppressed += not decision
+
+        record.aggregated = decision
+        self._emit(summaries)
+        return decision
+
+
+def _flush_filters():
+    # Filters dropped by a later dictConfig are garbage collected along with their handlers.
+    for aggregating_filter in list(_filters):
+        aggregating_filter.flush()
+
+
+atexit.register(_flush_filters)
@@ -0,0 +1,215 @@
+"""
+Keep log I/O off the request threads by handing records over to a background thread.
+
+Functions:
+==========
+    init_logging: Configure logging, behind a queue if LOG_QUEUE_SIZE is set.
+    stop_logging: Log the records still queued and stop the background thread.
+
+Classes:
+========
+    DroppingQueueHandler: A queue handler that drops records, rather than blocking, when the queue
+        is full.
+    JsonFormatter: Format records as JSON objects, one per line.
+
+Notes
+=====
+    * LOGGING_CONFIG is applied as usual, then the handlers of the root logger are moved behind a
+        bounded queue: logging a record merely enqueues it, a listener thread formats it & hands it
+        to the original handlers (applying their levels & filters, e.g ConsoleFilter/FileFilter).
+    * When the queue is full the record is dropped and counted (knowlift_log_records_dropped_total)
+        rather than blocking the request.
+    * Queued records are logged before the interpreter exits. Worker processes forked from the
+        process that configured logging start a listener thread of their own.
+    * Set LOG_JSON to log JSON objects (one per line) instead of the usual text lines.
+    * The window & sample rates of the aggregating filters (see knowlift.log_aggregation) found in
+        LOGGING_CONFIG default to LOG_AGGREGATION_WINDOW & LOG_SAMPLE_RATES, hence changing these
+        settings (e.g in instance/settings.py) takes effect without repeating LOGGING_CONFIG.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+
+from logging import config
+from logging import handlers
+
+# Project specific
+from knowlift import log_aggregation
+from knowlift import metrics
+
+_state = {'listener': None, 'handler': None, 'listener_handlers': ()}
+_AGGREGATING_FILTER = 'knowlift.log_aggregation.AggregatingFilter'
+
+
+class DroppingQueueHandler(handlers.QueueHandler):
+    """
+    Enqueue records without formatting them (the listener thread does), and drop them (counting
+        them) when the queue is full.
+
+    Methods:
+    ========
+        enqueue: Enqueue a record, unless the queue is full.
+        prepare: Return the record as is.
+    """
+
+    def __init__(self, record_queue):
+        """
+        :param record_queue: The bounded queue the records are put in.
+        :type record_queue: queue.Queue
+        """
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Return the record as is, i.e formatting is left to the listener thread.
+
+        :param record: The record to enqueue.
+        :type record: logging.LogRecord
+        :return: The same record.
+        :rtype: logging.LogRecord
+        """
+        return record
+
+    def enqueue(self, record):
+        """
+        Enqueue a record, unless the queue is full, in which case the record is dropped.
+
+        :param record: The record to enqueue.
+        :type record: logging.LogRecord
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc('knowlift_log_records_dropped_total')
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as JSON objects holding the time, level, logger, module, line & message, plus
+        the traceback of the exception (if any).
+
+    Methods:
+    ========
+        format: Format a record as a JSON object.
+    """
+
+    def format(self, record):
+        """
+        Format a record as a JSON object, on a single line.
+
+        :param record: The record to format.
+        :type record: logging.LogRecord
+        :return: The JSON object.
+        :rtype: str
+        """
+        created = datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+        data = {
+            'time': created.isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+def stop_logging():
+    """
+    Log the records still queued and stop the listener thread, if logging is queued.
+
+    :return: None
+    :rtype: None
+    """
+    listener = _state['listener']
+    if listener is not None:
+        _state['listener'] = None
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
+
+def _start_listener():
+    _state['listener'] = handlers.QueueListener(
+        _state['handler'].queue, *_state['listener_handlers'], respect_handler_level=True
+    )
+    _state['listener'].start()
+
+
+def _restart_listener_in_child():
+    # Threads don't survive a fork, forked workers need a listener thread (& queue) of their own.
+    if _state['listener'] is not None:
+        queue_handler = _state['handler']
+        queue_handler.queue = queue.Queue(queue_handler.queue.maxsize)
+        _start_listener()
+
+
+os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def _configure_aggregation(logging_config, window, sample_rates):
+    logging_config = copy.deepcopy(logging_config)  # the settings themselves are left untouched
+    for filter_config in logging_config.get('filters', {}).values():
+        factory = filter_config.get('()')
+        if factory in (log_aggregation.AggregatingFilter, _AGGREGATING_FILTER):
+            filter_config.setdefault('window', window)
+            filter_config.setdefault('sample_rates', sample_rates)
+    return logging_config
+
+
+def init_logging(app):
+    """
+    Apply LOGGING_CONFIG (its aggregating filters default to LOG_AGGREGATION_WINDOW &
+        LOG_SAMPLE_RATES), then move the handlers of the root logger behind a queue of
+        LOG_QUEUE_SIZE records (unless it's 0) and switch them to JSON if LOG_JSON is set.
+
+    Calling this again (e.g when another application is created) stops the previous listener
+        thread first, after logging whatever was still queued.
+
+    :param app: The application whose configuration to apply.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    stop_logging()
+    config.dictConfig(_configure_aggregation(
+        app.config['LOGGING_CONFIG'], app.config['LOG_AGGREGATION_WINDOW'],
+        app.config['LOG_SAMPLE_RATES'],
+    ))
+
+    root = logging.getLogger()
+    if app.config['LOG_JSON']:
+        for handler in root.handlers:
+            handler.setFormatter(JsonFormatter())
+
+    queue_size = app.config['LOG_QUEUE_SIZE']
+    if not queue_size:
+        return
+
+    _state['listener_handlers'] = tuple(root.handlers)
+    _state['handler'] = DroppingQueueHandler(queue.Queue(queue_size))
+    for handler in _state['listener_handlers']:
+        root.removeHandler(handler)
+    root.addHandler(_state['handler'])
+    _start_listener()
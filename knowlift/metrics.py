@@ -0,0 +1,398 @@
+"""
+Count what the application does and expose it to Prometheus.
+
+Functions:
+==========
+    inc: Increment a counter.
+    init_metrics: Start collecting the database pool usage of an application.
+    observe: Record an observation in a histogram.
+    record_request: Count the current request and record its latency.
+    render: Render every metric, merged across threads & worker processes, in the text format.
+    reset: Forget every value recorded by the current process.
+    start_request: Note when the current request started.
+
+CONSTANTS:
+==========
+    CONTENT_TYPE: The content type of the text exposition format.
+    LATENCY_BUCKETS: The upper bounds (in seconds) of the latency histogram buckets.
+
+Notes
+=====
+    * Values are accumulated per thread, in a mapping only that thread writes to, hence recording a
+        value never takes a lock. The mappings are merged when /metrics is scraped. Once a thread
+        ends, its mapping is merged into a shared total and dropped, hence spawning a thread per
+        request doesn't grow the number of mappings.
+    * With METRICS_DIRECTORY set (i.e pre-fork deployments, where every worker process serves a
+        fraction of the traffic) each process periodically publishes its values to a memory mapped
+        file of its own within that directory, under a sequence lock. A scrape, whichever worker
+        serves it, merges its own live values with the files of every other process. Counters of
+        workers that have exited keep being reported, hence the directory should be emptied before
+        the server (re)starts.
+    * Exposed metrics:
+        - knowlift_requests_total{endpoint, method, status}
+        - knowlift_request_duration_seconds{endpoint} (histogram)
+        - knowlift_questions_total{game_level}
+        - knowlift_answers_total{game_level, outcome}
+        - knowlift_db_pool_checkouts_total, knowlift_db_pool_checkins_total &
+            knowlift_db_pool_connections_in_use
+        - knowlift_log_records_dropped_total (see knowlift.log_queue)
+        - knowlift_progress_cache_hits_total, knowlift_progress_cache_misses_total,
+            knowlift_progress_cache_hit_ratio, knowlift_progress_cache_evictions_total &
+            knowlift_progress_rows_flushed_total (see knowlift.progress)
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import bisect
+import collections
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import weakref
+
+# Third-party
+import flask
+import sqlalchemy
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_FAMILIES = {
+    'knowlift_requests_total': ('counter', 'Requests served, per endpoint, method & status.'),
+    'knowlift_request_duration_seconds': ('histogram', 'Request latency, per endpoint.'),
+    'knowlift_questions_total': ('counter', 'Questions generated, per game level.'),
+    'knowlift_answers_total': ('counter', 'Answers graded, per game level & outcome.'),
+    'knowlift_db_pool_checkouts_total': ('counter', 'Connections checked out of the pool.'),
+    'knowlift_db_pool_checkins_total': ('counter', 'Connections returned to the pool.'),
+    'knowlift_db_pool_connections_in_use': ('gauge', 'Connections currently checked out.'),
+    'knowlift_log_records_dropped_total': ('counter', 'Log records dropped, the queue was full.'),
+    'knowlift_progress_cache_hits_total': ('counter', 'Progress reads served from memory.'),
+    'knowlift_progress_cache_misses_total': ('counter', 'Progress reads that queried.'),
+    'knowlift_progress_cache_hit_ratio': ('gauge', 'Fraction of the progress reads that hit.'),
+    'knowlift_progress_cache_evictions_total': ('counter', 'Progress entries evicted from memory.'),
+    'knowlift_progress_rows_flushed_total': ('counter', 'Progress rows written back.'),
+}
+_BUCKET_LABELS = tuple(repr(bound) for bound in LATENCY_BUCKETS) + ('+Inf',)
+_HEADER = struct.Struct('<QQ')  # sequence number, payload length
+_READ_ATTEMPTS = 10
+_FILE_PATTERN = re.compile(r'^metrics_(?P<pid>\d+)\.mmap$')
+
+_local = threading.local()
+_registry = {}  # the mapping of each live thread, by id
+_retired = collections.defaultdict(float)  # the values of the threads that have ended
+_registry_lock = threading.RLock()
+_publisher = {'pid': None}
+
+
+class _Owner:
+    # Lives as long as the thread local storage of its thread, see _values.
+    __slots__ = ('__weakref__',)
+
+
+def _retire(values):
+    with _registry_lock:
+        if _registry.pop(id(values), None) is values:  # unless reset forgot about it already
+            for key, value in values.items():
+                _retired[key] += value
+
+
+def _values():
+    try:
+        return _local.values
+    except AttributeError:
+        values = _local.values = collections.defaultdict(float)
+        _local.owner = _Owner()
+        weakref.finalize(_local.owner, _retire, values)
+        with _registry_lock:  # once per thread
+            _registry[id(values)] = values
+        return values
+
+
+def inc(name, labels=(), amount=1):
+    """
+    Increment a counter, for the current thread.
+
+    :param name: The name of the counter, e.g knowlift_questions_total.
+    :type name: str
+    :param labels: The labels of the counter, as (name, value) pairs.
+    :type labels: tuple
+    :param amount: The amount to increment the counter by.
+    :type amount: float
+    :return: None
+    :rtype: None
+    """
+    _values()[(name, labels)] += amount
+
+
+def observe(name, value, labels=()):
+    """
+    Record an observation in a histogram whose buckets are LATENCY_BUCKETS, for the current thread.
+
+    :param name: The name of the histogram, e.g knowlift_request_duration_seconds.
+    :type name: str
+    :param value: The observed value.
+    :type value: float
+    :param labels: The labels of the histogram, as (name, value) pairs.
+    :type labels: tuple
+    :return: None
+    :rtype: None
+    """
+    values = _values()
+    bucket = _BUCKET_LABELS[bisect.bisect_left(LATENCY_BUCKETS, value)]
+    values[(f'{name}_bucket', labels + (('le', bucket),))] += 1
+    values[(f'{name}_sum', labels)] += value
+    values[(f'{name}_count', labels)] += 1
+
+
+def reset():
+    """
+    Forget every value recorded by the current process, e.g in a freshly forked worker process.
+
+    :return: None
+    :rtype: None
+    """
+    global _local, _registry_lock
+    # Dropping the thread local storage retires its mappings, which must be forgotten first.
+    _registry_lock = threading.RLock()
+    _registry.clear()
+    _local = threading.local()
+    _retired.clear()
+    _publisher['pid'] = None
+
+
+# Worker processes don't inherit (and later report twice) whatever their parent recorded.
+os.register_at_fork(after_in_child=reset)
+
+
+def _collect_local():
+    with _registry_lock:
+        mappings = list(_registry.values())
+        merged = collections.defaultdict(float, _retired)
+
+    for values in mappings:
+        # Copying a dict is atomic, hence it's safe while its thread keeps writing to it.
+        for key, value in dict(values).items():
+            merged[key] += value
+    return merged
+
+
+def _file_path(directory, pid):
+    return os.path.join(directory, f'metrics_{pid}.mmap')
+
+
+def _open_shared(directory, size):
+    os.makedirs(directory, exist_ok=True)
+    with open(_file_path(directory, os.getpid()), 'w+b') as shared_file:
+        shared_file.truncate(size)
+        return mmap.mmap(shared_file.fileno(), size)
+
+
+def _publish(shared):
+    payload = json.dumps(
+        [[name, labels, value] for (name, labels), value in _collect_local().items()]
+    ).encode('utf-8')
+    if _HEADER.size + len(payload) > len(shared):
+        logger.warning(f'Unable to publish {len(payload)} bytes of metrics, see METRICS_FILE_SIZE.')
+        return
+
+    sequence = _HEADER.unpack_from(shared, 0)[0]
+    _HEADER.pack_into(shared, 0, sequence + 1, 0)  # odd while writing
+    shared[_HEADER.size:_HEADER.size + len(payload)] = payload
+    _HEADER.pack_into(shared, 0, sequence + 2, len(payload))
+
+
+def _publish_periodically(shared, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            _publish(shared)
+        except Exception:
+            logger.exception('Unable to publish the metrics.')
+
+
+def _start_publisher(config):
+    # Runs in every process, the first time it serves a request, i.e after the worker is forked.
+    _publisher['pid'] = os.getpid()
+    directory = config['METRICS_DIRECTORY']
+    if not directory:
+        return
+
+    shared = _open_shared(directory, config['METRICS_FILE_SIZE'])
+    _publish(shared)
+    threading.Thread(
+        target=_publish_periodically, args=(shared, config['METRICS_PUBLISH_INTERVAL']),
+        name='metrics-publisher', daemon=True,
+    ).start()
+
+
+def _read_shared(path):
+    try:
+        with open(path, 'rb') as shared_file, mmap.mmap(
+            shared_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as shared:
+            for _ in range(_READ_ATTEMPTS):
+                sequence, length = _HEADER.unpack_from(shared, 0)
+                payload = bytes(shared[_HEADER.size:_HEADER.size + length])
+                if sequence % 2 == 0 and _HEADER.unpack_from(shared, 0)[0] == sequence:
+                    return json.loads(payload) if payload else []
+                time.sleep(0.001)
+    except (FileNotFoundError, ValueError) as ex:  # gone or not sized yet
+        logger.debug(f'Unable to read the metrics in {path}: {ex}')
+        return []
+
+    logger.warning(f'Gave up reading the metrics in {path}, they kept changing.')
+    return []
+
+
+def _collect(directory):
+    merged = _collect_local()
+    if not directory or not os.path.isdir(directory):
+        return merged
+
+    for file_name in os.listdir(directory):
+        match = _FILE_PATTERN.match(file_name)
+        if match and int(match.group('pid')) != os.getpid():
+            for name, labels, value in _read_shared(os.path.join(directory, file_name)):
+                merged[(name, tuple(map(tuple, labels)))] += value
+    return merged
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _render_histogram(name, samples):
+    lines = []
+    series = sorted({labels for key, labels in samples if key == f'{name}_count'})
+    for labels in series:
+        cumulative = 0
+        for bucket in _BUCKET_LABELS:
+            cumulative += samples.get((f'{name}_bucket', labels + (('le', bucket),)), 0)
+            lines.append(
+                f'{name}_bucket{_format_labels(labels + (("le", bucket),))} '
+                f'{_format_value(cumulative)}'
+            )
+        for suffix in ('_sum', '_count'):
+            lines.append(
+                f'{name}{suffix}{_format_labels(labels)} '
+                f'{_format_value(samples[(name + suffix, labels)])}'
+            )
+    return lines
+
+
+def render(game_levels=()):
+    """
+    Render every metric, merged across the threads of this process and, if METRICS_DIRECTORY is
+        set, across every worker process, in the Prometheus text exposition format.
+
+    :param game_levels: The game levels whose question counters are rendered even if they're zero.
+    :type game_levels: range
+    :return: The metrics.
+    :rtype: str
+    """
+    samples = _collect(flask.current_app.config['METRICS_DIRECTORY'])
+    for game_level in game_levels:
+        samples[('knowlift_questions_total', (('game_level', str(game_level)),))] += 0
+    samples[('knowlift_db_pool_connections_in_use', ())] = (
+        samples.get(('knowlift_db_pool_checkouts_total', ()), 0)
+        - samples.get(('knowlift_db_pool_checkins_total', ()), 0)
+    )
+    hits = samples.get(('knowlift_progress_cache_hits_total', ()), 0)
+    misses = samples.get(('knowlift_progress_cache_misses_total', ()), 0)
+    samples[('knowlift_progress_cache_hit_ratio', ())] = hits / (hits + misses) if hits else 0
+
+    lines = []
+    for name, (metric_type, description) in _FAMILIES.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'histogram':
+            lines.extend(_render_histogram(name, samples))
+            continue
+
+        for key in sorted(key for key in samples if key[0] == name):
+            lines.append(f'{name}{_format_labels(key[1])} {_format_value(samples[key])}')
+    return '\n'.join(lines) + '\n'
+
+
+def start_request():
+    """
+    Note when the current request started.
+
+    Meant to be registered via flask.Flask.before_request.
+
+    :return: None
+    :rtype: None
+    """
+    flask.g.metrics_start = time.perf_counter()
+
+
+def record_request(response):
+    """
+    Count the current request (per endpoint, method & status) and record its latency.
+
+    Meant to be registered via flask.Flask.after_request.
+
+    :param response: The response about to be sent.
+    :type response: flask.wrappers.Response
+    :return: The same response.
+    :rtype: flask.wrappers.Response
+    """
+    if _publisher['pid'] != os.getpid():
+        _start_publisher(flask.current_app.config)
+
+    rule = flask.request.url_rule
+    endpoint = rule.endpoint if rule is not None else 'unmatched'
+    inc(
+        'knowlift_requests_total',
+        (('endpoint', endpoint), ('method', flask.request.method),
+         ('status', str(response.status_code))),
+    )
+    start = flask.g.pop('metrics_start', None)
+    if start is not None:
+        observe(
+            'knowlift_request_duration_seconds', time.perf_counter() - start,
+            (('endpoint', endpoint),),
+        )
+    return response
+
+
+def init_metrics(app):
+    """
+    Count the connections checked out of (and returned to) the pool of the application's database
+        engine, once it's created.
+
+    :param app: The application whose database engine to instrument, see db.init_db.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    app.config['DATABASE_ENGINE_HOOKS'].append(_instrument_pool)
+
+
+def _instrument_pool(engine):
+    sqlalchemy.event.listen(
+        engine, 'checkout', lambda *args: inc('knowlift_db_pool_checkouts_total')
+    )
+    sqlalchemy.event.listen(engine, 'checkin', lambda *args: inc('knowlift_db_pool_checkins_total'))
@@ -0,0 +1,143 @@
+"""
+Bring the database schema up to date through an ordered series of migrations.
+
+Functions:
+==========
+    get_version: Get the version of the schema the database is currently at.
+    migrate: Apply, in order, every migration the database hasn't seen yet.
+
+CONSTANTS:
+==========
+    MIGRATIONS: A series of (version, migration) pairs in ascending order of their versions.
+    SCHEMA_VERSION: The version of the schema this code base expects.
+
+Notes
+=====
+    * Booting against an up to date database costs a single query (the version check), i.e no DDL
+        and no table existence checks are issued.
+    * To change the schema, append a new (version, migration) pair to MIGRATIONS. A migration is a
+        callable that receives a connection on which a transaction is already in progress (DDL
+        included, i.e a failed migration leaves no table behind).
+    * Migrations hold the write lock of the database from start to end, hence processes booting
+        at the same time migrate one after the other, the later ones finding nothing left to do.
+    * Never alter or remove a migration that has already been released.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import logging
+
+# Third party
+import sqlalchemy
+
+from sqlalchemy import exc
+
+# Project specific
+from knowlift import models
+from knowlift import partitions
+
+logger = logging.getLogger(__name__)
+
+
+# The single, unpartitioned table answers were stored in up until migration 2.
+_legacy_answer = models.build_answer_table('answer', sqlalchemy.MetaData())
+
+
+def _create_initial_schema(connection):
+    # Databases created before versioning already have these tables, hence the checks.
+    tables = [models.country, models.user]
+    models.metadata.create_all(bind=connection, tables=tables, checkfirst=True)
+    _legacy_answer.create(bind=connection, checkfirst=True)
+
+
+def _partition_answers(connection):
+    models.answer_rollup.create(bind=connection, checkfirst=True)
+
+    month = sqlalchemy.func.strftime('%Y_%m', _legacy_answer.c.date_created)
+    for (suffix,) in connection.execute(sqlalchemy.select([month]).distinct()):
+        partition = partitions.get_partition(f'{partitions.PREFIX}{suffix}')
+        partition.create(bind=connection, checkfirst=True)
+        columns = [column.name for column in _legacy_answer.c]
+        connection.execute(
+            partition.insert().from_select(columns, _legacy_answer.select(month == suffix))
+        )
+    _legacy_answer.drop(bind=connection)
+
+
+def _track_progress(connection):
+    models.user_progress.create(bind=connection, checkfirst=True)
+
+
+MIGRATIONS = (
+    (1, _create_initial_schema),
+    (2, _partition_answers),
+    (3, _track_progress),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_select_version = sqlalchemy.select([sqlalchemy.func.max(models.schema_version.c.version)])
+
+
+def get_version(connection):
+    """
+    Get the version of the schema the database is currently at.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :return: The latest version applied, 0 for databases that were never migrated.
+    :rtype: int
+    :raise sqlalchemy.exc.OperationalError: If the version can't be read, e.g the database is
+        locked.
+    """
+    try:
+        return connection.execute(_select_version).scalar() or 0
+    except exc.OperationalError as ex:
+        if 'no such table' not in str(ex.orig):
+            raise
+        logger.debug(f'Unable to read the schema version ({ex.orig}), assuming an empty database.')
+        return 0
+
+
+def migrate(engine):
+    """
+    Apply, in order and within a single transaction, every migration newer than the database.
+
+    :param engine: The engine bound to the database to migrate.
+    :type engine: sqlalchemy.engine.base.Engine
+    :return: The version of the schema after migrating.
+    :rtype: int
+    :raise RuntimeError: If the database is newer than this code base.
+    """
+    with engine.connect() as connection:
+        current_version = get_version(connection)
+        if current_version == SCHEMA_VERSION:
+            return current_version
+        elif current_version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f'The database schema (version {current_version}) is newer than the one this code'
+                f' base supports (version {SCHEMA_VERSION}).'
+            )
+
+        try:
+            with connection.begin():
+                # pysqlite only begins transactions ahead of DML, the DDL would be committed as it
+                # goes otherwise. Another process may have migrated while the lock was awaited.
+                connection.execute('BEGIN IMMEDIATE')
+                current_version = get_version(connection)
+                models.schema_version.create(bind=connection, checkfirst=True)
+                for version, migration in MIGRATIONS:
+                    if version > current_version:
+                        logger.info(f'Applying schema migration {version}: {migration.__name__}')
+                        migration(connection)
+                        connection.execute(models.schema_version.insert(), version=version)
+        except exc.IntegrityError as ex:
+            # Another worker booting at the same time got to record the same versions first.
+            logger.info(f'Schema migrated concurrently by another process ({ex.orig}).')
+
+        return get_version(connection)
@@ -11,6 +11,13 @@ Global variables:
     metadata: A collection of Table objects and their associated schema constructs.
     user: The user entity with its corresponding attributes and relationships.
     country: The country entity with its corresponding attributes and relationships.
+    answer_rollup: Daily per-user, per-level aggregates of the answers from compacted partitions.
+    user_progress: The progress of each user, i.e the game level last played, totals & streaks.
+    schema_version: The migrations applied to the database (see knowlift.migrations).
+
+Functions:
+==========
+    build_answer_table: Build a table that stores answers (one row per question answered).
 
 Miscellaneous objects:
 ======================
@@ -73,3 +80,68 @@ country = sqlalchemy.Table(
         nullable=False,
     ),
 )
+
+answer_rollup = sqlalchemy.Table(
+    'answer_rollup',
+    metadata,
+    sqlalchemy.Column('id', sqlalchemy.Integer, primary_key=True),
+    sqlalchemy.Column('user_id', sqlalchemy.ForeignKey('user.id')),
+    sqlalchemy.Column('game_level', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('day', sqlalchemy.Date, nullable=False),
+    sqlalchemy.Column('correct', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('incorrect', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Index('ix_answer_rollup_user_id_day', 'user_id', 'day'),
+    sqlalchemy.Index('ix_answer_rollup_day', 'day'),
+)
+
+user_progress = sqlalchemy.Table(
+    'user_progress',
+    metadata,
+    sqlalchemy.Column('user_id', sqlalchemy.ForeignKey('user.id'), primary_key=True),
+    sqlalchemy.Column('game_level', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('correct', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('incorrect', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('streak', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('best_streak', sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column('last_updated', sqlalchemy.DateTime, default=datetime.datetime.utcnow),
+)
+
+schema_version = sqlalchemy.Table(
+    'schema_version',
+    metadata,
+    sqlalchemy.Column('version', sqlalchemy.Integer, primary_key=True, autoincrement=False),
+    sqlalchemy.Column('date_applied', sqlalchemy.DateTime, default=datetime.datetime.utcnow),
+)
+
+
+def build_answer_table(name, table_metadata):
+    """
+    Build a table that stores answers, one row per question answered.
+
+    Answers are stored in time-based partitions (see knowlift.partitions), i.e many tables sharing
+        the structure below, hence the table is built on demand rather than declared once. The
+        user_id isn't declared as a foreign key since partitions live outside of the main metadata.
+
+    :param name: The name of the table, e.g answer_2019_10.
+    :type name: str
+    :param table_metadata: The collection the table will belong to.
+    :type table_metadata: sqlalchemy.MetaData
+    :return: The answer table.
+    :rtype: sqlalchemy.Table
+    """
+    return sqlalchemy.Table(
+        name,
+        table_metadata,
+        sqlalchemy.Column('id', sqlalchemy.Integer, primary_key=True),
+        sqlalchemy.Column('user_id', sqlalchemy.Integer, index=True),
+        sqlalchemy.Column('game_level', sqlalchemy.Integer, nullable=False),
+        sqlalchemy.Column('left_glyph', sqlalchemy.String(1), nullable=False),
+        sqlalchemy.Column('right_glyph', sqlalchemy.String(1), nullable=False),
+        sqlalchemy.Column('start', sqlalchemy.Integer, nullable=False),
+        sqlalchemy.Column('stop', sqlalchemy.Integer, nullable=False),
+        sqlalchemy.Column('answer', sqlalchemy.Integer, nullable=False),
+        sqlalchemy.Column('outcome', sqlalchemy.Boolean, nullable=False),
+        sqlalchemy.Column(
+            'date_created', sqlalchemy.DateTime, default=datetime.datetime.utcnow, index=True
+        ),
+    )
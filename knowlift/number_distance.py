@@ -20,8 +20,10 @@ Implement the interface for a simple mathematical game based on intervals.
 
 Functions:
 ==========
+    build_result: Compare the user's result with the expected result, without any validation.
     calculate_statistics: Compute statistics based on amount of correct/incorrect answers.
     change_game_level: Increment/decrement the degree of difficulty based on statistics.
+    count_integers: Count the integers within an interval.
     fetch_game_level: Return a game level from a series of game levels, based on user preference.
     generate_interval: Generate an interval within a range of two values (the lower/upper bound).
     generate_result: Compare the user's result with the expected result for a given question.
@@ -42,6 +44,7 @@ Miscellaneous objects:
 __author__ = 'Marius Mucenicu <marius_mucenicu@yahoo.com>'
 
 # Standard library
+import functools
 import logging
 import random
 
@@ -181,28 +184,78 @@ def generate_result(data):
     """
 
     if validate_form_data(data):
-        answer = data.get('answer')
-        left_glyph = data.get('left_glyph')
-        right_glyph = data.get('right_glyph')
-        start = data.get('start_internal')
-        stop = data.get('stop_internal')
-
-        if left_glyph == '[' and right_glyph == ']':
-            cpu_result = len(range(start, stop + 1))
-        elif left_glyph == '(' and right_glyph == ')':
-            cpu_result = len(range(start, stop - 1))
-        else:
-            cpu_result = len(range(start, stop))
-
-        data['cpu_internal'] = cpu_result
-        data['cpu_representation'] = prettify_number(cpu_result)
-        data['answer_representation'] = prettify_number(answer)
-        data['outcome'] = cpu_result == answer
+        data.update(build_result(
+            data.get('left_glyph'), data.get('right_glyph'), data.get('start_internal'),
+            data.get('stop_internal'), data.get('game_level'), data.get('answer'),
+        ))
         return data
     else:
         return None
 
 
+def count_integers(left_glyph, right_glyph, start, stop):
+    """
+    Count the integers within an interval.
+
+    :param left_glyph: The glyph of the lower bound, i.e [ (closed) or ( (open).
+    :type left_glyph: str
+    :param right_glyph: The glyph of the upper bound, i.e ] (closed) or ) (open).
+    :type right_glyph: str
+    :param start: The lower bound.
+    :type start: int
+    :param stop: The upper bound.
+    :type stop: int
+    :return: The number of integers within the interval.
+    :rtype: int
+    """
+    if left_glyph == '[' and right_glyph == ']':
+        return len(range(start, stop + 1))
+    elif left_glyph == '(' and right_glyph == ')':
+        return len(range(start, stop - 1))
+    else:
+        return len(range(start, stop))
+
+
+def build_result(left_glyph, right_glyph, start, stop, game_level, answer):
+    """
+    Compare the user's answer with the expected one for a given interval.
+
+    Unlike generate_result, no validation takes place, hence the interval must come from a trusted
+        source, e.g a verified question token (see knowlift.tokens).
+
+    :param left_glyph: The glyph of the lower bound, i.e [ (closed) or ( (open).
+    :type left_glyph: str
+    :param right_glyph: The glyph of the upper bound, i.e ] (closed) or ) (open).
+    :type right_glyph: str
+    :param start: The lower bound.
+    :type start: int
+    :param stop: The upper bound.
+    :type stop: int
+    :param game_level: The position of the interval's game level within GAME_LEVELS.
+    :type game_level: int
+    :param answer: The user's answer.
+    :type answer: int
+    :return: The interval, the user's answer, the expected answer and the outcome, in the format
+        returned by generate_result.
+    :rtype: dict
+    """
+    cpu_result = count_integers(left_glyph, right_glyph, start, stop)
+    return {
+        'left_glyph': left_glyph,
+        'right_glyph': right_glyph,
+        'start_internal': start,
+        'stop_internal': stop,
+        'start_representation': prettify_number(start),
+        'stop_representation': prettify_number(stop),
+        'game_level': game_level,
+        'answer': answer,
+        'answer_representation': prettify_number(answer),
+        'cpu_internal': cpu_result,
+        'cpu_representation': prettify_number(cpu_result),
+        'outcome': cpu_result == answer,
+    }
+
+
 def play(user_input):
     """
     Fetch a game level and generate a mathematical interval out of it.
@@ -303,11 +356,10 @@ def validate_form_data(form_data):
                 logger.error(ex)
                 return None
 
-    lower_bound = internal_values[0]
-    upper_bound = internal_values[1]
-    no_values = not (internal_values and representation_values)
+    no_values = len(internal_values) != 2 or len(representation_values) != 2
+    inconsistent = no_values or internal_values != representation_values
 
-    if no_values or internal_values != representation_values or lower_bound > upper_bound:
+    if inconsistent or internal_values[0] > internal_values[1]:
         logger.error(
             'inconsistency among numbers'
             '\tinternal values: %s'
@@ -318,12 +370,14 @@ def validate_form_data(form_data):
         return True
 
 
+@functools.lru_cache(maxsize=None)
 def validate_game_levels(game_levels):
     """
-    Validate a set of game levels against a set of rules.
+    Validate a set of game levels against a set of rules. The verdict is cached per set of game
+        levels, i.e GAME_LEVELS is validated once per process (or once before forking).
 
     Args:
-        :param game_levels (tuple): A series of game levels.
+        :param game_levels (tuple): A series of game levels, hashable (i.e a tuple of tuples).
 
     Returns:
         A boolean object: True if all game levels are valid, False otherwise.
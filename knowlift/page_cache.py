@@ -0,0 +1,146 @@
+"""
+Serve pages that only depend on their templates from memory, rendered once per template version.
+
+Functions:
+==========
+    clear: Drop every rendered page, forcing the next request for each page to render it again.
+    init_cache: Attach an empty page cache to an application.
+    prime: Render pages ahead of the first request for them.
+    render: Respond with a cached page, rendering its template only if it has changed.
+
+Notes
+=====
+    * Each page is kept both as is and gzip compressed (compressed once, at the maximum level). The
+        compressed variant is served to clients that accept it.
+    * Each variant has its own strong ETag. Requests carrying a matching If-None-Match header are
+        answered with 304 Not Modified without involving the template engine.
+    * When templates are auto reloaded (i.e in debug mode or if TEMPLATES_AUTO_RELOAD is set), the
+        latest modification time across the template folders is the version of every page, hence
+        editing any template (layout.html included) invalidates the cache. Otherwise templates are
+        assumed to never change while the application runs.
+    * Only pages whose content doesn't depend on the request (or on the user) belong here.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import collections
+import gzip
+import hashlib
+import logging
+import os
+import threading
+
+# Third-party
+import flask
+
+logger = logging.getLogger(__name__)
+
+_Page = collections.namedtuple('_Page', ('version', 'etag', 'body', 'gzip_etag', 'gzip_body'))
+_lock = threading.Lock()
+
+
+def init_cache(app):
+    """
+    Attach an empty page cache to an application.
+
+    :param app: The application to attach the page cache to.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    app.config['PAGE_CACHE'] = {}
+
+
+def clear():
+    """
+    Drop every rendered page of the current application.
+
+    :return: None
+    :rtype: None
+    """
+    with _lock:
+        flask.current_app.config['PAGE_CACHE'].clear()
+
+
+def prime(app, template_names):
+    """
+    Render pages ahead of the first request for them, e.g in the master process before the workers
+        are forked, so that every worker shares them.
+
+    :param app: The application whose page cache to prime.
+    :type app: flask.app.Flask
+    :param template_names: The names of the templates that make up the pages.
+    :type template_names: tuple
+    :return: None
+    :rtype: None
+    """
+    with app.test_request_context():
+        version = _templates_version(app)
+        for template_name in template_names:
+            page = _build_page(template_name, version)
+            with _lock:
+                app.config['PAGE_CACHE'][template_name] = page
+
+
+def _templates_version(app):
+    if not app.jinja_env.auto_reload:
+        return 0
+
+    latest = 0
+    for search_path in app.jinja_loader.searchpath:
+        for directory, _, file_names in os.walk(search_path):
+            for file_name in file_names:
+                latest = max(latest, os.stat(os.path.join(directory, file_name)).st_mtime_ns)
+    return latest
+
+
+def _build_page(template_name, version):
+    body = flask.render_template(template_name).encode('utf-8')
+    gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+    etag = hashlib.sha1(body).hexdigest()
+    logger.debug(f'Cached {template_name}: {len(body)} bytes, {len(gzip_body)} gzip compressed.')
+    return _Page(version, etag, body, f'{etag}-gz', gzip_body)
+
+
+def render(template_name):
+    """
+    Respond with a page that only depends on its template, rendering the template only if needed.
+
+    :param template_name: The name of the template that makes up the page.
+    :type template_name: str
+    :return: The page, gzip compressed if the client accepts it, or 304 Not Modified if the client
+        already has it.
+    :rtype: flask.Response
+    """
+    app = flask.current_app
+    pages = app.config['PAGE_CACHE']
+    version = _templates_version(app)
+    page = pages.get(template_name)
+    if page is None or page.version != version:
+        page = _build_page(template_name, version)
+        with _lock:
+            pages[template_name] = page
+
+    request = flask.request
+    if request.accept_encodings['gzip']:
+        etag, body = page.gzip_etag, page.gzip_body
+    else:
+        etag, body = page.etag, page.body
+
+    if request.if_none_match.contains(etag) or request.if_none_match.star_tag:
+        response = flask.Response(status=304)
+    else:
+        response = flask.Response(body, mimetype='text/html')
+        if body is page.gzip_body:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['PAGE_CACHE_MAX_AGE']
+    response.vary.add('Accept-Encoding')
+    return response
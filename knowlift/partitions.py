@@ -0,0 +1,317 @@
+"""
+Store answers in monthly partitions and compact the old ones into daily rollups.
+
+Answers are the only entity that grows without bound. Rather than keeping them all in one table,
+    each month gets its own table (e.g answer_2019_10), created on demand when its first answer is
+    stored. Once a month is old enough, its partition is compacted into daily, per-user, per-level
+    aggregates (models.answer_rollup) and then dropped.
+
+Functions:
+==========
+    get_answers: Fetch the individual answers stored within a time range.
+    get_daily_stats: Fetch the daily, per-level number of correct & incorrect answers.
+    get_partition: Get the table backing a partition.
+    insert_answers: Store answers in the partitions matching their creation time.
+    list_partitions: List the partitions present in the database, oldest first.
+    partition_name: Get the name of the partition that stores answers created at a given moment.
+    partitions_between: Get the names of the partitions overlapping a time range.
+    rollup: Compact the old partitions into daily aggregates and drop them.
+
+CONSTANTS:
+==========
+    PREFIX: The prefix shared by the names of all partitions.
+
+Notes
+=====
+    * Partition pruning is automatic: reads only touch the partitions overlapping the requested
+        time range, e.g recent activity touches the current (hot) partition only.
+    * Reads spanning compacted months are served from the (small) rollups instead.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import collections
+import datetime
+import logging
+import re
+import threading
+
+# Third party
+import sqlalchemy
+
+# Project specific
+from knowlift import models
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'answer_'
+
+_PARTITION_PATTERN = re.compile(rf'^{PREFIX}(\d{{4}})_(\d{{2}})$')
+_partition_metadata = sqlalchemy.MetaData()
+_partitions = {}
+_insert_statements = {}
+_created_partitions = set()
+_partitions_lock = threading.Lock()
+
+
+def partition_name(moment):
+    """
+    Get the name of the partition that stores the answers created at a given moment.
+
+    :param moment: A point in time, e.g datetime.datetime(2019, 10, 3, 12, 30).
+    :type moment: datetime.date
+    :return: The name of the partition, e.g answer_2019_10.
+    :rtype: str
+    """
+    return f'{PREFIX}{moment.year:04d}_{moment.month:02d}'
+
+
+def partitions_between(start, end):
+    """
+    Get the names of the partitions overlapping a time range (both ends included).
+
+    :param start: The beginning of the time range.
+    :type start: datetime.date
+    :param end: The end of the time range.
+    :type end: datetime.date
+    :return: The names of the partitions, oldest first.
+    :rtype: list
+    """
+    year, month = start.year, start.month
+    names = []
+    while (year, month) <= (end.year, end.month):
+        names.append(partition_name(datetime.date(year, month, 1)))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return names
+
+
+def get_partition(name):
+    """
+    Get the table backing a partition. Tables are built once per process and reused.
+
+    :param name: The name of the partition, e.g answer_2019_10.
+    :type name: str
+    :return: The table of the partition.
+    :rtype: sqlalchemy.Table
+    """
+    table = _partitions.get(name)
+    if table is None:
+        with _partitions_lock:
+            table = _partitions.get(name)
+            if table is None:
+                table = models.build_answer_table(name, _partition_metadata)
+                _partitions[name] = table
+    return table
+
+
+def list_partitions(connection):
+    """
+    List the partitions present in the database.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :return: The names of the partitions, oldest first.
+    :rtype: list
+    """
+    names = connection.engine.table_names(connection=connection)
+    return sorted(name for name in names if _PARTITION_PATTERN.match(name))
+
+
+def _ensure_partition(connection, name):
+    key = (str(connection.engine.url), name)
+    table = get_partition(name)
+    if key not in _created_partitions:
+        table.create(bind=connection, checkfirst=True)
+        _created_partitions.add(key)
+
+    # Reusing the same statement lets the engine's compiled cache skip compiling it again.
+    insert_query = _insert_statements.get(name)
+    if insert_query is None:
+        insert_query = _insert_statements.setdefault(name, table.insert())
+    return insert_query
+
+
+def insert_answers(connection, answers, now=None):
+    """
+    Store answers in the partitions matching their creation time, within a single transaction.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param answers: A series of mappings holding the values of an answer. The creation time
+        (date_created) defaults to the current time.
+    :type answers: list
+    :param now: The current time, defaults to datetime.datetime.utcnow().
+    :type now: datetime.datetime
+    :return: The number of answers stored.
+    :rtype: int
+    """
+    now = now or datetime.datetime.utcnow()
+    by_partition = collections.defaultdict(list)
+    for answer in answers:
+        answer = dict(answer)
+        answer['date_created'] = answer.get('date_created') or now
+        by_partition[partition_name(answer['date_created'])].append(answer)
+
+    inserted = 0
+    with connection.begin():
+        for name, partition_answers in by_partition.items():
+            insert_query = _ensure_partition(connection, name)
+            inserted += connection.execute(insert_query, partition_answers).rowcount
+    return inserted
+
+
+def _prune(connection, start, end):
+    existing = list_partitions(connection)
+    if start is None:
+        return [name for name in existing if name <= partition_name(end)]
+    else:
+        return sorted(set(existing).intersection(partitions_between(start, end)))
+
+
+def get_answers(connection, start=None, end=None, user_id=None):
+    """
+    Fetch the individual answers stored within a time range, most recent first.
+
+    Only the partitions overlapping the time range are queried. Answers from compacted partitions
+        are no longer available individually (see get_daily_stats).
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param start: The beginning of the time range, defaults to the oldest partition.
+    :type start: datetime.datetime
+    :param end: The end of the time range, defaults to the current time.
+    :type end: datetime.datetime
+    :param user_id: Only fetch the answers of this user (if given).
+    :type user_id: int
+    :return: The answers found.
+    :rtype: list
+    """
+    end = end or datetime.datetime.utcnow()
+    selects = []
+    for name in _prune(connection, start, end):
+        table = get_partition(name)
+        conditions = [table.c.date_created <= end]
+        if start is not None:
+            conditions.append(table.c.date_created >= start)
+        if user_id is not None:
+            conditions.append(table.c.user_id == user_id)
+        selects.append(sqlalchemy.select([table]).where(sqlalchemy.and_(*conditions)))
+
+    if not selects:
+        return []
+    union = sqlalchemy.union_all(*selects).alias('answers')
+    query = sqlalchemy.select([union]).order_by(union.c.date_created.desc(), union.c.id.desc())
+    return connection.execute(query).fetchall()
+
+
+def _aggregate(table):
+    return sqlalchemy.select([
+        table.c.user_id,
+        table.c.game_level,
+        sqlalchemy.func.date(table.c.date_created).label('day'),
+        sqlalchemy.func.sum(sqlalchemy.cast(table.c.outcome, sqlalchemy.Integer)).label('correct'),
+        sqlalchemy.func.sum(
+            sqlalchemy.cast(sqlalchemy.not_(table.c.outcome), sqlalchemy.Integer)
+        ).label('incorrect'),
+    ]).group_by(
+        table.c.user_id, table.c.game_level, sqlalchemy.func.date(table.c.date_created)
+    )
+
+
+def get_daily_stats(connection, start, end=None, user_id=None):
+    """
+    Fetch the daily, per-level number of correct & incorrect answers within a range of days.
+
+    Compacted months are read from the rollups, the rest are aggregated out of the partitions
+        overlapping the range.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param start: The first day of the range.
+    :type start: datetime.date
+    :param end: The last day of the range, defaults to today.
+    :type end: datetime.date
+    :param user_id: Only count the answers of this user (if given).
+    :type user_id: int
+    :return: Rows of the form (day, game_level, correct, incorrect), ordered by day and level.
+    :rtype: list
+    """
+    end = end or datetime.datetime.utcnow().date()
+    rollup = models.answer_rollup
+    rollup_conditions = [rollup.c.day >= start, rollup.c.day <= end]
+    if user_id is not None:
+        rollup_conditions.append(rollup.c.user_id == user_id)
+    selects = [
+        sqlalchemy.select([
+            rollup.c.game_level,
+            sqlalchemy.cast(rollup.c.day, sqlalchemy.String).label('day'),
+            rollup.c.correct,
+            rollup.c.incorrect,
+        ]).where(sqlalchemy.and_(*rollup_conditions))
+    ]
+
+    for name in _prune(connection, start, end):
+        aggregate = _aggregate(get_partition(name)).alias()
+        conditions = [aggregate.c.day >= start.isoformat(), aggregate.c.day <= end.isoformat()]
+        if user_id is not None:
+            conditions.append(aggregate.c.user_id == user_id)
+        selects.append(
+            sqlalchemy.select([
+                aggregate.c.game_level, aggregate.c.day, aggregate.c.correct,
+                aggregate.c.incorrect,
+            ]).where(sqlalchemy.and_(*conditions))
+        )
+
+    union = sqlalchemy.union_all(*selects).alias('stats')
+    query = sqlalchemy.select([
+        sqlalchemy.type_coerce(union.c.day, sqlalchemy.Date).label('day'),
+        union.c.game_level,
+        sqlalchemy.func.sum(union.c.correct).label('correct'),
+        sqlalchemy.func.sum(union.c.incorrect).label('incorrect'),
+    ]).group_by(union.c.day, union.c.game_level).order_by(union.c.day, union.c.game_level)
+    return connection.execute(query).fetchall()
+
+
+def rollup(connection, keep=2, now=None):
+    """
+    Compact the partitions older than the most recent ones into daily aggregates, then drop them.
+
+    Each partition is compacted within its own transaction, hence an interrupted rollup can simply
+        be run again.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param keep: The number of most recent months (the current one included) left untouched.
+    :type keep: int
+    :param now: The current time, defaults to datetime.datetime.utcnow().
+    :type now: datetime.datetime
+    :return: The names of the partitions compacted.
+    :rtype: list
+    """
+    assert keep > 0, 'The current partition must always be kept.'
+    now = now or datetime.datetime.utcnow()
+    months = now.year * 12 + now.month - keep
+    oldest_kept = partition_name(datetime.date(months // 12, months % 12 + 1, 1))
+
+    compacted = []
+    for name in list_partitions(connection):
+        if name >= oldest_kept:
+            continue
+
+        table = get_partition(name)
+        with connection.begin():
+            connection.execute(
+                models.answer_rollup.insert().from_select(
+                    ['user_id', 'game_level', 'day', 'correct', 'incorrect'], _aggregate(table)
+                )
+            )
+            table.drop(bind=connection)
+        _created_partitions.discard((str(connection.engine.url), name))
+        compacted.append(name)
+        logger.info(f'Compacted partition {name} into daily rollups.')
+    return compacted
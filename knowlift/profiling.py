@@ -0,0 +1,178 @@
+"""
+Profile a sample of the requests served in production and find out where their time goes.
+
+Functions:
+==========
+    find_hotspots: Aggregate the stored profiles into the top cumulative hotspots per route.
+    start_profiling: Start profiling the current request, if it's sampled or privileged.
+    stop_profiling: Stop profiling the current request and store its profile.
+
+Classes:
+========
+    Hotspot: A function, the number of times it was called and the cumulative time spent in it.
+    RouteProfile: The number of requests profiled for a route, their mean latency and hotspots.
+
+CONSTANTS:
+==========
+    PROFILE_SUFFIX: The suffix of the files profiles are stored in.
+
+Notes
+=====
+    * Profiling is off unless PROFILING_ENABLED is set. When on, a random PROFILING_SAMPLE_RATE
+        fraction of the requests is profiled, as well as every request carrying the header named by
+        PROFILING_HEADER whose value is PROFILING_TOKEN (i.e privileged requests, disabled unless a
+        token is configured).
+    * Each profile is stored in PROFILING_DIRECTORY as a pstats file tagged with the endpoint and
+        the latency of its request, e.g result.12.503ms.1571490000123456789.4242.pstats. Only the
+        most recent PROFILING_MAX_FILES profiles are kept.
+    * Aggregate the profiles via: flask profiles top [--limit N] [--endpoint ENDPOINT]
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import cProfile
+import collections
+import hmac
+import logging
+import os
+import random
+import re
+import time
+
+# Third-party
+import flask
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.pstats'
+
+_PROFILE_PATTERN = re.compile(
+    rf'^(?P<endpoint>.+)\.(?P<latency>\d+\.\d+)ms\.\d+\.\d+{re.escape(PROFILE_SUFFIX)}$'
+)
+
+Hotspot = collections.namedtuple('Hotspot', ('function', 'calls', 'cumulative_time'))
+RouteProfile = collections.namedtuple('RouteProfile', ('requests', 'mean_latency', 'hotspots'))
+
+
+def _is_privileged(config):
+    token = config['PROFILING_TOKEN']
+    value = flask.request.headers.get(config['PROFILING_HEADER'])
+    return bool(token and value) and hmac.compare_digest(value.encode(), token.encode())
+
+
+def start_profiling():
+    """
+    Start profiling the current request, if profiling is enabled and the request is either sampled
+        or privileged.
+
+    Meant to be registered via flask.Flask.before_request.
+
+    :return: None
+    :rtype: None
+    """
+    config = flask.current_app.config
+    if not config['PROFILING_ENABLED']:
+        return
+    elif random.random() >= config['PROFILING_SAMPLE_RATE'] and not _is_privileged(config):
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as ex:  # another profiler is already active
+        logger.debug(f'Unable to profile {flask.request.path}: {ex}')
+        return
+
+    flask.g.profiler = profiler
+    flask.g.profiling_start = time.perf_counter()
+
+
+def _rotate(directory, max_files):
+    # Profiles are named ...{time_ns}.{pid}.pstats, hence they're sorted by when they were stored.
+    profiles = sorted(
+        (name for name in os.listdir(directory) if _PROFILE_PATTERN.match(name)),
+        key=lambda name: int(name.split('.')[-3]),
+    )
+    for name in profiles[:max(len(profiles) - max_files, 0)]:
+        try:
+            os.unlink(os.path.join(directory, name))
+        except FileNotFoundError:  # rotated concurrently by another worker
+            pass
+
+
+def stop_profiling(exception=None):
+    """
+    Stop profiling the current request (if it's being profiled) and store its profile.
+
+    Meant to be registered via flask.Flask.teardown_request, hence requests that fail are profiled
+        as well.
+
+    :param exception: The exception that ended the request, if any.
+    :type exception: Exception
+    :return: None
+    :rtype: None
+    """
+    profiler = flask.g.pop('profiler', None)
+    if profiler is None:
+        return
+
+    profiler.disable()
+    latency = (time.perf_counter() - flask.g.pop('profiling_start')) * 1000
+    config = flask.current_app.config
+    rule = flask.request.url_rule
+    endpoint = rule.endpoint if rule is not None else 'unmatched'
+
+    directory = config['PROFILING_DIRECTORY']
+    os.makedirs(directory, exist_ok=True)
+    file_name = f'{endpoint}.{latency:.3f}ms.{time.time_ns()}.{os.getpid()}{PROFILE_SUFFIX}'
+    profiler.dump_stats(os.path.join(directory, file_name))
+    _rotate(directory, config['PROFILING_MAX_FILES'])
+    logger.info(f'Profiled {flask.request.path} ({endpoint}) in {latency:.3f}ms: {file_name}')
+
+
+def find_hotspots(directory, limit=10, endpoint=None):
+    """
+    Aggregate the stored profiles, per route, into their top cumulative hotspots.
+
+    :param directory: The directory the profiles are stored in.
+    :type directory: str
+    :param limit: The number of hotspots per route.
+    :type limit: int
+    :param endpoint: Only aggregate the profiles of this endpoint (if given).
+    :type endpoint: str
+    :return: A mapping of endpoints to RouteProfile objects, whose hotspots are sorted by their
+        cumulative time, in descending order.
+    :rtype: dict
+    """
+    # Only the reports need pstats, the requests being profiled don't.
+    import pstats
+
+    files_per_endpoint = collections.defaultdict(list)
+    latencies = collections.defaultdict(list)
+    try:
+        file_names = os.listdir(directory)
+    except FileNotFoundError:
+        file_names = []
+
+    for file_name in file_names:
+        match = _PROFILE_PATTERN.match(file_name)
+        if match and endpoint in (None, match.group('endpoint')):
+            files_per_endpoint[match.group('endpoint')].append(os.path.join(directory, file_name))
+            latencies[match.group('endpoint')].append(float(match.group('latency')))
+
+    routes = {}
+    for route, paths in sorted(files_per_endpoint.items()):
+        stats = pstats.Stats(*paths)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        hotspots = [
+            Hotspot(pstats.func_std_string(function), calls, cumulative_time)
+            for function, (_, calls, _, cumulative_time, _) in functions[:limit]
+        ]
+        mean_latency = sum(latencies[route]) / len(latencies[route])
+        routes[route] = RouteProfile(len(paths), mean_latency, hotspots)
+    return routes
@@ -0,0 +1,389 @@
+"""
+Keep the progress of each user (the game level last played, totals & streaks) in memory, within
+    each worker process, and write it back to the database in batches.
+
+Classes:
+========
+    Progress: A compact, immutable record of the progress of a single user.
+    ProgressCache: A bounded LRU cache of progress records, whose updates are written back later.
+
+Functions:
+==========
+    flush_caches: Write back whatever every progress cache of this process hasn't written yet.
+    get_cache: Get the progress cache bound to the current application.
+    get_progress: Get the progress of a user, through the progress cache.
+    init_progress: Bind a progress cache to an application.
+    record_answer: Update the progress of a user with the outcome of an answer.
+
+Notes
+=====
+    * Reading the progress of a user costs a single query the first time, memory afterwards
+        (users that never answered a question are cached as well). Updates only touch memory: the
+        entries they dirty are written back by a background thread, started by the first update of
+        each process, every PROGRESS_FLUSH_INTERVAL seconds (PROGRESS_FLUSH_BATCH_SIZE rows per
+        transaction) as well as when the process exits.
+    * Reads always see the updates of the same process: a dirty entry evicted from the cache is
+        kept aside until it's written back, and so are the entries being written back, misses look
+        there before querying. Processes don't see each other's pending updates though, hence the
+        progress of a user should be updated by a single worker at a time (the last write back
+        wins otherwise).
+    * The cache holds at most PROGRESS_CACHE_SIZE entries (roughly 270 bytes each), the least
+        recently used ones are evicted first.
+    * Forked workers start with an empty cache and a background thread of their own. Whatever the
+        parent process has yet to write back is written back by the parent.
+    * Exposed metrics (see knowlift.metrics): knowlift_progress_cache_hits_total,
+        knowlift_progress_cache_misses_total, knowlift_progress_cache_hit_ratio,
+        knowlift_progress_cache_evictions_total & knowlift_progress_rows_flushed_total.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import atexit
+import collections
+import datetime
+import functools
+import logging
+import os
+import threading
+import weakref
+
+# Third-party
+import flask
+
+# Project specific
+from knowlift import db
+from knowlift import metrics
+from knowlift import repository
+
+logger = logging.getLogger(__name__)
+
+Progress = collections.namedtuple(
+    'Progress', ('game_level', 'correct', 'incorrect', 'streak', 'best_streak')
+)
+
+_NO_PROGRESS = Progress(0, 0, 0, 0, 0)
+
+_caches = weakref.WeakSet()
+
+
+class ProgressCache:
+    """
+    Store the progress of the most recently used users, up to a maximum number of entries, and
+        write the updated entries back to the database in batches.
+
+    Methods:
+    ========
+        get: Get the progress of a user, loading it on a miss.
+        update: Replace the progress of a user with the progress returned by a function.
+        flush: Write back every update that hasn't been written back yet.
+        start_flusher: Start writing back the updates periodically, from a background thread.
+        stop_flusher: Stop the background thread, if it's running.
+    """
+
+    def __init__(self, connect, max_entries, batch_size=500, flush_interval=0):
+        """
+        :param connect: A callable that returns a new connection (used as a context manager).
+        :type connect: callable
+        :param max_entries: The maximum number of entries kept in memory, at least 1.
+        :type max_entries: int
+        :param batch_size: The maximum number of rows written back within a single transaction.
+        :type batch_size: int
+        :param flush_interval: The number of seconds between two write backs of the background
+            thread, 0 disables the thread (updates are then written back via flush only).
+        :type flush_interval: float
+        """
+        self._connect = connect
+        self.max_entries = max(max_entries, 1)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._reset()
+        _caches.add(self)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # least recently used first
+        self._dirty = set()  # the entries updated since they were last written back
+        self._pending = {}  # dirty entries that were evicted before being written back
+        self._flushing = {}  # the entries being written back
+        self._generation = 0  # the number of write backs, see get
+        self._flusher = None
+        self._flusher_pid = None
+        self._stopped = threading.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, user_id, progress, dirty):
+        self._entries[user_id] = progress
+        self._entries.move_to_end(user_id)
+        if dirty:
+            self._dirty.add(user_id)
+
+        while len(self._entries) > self.max_entries:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            metrics.inc('knowlift_progress_cache_evictions_total')
+            if evicted_id in self._dirty:
+                self._dirty.discard(evicted_id)
+                self._pending[evicted_id] = evicted
+
+    def _peek(self, user_id):
+        # Must be called while holding the lock.
+        progress = self._entries.get(user_id)
+        if progress is not None:
+            self._entries.move_to_end(user_id)
+            return progress
+
+        progress = self._pending.pop(user_id, None)
+        if progress is not None:
+            self._store(user_id, progress, dirty=True)
+            return progress
+
+        progress = self._flushing.get(user_id)
+        if progress is not None:
+            self._store(user_id, progress, dirty=False)
+        return progress
+
+    def get(self, user_id):
+        """
+        Get the progress of a user, querying the database on a miss.
+
+        :param user_id: The primary key of the user.
+        :type user_id: int
+        :return: The progress of the user, all zeros if the user never answered a question.
+        :rtype: Progress
+        """
+        with self._lock:
+            progress = self._peek(user_id)
+            generation = self._generation
+        if progress is not None:
+            metrics.inc('knowlift_progress_cache_hits_total')
+            return progress
+
+        metrics.inc('knowlift_progress_cache_misses_total')
+        while True:
+            with self._connect() as connection:
+                row = repository.get_progress(connection, user_id)
+            loaded = Progress(*(row[field] for field in Progress._fields)) if row else _NO_PROGRESS
+
+            with self._lock:
+                # Another thread may have loaded or updated the same entry in the meantime.
+                progress = self._peek(user_id)
+                if progress is not None:
+                    return progress
+                # A write back committed while querying, the row read may predate it.
+                if self._generation == generation:
+                    self._store(user_id, loaded, dirty=False)
+                    return loaded
+                generation = self._generation
+
+    def update(self, user_id, function):
+        """
+        Replace the progress of a user with the progress returned by a function, in memory. The new
+            progress is written back later on.
+
+        :param user_id: The primary key of the user.
+        :type user_id: int
+        :param function: A callable that takes the current progress and returns the new one.
+        :type function: callable
+        :return: The new progress.
+        :rtype: Progress
+        """
+        if self.flush_interval and self._flusher_pid != os.getpid():
+            self.start_flusher()
+
+        while True:
+            self.get(user_id)
+            with self._lock:
+                progress = self._peek(user_id)
+                if progress is not None:  # unless it was evicted right away
+                    progress = function(progress)
+                    self._store(user_id, progress, dirty=True)
+                    return progress
+
+    def flush(self):
+        """
+        Write back every update that hasn't been written back yet, batch_size rows per transaction.
+
+        Should writing back fail, the updates are kept and written back by the next flush.
+
+        :return: The number of rows written back.
+        :rtype: int
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = dict(self._pending)
+                batch.update((user_id, self._entries[user_id]) for user_id in self._dirty)
+                self._pending.clear()
+                self._dirty.clear()
+                self._flushing = batch
+            if not batch:
+                return 0
+
+            now = datetime.datetime.utcnow()
+            rows = [
+                dict(progress._asdict(), user_id=user_id, last_updated=now)
+                for user_id, progress in batch.items()
+            ]
+            try:
+                with self._connect() as connection:
+                    for start in range(0, len(rows), self.batch_size):
+                        repository.save_progress(connection, rows[start:start + self.batch_size])
+            except Exception:
+                with self._lock:
+                    for user_id, progress in batch.items():
+                        if user_id in self._entries:  # as recent as the batch, if not more
+                            self._dirty.add(user_id)
+                        else:
+                            self._pending.setdefault(user_id, progress)
+                    self._flushing = {}
+                raise
+
+            with self._lock:
+                self._flushing = {}
+                self._generation += 1
+            metrics.inc('knowlift_progress_rows_flushed_total', amount=len(rows))
+            return len(rows)
+
+    def _flush_periodically(self, stopped):
+        while not stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Unable to write back the progress of the users.')
+
+    def start_flusher(self):
+        """
+        Start writing back the updates every flush_interval seconds, from a background thread. This
+            is a no-op if the thread is already running within the current process.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._stopped = threading.Event()
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, args=(self._stopped,),
+                name='progress-flusher', daemon=True,
+            )
+            self._flusher.start()
+
+    def stop_flusher(self):
+        """
+        Stop the background thread, if it's running, without writing back the pending updates.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            flusher, self._flusher, self._flusher_pid = self._flusher, None, None
+            self._stopped.set()
+        if flusher is not None:
+            flusher.join()
+
+
+def flush_caches():
+    """
+    Write back whatever every progress cache of this process hasn't written back yet, e.g when the
+        process exits.
+
+    :return: None
+    :rtype: None
+    """
+    for cache in list(_caches):
+        try:
+            cache.flush()
+        except Exception:
+            logger.exception('Unable to write back the progress of the users.')
+
+
+atexit.register(flush_caches)
+
+
+def _reset_caches_in_child():
+    # The parent writes back its own updates, workers start empty (and with a flusher of their own).
+    for cache in list(_caches):
+        cache._reset()
+
+
+os.register_at_fork(after_in_child=_reset_caches_in_child)
+
+
+def _connect(app):
+    return db.get_engine(app).connect()
+
+
+def init_progress(app):
+    """
+    Bind a progress cache to an application, sized and flushed as per PROGRESS_CACHE_SIZE,
+        PROGRESS_FLUSH_BATCH_SIZE & PROGRESS_FLUSH_INTERVAL. No I/O happens until it's first used.
+
+    :param app: A Flask application.
+    :type app: flask.app.Flask
+    :return: The progress cache.
+    :rtype: ProgressCache
+    """
+    app.config['PROGRESS_CACHE'] = ProgressCache(
+        functools.partial(_connect, app),
+        app.config['PROGRESS_CACHE_SIZE'],
+        app.config['PROGRESS_FLUSH_BATCH_SIZE'],
+        app.config['PROGRESS_FLUSH_INTERVAL'],
+    )
+    return app.config['PROGRESS_CACHE']
+
+
+def get_cache():
+    """
+    Get the progress cache bound to the current application.
+
+    :return: The progress cache.
+    :rtype: ProgressCache
+    """
+    return flask.current_app.config['PROGRESS_CACHE']
+
+
+def get_progress(user_id):
+    """
+    Get the progress of a user, through the progress cache of the current application.
+
+    :param user_id: The primary key of the user.
+    :type user_id: int
+    :return: The progress of the user.
+    :rtype: Progress
+    """
+    return get_cache().get(user_id)
+
+
+def _answered(game_level, outcome, progress):
+    if outcome:
+        streak = progress.streak + 1
+        return Progress(
+            game_level, progress.correct + 1, progress.incorrect, streak,
+            max(streak, progress.best_streak),
+        )
+    return Progress(game_level, progress.correct, progress.incorrect + 1, 0, progress.best_streak)
+
+
+def record_answer(user_id, game_level, outcome):
+    """
+    Update the progress of a user with the outcome of an answer, i.e the game level last played,
+        the number of correct & incorrect answers and the current & best streaks of correct ones.
+
+    :param user_id: The primary key of the user.
+    :type user_id: int
+    :param game_level: The game level of the question answered.
+    :type game_level: int
+    :param outcome: Whether the answer was correct.
+    :type outcome: bool
+    :return: The new progress of the user.
+    :rtype: Progress
+    """
+    return get_cache().update(user_id, functools.partial(_answered, game_level, outcome))
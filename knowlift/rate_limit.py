@@ -0,0 +1,270 @@
+"""
+Throttle the endpoints that are cheap to call but expensive to serve, per client IP and per client.
+
+Functions:
+==========
+    init_rate_limiter: Create the rate limiting backend of an application.
+    limit_request: Reject the current request (429) if its client went over its rate limit.
+    set_client_cookie: Hand new clients the cookie identifying them to the rate limiter.
+
+Classes:
+========
+    MemoryBackend: Token buckets held in the memory of the current process.
+    SharedBackend: Token buckets held in a memory mapped file, shared by every worker process.
+
+Notes
+=====
+    * Each client IP and each client (identified by the RATE_LIMIT_COOKIE cookie) gets a token
+        bucket holding up to *_BURST tokens, refilled at *_RATE tokens per second. Every request
+        to one of RATE_LIMIT_ENDPOINTS takes a token from both buckets, requests finding either of
+        them empty are rejected with 429 Too Many Requests & a Retry-After header.
+    * The client cookie isn't signed: a client dropping or forging it merely gets a fresh client
+        bucket, it still shares its IP bucket. The cookie lets the client limit be tighter than the
+        IP limit without throttling every user behind the same NAT.
+    * MemoryBackend (RATE_LIMIT_BACKEND = 'memory') suits a single worker process. With several
+        worker processes use SharedBackend ('shared'), otherwise each worker allows the full rate.
+    * Behind a reverse proxy, make sure request.remote_addr is the address of the client (e.g via
+        werkzeug.middleware.proxy_fix.ProxyFix), not the one of the proxy.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import collections
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import re
+import secrets
+import struct
+import threading
+import time
+
+# Third-party
+import flask
+
+from werkzeug import exceptions
+
+logger = logging.getLogger(__name__)
+
+_CLIENT_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,32}$')
+_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _refill(tokens, updated, rate, burst, now):
+    tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryBackend:
+    """
+    Token buckets held in the memory of the current process, the least recently used of which are
+        dropped once there are more than max_keys of them.
+
+    Methods:
+    ========
+        take: Take a token from a bucket.
+    """
+
+    def __init__(self, max_keys=100000):
+        """
+        :param max_keys: The maximum number of buckets kept around.
+        :type max_keys: int
+        """
+        self.max_keys = max_keys
+        self._buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """
+        Take a token from a bucket, refilled with the tokens accrued since it was last used.
+
+        :param key: The key of the bucket, e.g ip:127.0.0.1.
+        :type key: str
+        :param rate: The number of tokens the bucket is refilled with per second.
+        :type rate: float
+        :param burst: The capacity of the bucket (unknown buckets start full).
+        :type burst: int
+        :param now: The current time as a UNIX timestamp, defaults to the current time.
+        :type now: float
+        :return: 0 if a token was taken, otherwise the number of seconds until one is available.
+        :rtype: float
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, wait = _refill(tokens, updated, rate, burst, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class SharedBackend:
+    """
+    Token buckets held in a memory mapped file, hence shared by every process that opens it.
+
+    The file is a hash table of slots (key hash, tokens, last update), split into groups of
+        GROUP_SIZE slots. A key lives within the group its hash points to and, when the group is
+        full, takes over its least recently updated slot. Only the group being updated is locked
+        (via fcntl), hence workers rarely wait for each other.
+
+    Methods:
+    ========
+        take: Take a token from a bucket.
+    """
+
+    GROUP_SIZE = 8
+
+    _SLOT = struct.Struct('<Qdd')
+
+    def __init__(self, path, slots=65536):
+        """
+        :param path: The path of the file, created if it doesn't exist.
+        :type path: str
+        :param slots: The number of buckets the file holds, rounded up to a multiple of GROUP_SIZE.
+        :type slots: int
+        """
+        self.path = path
+        self.groups = max(math.ceil(slots / self.GROUP_SIZE), 1)
+        self._group_bytes = self.GROUP_SIZE * self._SLOT.size
+        size = self.groups * self._group_bytes
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._table = mmap.mmap(self._fd, size)
+        # fcntl locks are held per process, threads of the same process take turns via this lock.
+        self._lock = threading.Lock()
+
+    def _find_slot(self, offset, key_hash):
+        stalest = None
+        for slot in range(offset, offset + self._group_bytes, self._SLOT.size):
+            slot_hash, tokens, updated = self._SLOT.unpack_from(self._table, slot)
+            if slot_hash in (key_hash, 0):
+                return slot, slot_hash == key_hash, tokens, updated
+            elif stalest is None or updated < stalest[1]:
+                stalest = (slot, updated)
+        return stalest[0], False, 0.0, 0.0
+
+    def take(self, key, rate, burst, now=None):
+        """
+        Take a token from a bucket, refilled with the tokens accrued since it was last used.
+
+        :param key: The key of the bucket, e.g ip:127.0.0.1.
+        :type key: str
+        :param rate: The number of tokens the bucket is refilled with per second.
+        :type rate: float
+        :param burst: The capacity of the bucket (unknown buckets start full).
+        :type burst: int
+        :param now: The current time as a UNIX timestamp, defaults to the current time.
+        :type now: float
+        :return: 0 if a token was taken, otherwise the number of seconds until one is available.
+        :rtype: float
+        """
+        now = time.time() if now is None else now
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, 'little') or 1  # 0 marks empty slots
+        offset = (key_hash % self.groups) * self._group_bytes
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._group_bytes, offset, os.SEEK_SET)
+            try:
+                slot, found, tokens, updated = self._find_slot(offset, key_hash)
+                if not found:
+                    tokens, updated = burst, now
+                tokens, wait = _refill(tokens, updated, rate, burst, now)
+                self._SLOT.pack_into(self._table, slot, key_hash, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._group_bytes, offset, os.SEEK_SET)
+        return wait
+
+
+def init_rate_limiter(app):
+    """
+    Create the rate limiting backend chosen via RATE_LIMIT_BACKEND and load it in RATE_LIMITER.
+
+    :param app: The application to create the backend for.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    :raise ValueError: If RATE_LIMIT_BACKEND is neither 'memory' nor 'shared'.
+    """
+    backend = app.config['RATE_LIMIT_BACKEND']
+    if backend == 'memory':
+        app.config['RATE_LIMITER'] = MemoryBackend(app.config['RATE_LIMIT_MAX_KEYS'])
+    elif backend == 'shared':
+        app.config['RATE_LIMITER'] = SharedBackend(
+            app.config['RATE_LIMIT_SHARED_FILE'], app.config['RATE_LIMIT_MAX_KEYS']
+        )
+    else:
+        raise ValueError(f'Unknown rate limiting backend: {backend!r}')
+
+
+def limit_request():
+    """
+    Take a token from the buckets of the client IP & of the client, if the current request is rate
+        limited.
+
+    Meant to be registered via flask.Flask.before_request.
+
+    :return: None
+    :rtype: None
+    :raise werkzeug.exceptions.TooManyRequests: If either bucket is empty.
+    """
+    config = flask.current_app.config
+    if not config['RATE_LIMIT_ENABLED']:
+        return
+    elif flask.request.endpoint not in config['RATE_LIMIT_ENDPOINTS']:
+        return
+
+    limiter = config['RATE_LIMITER']
+    now = time.time()
+    wait = limiter.take(
+        f'ip:{flask.request.remote_addr}', config['RATE_LIMIT_IP_RATE'],
+        config['RATE_LIMIT_IP_BURST'], now,
+    )
+    client = flask.request.cookies.get(config['RATE_LIMIT_COOKIE'], '')
+    if not _CLIENT_PATTERN.match(client):
+        flask.g.rate_limit_client = secrets.token_urlsafe(16)
+    elif not wait:
+        wait = limiter.take(
+            f'client:{client}', config['RATE_LIMIT_CLIENT_RATE'],
+            config['RATE_LIMIT_CLIENT_BURST'], now,
+        )
+
+    if wait:
+        raise exceptions.TooManyRequests(
+            'Too many requests, slow down.', retry_after=max(math.ceil(wait), 1)
+        )
+
+
+def set_client_cookie(response):
+    """
+    Hand the client the cookie identifying it to the rate limiter, if it didn't send one.
+
+    Meant to be registered via flask.Flask.after_request.
+
+    :param response: The response about to be sent.
+    :type response: flask.wrappers.Response
+    :return: The same response.
+    :rtype: flask.wrappers.Response
+    """
+    client = flask.g.pop('rate_limit_client', None)
+    if client is not None:
+        response.set_cookie(
+            flask.current_app.config['RATE_LIMIT_COOKIE'], client, max_age=_COOKIE_MAX_AGE,
+            httponly=True, samesite='Lax',
+        )
+    return response
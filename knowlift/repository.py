@@ -0,0 +1,307 @@
+"""
+Gather the hot queries of this application behind a set of precompiled statements.
+
+Every statement below is built exactly once (at import time) with bound parameters in place of
+    values. On first use, each statement is compiled once per dialect and the resulting compiled
+    object is reused for every subsequent call, hence SQL compilation isn't paid per call. The
+    leaderboard spans the live answer partitions (see knowlift.partitions), hence it's built &
+    compiled once per set of partitions, i.e roughly once a month.
+
+Functions:
+==========
+    get_countries: Fetch every country, ordered by id.
+    get_country_by_name: Fetch a country by its english short name.
+    get_leaderboard: Fetch a page of the users with the most correct answers.
+    get_progress: Fetch the progress of a user.
+    get_stats: Get the compile/execute timings accumulated per statement.
+    get_user_by_email: Fetch a user by its email.
+    get_user_by_id: Fetch a user by its id.
+    get_user_by_username: Fetch a user by its username.
+    insert_answers: Store answers in their partitions, within a single transaction.
+    save_progress: Insert or replace the progress of many users, within a single transaction.
+
+CONSTANTS:
+==========
+    ANSWER_FIELDS: The fields each answer passed to insert_answers must have.
+    PROGRESS_FIELDS: The fields each row passed to save_progress must have.
+
+Notes
+=====
+    * Each call is instrumented: the time spent compiling (0 once compiled) and the time spent
+        executing are logged at DEBUG level and accumulated (see get_stats).
+    * Ad hoc statements built elsewhere benefit from the engine's compiled cache instead (see
+        db.get_engine), as long as they're built once and reused.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import collections
+import logging
+import threading
+import time
+
+# Third party
+import sqlalchemy
+
+# Project specific
+from knowlift import models
+from knowlift import partitions
+
+logger = logging.getLogger(__name__)
+
+ANSWER_FIELDS = (
+    'user_id', 'game_level', 'left_glyph', 'right_glyph', 'start', 'stop', 'answer', 'outcome',
+)
+PROGRESS_FIELDS = (
+    'user_id', 'game_level', 'correct', 'incorrect', 'streak', 'best_streak', 'last_updated',
+)
+
+_STATEMENTS = {
+    'user_by_id': models.user.select(models.user.c.id == sqlalchemy.bindparam('user_id')),
+    'user_by_username': models.user.select(
+        models.user.c.username == sqlalchemy.bindparam('username')
+    ),
+    'user_by_email': models.user.select(models.user.c.email == sqlalchemy.bindparam('email')),
+    'countries': models.country.select().order_by(models.country.c.id),
+    'country_by_name': models.country.select(
+        models.country.c.english_short_name == sqlalchemy.bindparam('english_short_name')
+    ),
+    'progress_by_user': models.user_progress.select(
+        models.user_progress.c.user_id == sqlalchemy.bindparam('user_id')
+    ),
+    'save_progress': models.user_progress.insert().prefix_with('OR REPLACE'),
+}
+
+_leaderboard_statements = {}
+_compiled_statements = {}
+_stats = collections.defaultdict(lambda: [0, 0.0, 0.0])  # calls, compile time, execute time
+_stats_lock = threading.Lock()
+
+
+def _build_leaderboard(partition_names):
+    # Totals come from the rollups (compacted months) plus the partitions that are still live.
+    rollup = models.answer_rollup
+    selects = [
+        sqlalchemy.select([
+            rollup.c.user_id,
+            rollup.c.correct.label('correct'),
+            (rollup.c.correct + rollup.c.incorrect).label('total'),
+        ]).where(rollup.c.user_id.isnot(None))
+    ]
+    for name in partition_names:
+        table = partitions.get_partition(name)
+        selects.append(
+            sqlalchemy.select([
+                table.c.user_id,
+                sqlalchemy.cast(table.c.outcome, sqlalchemy.Integer).label('correct'),
+                sqlalchemy.literal_column('1').label('total'),
+            ]).where(table.c.user_id.isnot(None))
+        )
+
+    answers = sqlalchemy.union_all(*selects).alias('answers')
+    correct = sqlalchemy.func.sum(answers.c.correct).label('correct')
+    total = sqlalchemy.func.sum(answers.c.total).label('total')
+    return sqlalchemy.select(
+        [models.user.c.id, models.user.c.username, models.user.c.country_id, correct, total],
+        from_obj=answers.join(models.user, answers.c.user_id == models.user.c.id),
+    ).group_by(
+        models.user.c.id
+    ).order_by(
+        correct.desc(), total, models.user.c.id
+    ).limit(
+        sqlalchemy.bindparam('limit')
+    ).offset(
+        sqlalchemy.bindparam('offset')
+    )
+
+
+def _execute(connection, name, params, key=None):
+    dialect = connection.dialect
+    key = key or name
+    start = time.perf_counter()
+    compiled = _compiled_statements.get((key, dialect))
+    if compiled is None:
+        statement = _STATEMENTS[name] if key == name else _leaderboard_statements[key]
+        compiled = statement.compile(dialect=dialect)
+        _compiled_statements[(key, dialect)] = compiled
+
+    compiled_at = time.perf_counter()
+    result = connection.execute(compiled, params)
+    executed_at = time.perf_counter()
+
+    compile_time, execute_time = compiled_at - start, executed_at - compiled_at
+    with _stats_lock:
+        stats = _stats[name]
+        stats[0] += 1
+        stats[1] += compile_time
+        stats[2] += execute_time
+    logger.debug(
+        f'{name}: compile {compile_time * 1000:.3f}ms, execute {execute_time * 1000:.3f}ms'
+    )
+    return result
+
+
+def get_stats():
+    """
+    Get the timings accumulated per statement since the application started.
+
+    :return: A mapping of statement names to (calls, compile seconds, execute seconds) tuples.
+    :rtype: dict
+    """
+    with _stats_lock:
+        return {name: tuple(stats) for name, stats in _stats.items()}
+
+
+def get_user_by_id(connection, user_id):
+    """
+    Fetch a user by its id.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param user_id: The primary key of the user.
+    :type user_id: int
+    :return: The matching user or None.
+    :rtype: sqlalchemy.engine.result.RowProxy
+    """
+    return _execute(connection, 'user_by_id', {'user_id': user_id}).first()
+
+
+def get_user_by_username(connection, username):
+    """
+    Fetch a user by its username.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param username: The username of the user.
+    :type username: str
+    :return: The matching user or None.
+    :rtype: sqlalchemy.engine.result.RowProxy
+    """
+    return _execute(connection, 'user_by_username', {'username': username}).first()
+
+
+def get_user_by_email(connection, email):
+    """
+    Fetch a user by its email.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param email: The email of the user.
+    :type email: str
+    :return: The matching user or None.
+    :rtype: sqlalchemy.engine.result.RowProxy
+    """
+    return _execute(connection, 'user_by_email', {'email': email}).first()
+
+
+def get_countries(connection):
+    """
+    Fetch every country, ordered by id.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :return: All the countries in the database.
+    :rtype: list
+    """
+    return _execute(connection, 'countries', {}).fetchall()
+
+
+def get_country_by_name(connection, english_short_name):
+    """
+    Fetch a country by its english short name.
+
+    Prefer the country cache (knowlift.countries) for lookups performed while serving requests.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param english_short_name: The english short name of the country.
+    :type english_short_name: str
+    :return: The matching country or None.
+    :rtype: sqlalchemy.engine.result.RowProxy
+    """
+    params = {'english_short_name': english_short_name}
+    return _execute(connection, 'country_by_name', params).first()
+
+
+def get_leaderboard(connection, page=1, per_page=20):
+    """
+    Fetch a page of the users ranked by their number of correct answers.
+
+    Ties are broken by the total number of answers (fewer is better), then by the user's id.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param page: The number of the page to fetch, starting from 1.
+    :type page: int
+    :param per_page: The number of users per page.
+    :type per_page: int
+    :return: Rows of the form (id, username, country_id, correct, total).
+    :rtype: list
+    """
+    key = ('leaderboard', tuple(partitions.list_partitions(connection)))
+    if key not in _leaderboard_statements:
+        _leaderboard_statements[key] = _build_leaderboard(key[1])
+
+    params = {'limit': per_page, 'offset': (max(page, 1) - 1) * per_page}
+    return _execute(connection, 'leaderboard', params, key=key).fetchall()
+
+
+def insert_answers(connection, answers):
+    """
+    Store answers, within a single transaction, in the partitions matching their creation time.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param answers: A series of mappings, each one having (at least) the keys in ANSWER_FIELDS.
+    :type answers: list
+    :return: The number of answers inserted.
+    :rtype: int
+    """
+    if not answers:
+        return 0
+
+    fields = ANSWER_FIELDS + ('date_created',)
+    params = [{field: answer.get(field) for field in fields} for answer in answers]
+    return partitions.insert_answers(connection, params)
+
+
+def get_progress(connection, user_id):
+    """
+    Fetch the progress of a user.
+
+    Prefer the progress cache (knowlift.progress) for lookups performed while serving requests.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param user_id: The primary key of the user.
+    :type user_id: int
+    :return: The progress of the user or None, if the user never answered a question.
+    :rtype: sqlalchemy.engine.result.RowProxy
+    """
+    return _execute(connection, 'progress_by_user', {'user_id': user_id}).first()
+
+
+def save_progress(connection, rows):
+    """
+    Insert or replace the progress of many users using a single executemany, within a single
+        transaction.
+
+    :param connection: A single DBAPI connection checked out from the connection pool.
+    :type connection: sqlalchemy.engine.base.Connection
+    :param rows: A series of mappings, each one having the keys in PROGRESS_FIELDS.
+    :type rows: list
+    :return: The number of rows saved.
+    :rtype: int
+    """
+    if not rows:
+        return 0
+
+    params = [{field: row[field] for field in PROGRESS_FIELDS} for row in rows]
+    with connection.begin():
+        _execute(connection, 'save_progress', params)
+    return len(rows)
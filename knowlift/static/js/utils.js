@@ -25,19 +25,21 @@ function processFormData(btn) {
   let sendData = playForm.elements['play-form__input'];
 
   playForm.style.visibility = 'hidden';
-  metaData = JSON.parse(metaData.replace(/'/g, '"'));
+  metaData = JSON.parse(metaData);
 
+  let answer;
   if (btn.name === 'roulette') {
     let leftGlyph = metaData['left_glyph'];
     let rightGlyph = metaData['right_glyph'];
     let upperBound = metaData['stop_internal'] - metaData['start_internal'];
-    metaData.answer = generateRandomNumber(upperBound, leftGlyph, rightGlyph);
+    answer = generateRandomNumber(upperBound, leftGlyph, rightGlyph);
   } else {
-    metaData.answer = Number(sendData.value);
+    answer = Number(sendData.value);
   }
 
+  // the signed token describes the question, hence it's all the server needs besides the answer
   sendData.name = 'data';
-  sendData.value = JSON.stringify(metaData);
+  sendData.value = JSON.stringify({token: metaData.token, answer: answer});
 }
 
 
@@ -0,0 +1,127 @@
+"""
+Keep compiled templates around, across processes and ahead of the first request.
+
+Functions:
+==========
+    init_templates: Configure the bytecode cache and, optionally, warm the templates up.
+    measure_first_request: Time the first request for some pages with cold, cached & warm templates.
+    warm_up: Load (i.e compile) every template of an application.
+
+Notes
+=====
+    * Compiling a template from source is the most expensive part of its first render. The bytecode
+        cache (TEMPLATE_BYTECODE_CACHE) persists the compiled templates on disk, hence only the
+        first worker after a template changes pays for compiling it, every other worker (including
+        the ones started after a deploy or while autoscaling) merely loads the bytecode.
+    * Warming up (TEMPLATE_WARM_UP) loads every template while the application is created, i.e
+        before the worker accepts any traffic, hence no request pays for loading templates.
+    * Cache entries are keyed by the template's name & checksummed against its source, hence
+        editing a template never yields stale bytecode.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import logging
+import os
+import time
+
+# Third-party
+import jinja2
+
+# Project specific
+from knowlift import page_cache
+
+logger = logging.getLogger(__name__)
+
+
+def init_templates(app):
+    """
+    Configure the bytecode cache of an application and warm its templates up, if enabled.
+
+    :param app: The application whose templates to configure.
+    :type app: flask.app.Flask
+    :return: None
+    :rtype: None
+    """
+    cache_directory = app.config['TEMPLATE_BYTECODE_CACHE']
+    if cache_directory:
+        os.makedirs(cache_directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache(cache_directory)
+
+    if app.config['TEMPLATE_WARM_UP']:
+        warm_up(app)
+
+
+def warm_up(app):
+    """
+    Load (i.e compile or fetch from the bytecode cache) every template of an application.
+
+    :param app: The application whose templates to load.
+    :type app: flask.app.Flask
+    :return: The number of templates loaded and the number of seconds it took.
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    template_names = app.jinja_env.list_templates(extensions=('html',))
+    for template_name in template_names:
+        app.jinja_env.get_template(template_name)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f'Warmed up {len(template_names)} templates in {elapsed * 1000:.1f}ms.')
+    return len(template_names), elapsed
+
+
+def _time_first_request(app, path):
+    client = app.test_client()
+    with app.app_context():
+        page_cache.clear()
+    start = time.perf_counter()
+    client.get(path).close()
+    return time.perf_counter() - start
+
+
+def measure_first_request(app, paths):
+    """
+    Time the first request for each page, as served by: a worker that has to compile the templates
+        (cold), a worker that loads them from the bytecode cache and a worker that warmed them up.
+
+    The application's templates are reloaded in the process, hence this is meant for the command
+        line, not for an application that is serving traffic.
+
+    :param app: The application to measure.
+    :type app: flask.app.Flask
+    :param paths: The URL paths of the pages to request, e.g ['/', '/legal'].
+    :type paths: list
+    :return: Rows of the form (path, cold seconds, bytecode cache seconds, warm seconds). The
+        bytecode cache timing is None if there's no bytecode cache.
+    :rtype: list
+    """
+    environment = app.jinja_env
+    bytecode_cache = environment.bytecode_cache
+    rows = []
+    try:
+        for path in paths:
+            environment.cache.clear()
+            environment.bytecode_cache = None
+            cold = _time_first_request(app, path)
+
+            environment.bytecode_cache = bytecode_cache
+            cached = None
+            if bytecode_cache is not None:
+                environment.cache.clear()
+                _time_first_request(app, path)  # make sure the bytecode is cached
+                environment.cache.clear()
+                cached = _time_first_request(app, path)
+
+            environment.cache.clear()
+            warm_up(app)
+            warm = _time_first_request(app, path)
+            rows.append((path, cold, cached, warm))
+    finally:
+        environment.bytecode_cache = bytecode_cache
+    return rows
@@ -0,0 +1,118 @@
+"""
+Issue and verify compact, signed tokens that describe a question (i.e a mathematical interval).
+
+A token carries everything needed to grade an answer: the game level, the bounds & glyphs of the
+    interval and the time it was issued, followed by an HMAC of all of the above. Verifying a token
+    takes a single MAC check, and since the MAC can't be computed without SECRET_KEY, questions
+    can't be forged, e.g by sending in intervals whose size matches a made up answer.
+
+Functions:
+==========
+    issue: Issue a signed token for a question.
+    verify: Verify a token and get the question it describes.
+
+Classes:
+========
+    InvalidTokenError: Raised when a token is malformed, tampered with or expired.
+    Question: The question described by a token.
+
+Notes
+=====
+    * Tokens look like: 3.-512.998.co.1571490000.<MAC>, i.e level.start.stop.glyphs.issued.MAC
+        where the glyphs are c (closed, i.e [ or ]) or o (open, i.e ( or )) for each bound.
+    * Tokens are URL safe, hence they can be sent in form fields, JSON bodies or query strings.
+    * Rotating SECRET_KEY invalidates every outstanding token.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import base64
+import collections
+import hashlib
+import hmac
+import time
+
+_PURPOSE = b'knowlift.question'
+_MAC_SIZE = 16
+_LEFT_GLYPHS = {'[': 'c', '(': 'o'}
+_RIGHT_GLYPHS = {']': 'c', ')': 'o'}
+_LEFT_CODES = {code: glyph for glyph, code in _LEFT_GLYPHS.items()}
+_RIGHT_CODES = {code: glyph for glyph, code in _RIGHT_GLYPHS.items()}
+
+Question = collections.namedtuple(
+    'Question', ('game_level', 'left_glyph', 'right_glyph', 'start', 'stop', 'issued')
+)
+
+
+class InvalidTokenError(ValueError):
+    """Raised when a token is malformed, has been tampered with or has expired."""
+
+
+def _sign(payload, secret_key):
+    key = secret_key.encode('utf-8') if isinstance(secret_key, str) else secret_key
+    digest = hmac.new(key, _PURPOSE + b':' + payload.encode('ascii'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:_MAC_SIZE]).rstrip(b'=').decode('ascii')
+
+
+def issue(data, secret_key, now=None):
+    """
+    Issue a signed token for a question.
+
+    :param data: The question, as built by number_distance.generate_interval.
+    :type data: dict
+    :param secret_key: The key the token is signed with, i.e SECRET_KEY.
+    :type secret_key: str
+    :param now: The time of issue as a UNIX timestamp, defaults to the current time.
+    :type now: int
+    :return: The token.
+    :rtype: str
+    """
+    issued = int(time.time() if now is None else now)
+    glyphs = _LEFT_GLYPHS[data['left_glyph']] + _RIGHT_GLYPHS[data['right_glyph']]
+    payload = (
+        f'{data["game_level"]}.{data["start_internal"]}.{data["stop_internal"]}.{glyphs}.{issued}'
+    )
+    return f'{payload}.{_sign(payload, secret_key)}'
+
+
+def verify(token, secret_key, max_age=None, now=None):
+    """
+    Verify a token and get the question it describes.
+
+    :param token: The token, as returned by issue.
+    :type token: str
+    :param secret_key: The key the token was signed with, i.e SECRET_KEY.
+    :type secret_key: str
+    :param max_age: The number of seconds a token is valid for, None if tokens never expire.
+    :type max_age: int
+    :param now: The current time as a UNIX timestamp, defaults to the current time.
+    :type now: int
+    :return: The question.
+    :rtype: Question
+    :raise InvalidTokenError: If the token is malformed, has been tampered with or has expired.
+    """
+    if not isinstance(token, str):
+        raise InvalidTokenError(f'Expected a token, got: {token!r}')
+
+    payload, _, mac = token.rpartition('.')
+    if not payload or not token.isascii():
+        raise InvalidTokenError(f'Malformed token: {token!r}')
+    elif not hmac.compare_digest(mac, _sign(payload, secret_key)):
+        raise InvalidTokenError(f'Bad signature: {token}')
+
+    # The payload has been issued by us, hence its format doesn't need to be checked field by field.
+    game_level, start, stop, glyphs, issued = payload.split('.')
+    question = Question(
+        int(game_level), _LEFT_CODES[glyphs[0]], _RIGHT_CODES[glyphs[1]], int(start), int(stop),
+        int(issued),
+    )
+
+    now = time.time() if now is None else now
+    if max_age is not None and now - question.issued > max_age:
+        raise InvalidTokenError(f'Token issued at {question.issued} has expired.')
+    return question
@@ -6,12 +6,33 @@ Functions:
     index: Get the homepage.
     internal_server_error: Get the custom internal server error page.
     about: Get the about page.
+    api_play: Return a mathematical interval, as JSON, based on a particular difficulty level.
+    api_answer: Grade an answer, as compact JSON, based on the user's input.
+    api_result: Return a result, as JSON, based on the user's input.
+    api_result_batch: Grade a whole answer sheet, as JSON, and store its answers.
+    export_metrics: Get the application's metrics, in the Prometheus text format.
     grade: Get the grade page (this page contains all the difficulty levels).
     ladder: Get the ladder page.
     legal: Get the legal page (this page comprises legal information e.g GDPR, terms of use, etc).
     page_not_found: Get the custom not found page.
     play: Return a mathematical interval based on a particular difficulty level.
+    play_stream: Stream mathematical intervals of a difficulty level, as Server-Sent Events.
     result: Return a result based on the user's input.
+    too_many_requests: Get the response for requests that went over their rate limit.
+
+Notes:
+======
+    The API views (and the HTML views, whenever the client prefers application/json over
+        text/html) exchange compact JSON and never touch the template engine. Invalid input yields a
+        400 response of the form {"error": <description>}.
+
+    The answers graded by result, api_result, api_answer & api_result_batch (in the order of the
+        sheet) update the progress of the signed in user, if any (i.e flask.session['user_id']),
+        through the progress cache (see knowlift.progress).
+
+CONSTANTS:
+==========
+    CACHED_PAGES: The templates of the pages served from the page cache.
 
 Global variables
 ================
@@ -25,41 +46,57 @@ Miscellaneous objects:
 """
 
 # Standard library
-import logging
+import collections
 import json
+import logging
+import time
 
 # Third-party
 import flask
 
 # Project specific
+from knowlift import db
+from knowlift import metrics
 from knowlift import number_distance
+from knowlift import page_cache
+from knowlift import progress
+from knowlift import repository
+from knowlift import tokens
 
 logger = logging.getLogger(__name__)
 
+CACHED_PAGES = ('index.html', 'about.html', 'grade.html', 'ladder.html', 'legal.html')
+
 
 def index():
-    return flask.render_template('index.html')
+    return page_cache.render('index.html')
 
 
 def about():
-    return flask.render_template('about.html')
+    return page_cache.render('about.html')
 
 
 def grade():
-    return flask.render_template('grade.html')
+    return page_cache.render('grade.html')
 
 
 def ladder():
-    return flask.render_template('ladder.html')
+    return page_cache.render('ladder.html')
 
 
 def legal():
-    return flask.render_template('legal.html')
+    return page_cache.render('legal.html')
+
+
+def export_metrics():
+    return flask.Response(
+        metrics.render(range(len(number_distance.GAME_LEVELS))), content_type=metrics.CONTENT_TYPE
+    )
 
 
 def page_not_found(e):
-    e.description = f'The following URL: {flask.request.url} was not found on the server.'
-    logger.error(e)
+    # Scanners hit many missing pages, keep the line short so that repeats aggregate well.
+    logger.error('404 %s', flask.request.path)
     return flask.render_template('404.html'), 404
 
 
@@ -68,16 +105,144 @@ def internal_server_error(e):
     return flask.render_template('500.html'), 500
 
 
+def too_many_requests(e):
+    if flask.request.endpoint.startswith('api_') or _wants_json():
+        response = flask.jsonify(error=e.description)
+        response.status_code = e.code
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return e.get_response()
+
+
+def _wants_json():
+    accept = flask.request.accept_mimetypes
+    return accept.best_match(('text/html', 'application/json')) == 'application/json'
+
+
+def _json_error(description, status=400):
+    logger.error(description)
+    return flask.jsonify(error=description), status
+
+
+def _issue_question(game_level, secret_key):
+    data = number_distance.generate_interval(game_level)
+    if data:
+        metrics.inc('knowlift_questions_total', (('game_level', str(data['game_level'])),))
+        data['token'] = tokens.issue(data, secret_key)
+    return data
+
+
+def _play_data():
+    if flask.request.is_json:
+        payload = flask.request.get_json(silent=True)
+        level = payload.get('level') if isinstance(payload, dict) else None
+    else:
+        level = flask.request.form.get('level')
+
+    game_level = number_distance.fetch_game_level(str(level))
+    return level, _issue_question(game_level, flask.current_app.config['SECRET_KEY'])
+
+
+def _parse_answer(answer):
+    if isinstance(answer, bool) or not isinstance(answer, (int, str)):
+        return None
+    try:
+        return int(answer)
+    except ValueError:
+        return None
+
+
+def _verify_answer(data):
+    if not isinstance(data, dict):
+        return None
+
+    answer = _parse_answer(data.get('answer'))
+    if answer is None:
+        logger.error(f'Invalid answer: {data.get("answer")!r}')
+        return None
+
+    config = flask.current_app.config
+    try:
+        question = tokens.verify(
+            data.get('token'), config['SECRET_KEY'], config['QUESTION_TOKEN_MAX_AGE']
+        )
+    except tokens.InvalidTokenError as ex:
+        logger.error(ex)
+        return None
+    return question, answer
+
+
+def _count_outcome(game_level, outcome, count=1):
+    metrics.inc(
+        'knowlift_answers_total',
+        (('game_level', str(game_level)), ('outcome', 'correct' if outcome else 'incorrect')),
+        count,
+    )
+
+
+def _grade(question, answer):
+    result_data = number_distance.build_result(
+        question.left_glyph, question.right_glyph, question.start, question.stop,
+        question.game_level, answer,
+    )
+    _count_outcome(question.game_level, result_data['outcome'])
+
+    user_id = flask.session.get('user_id')
+    if user_id is not None:
+        progress.record_answer(user_id, question.game_level, result_data['outcome'])
+    return result_data
+
+
+def _result_data():
+    if flask.request.is_json:
+        raw_data = flask.request.get_data(as_text=True)
+        data = flask.request.get_json(silent=True)
+    else:
+        raw_data = flask.request.form.get('data')
+        try:
+            data = json.loads(raw_data) if raw_data else {}
+        except ValueError:
+            data = None
+
+    verified = _verify_answer(data)
+    if verified is None:
+        return raw_data, None
+    return raw_data, _grade(*verified)
+
+
+def _number_arg(name, default, number_type):
+    value = flask.request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return number_type(value)
+    except ValueError:
+        return None
+
+
+def _question_events(game_level, first, count, interval, secret_key):
+    yield 'retry: 3000\n\n'
+    for index in range(first, count):
+        if index > first and interval:
+            time.sleep(interval)
+        data = json.dumps(_issue_question(game_level, secret_key), separators=(',', ':'))
+        yield f'id: {index}\nevent: question\ndata: {data}\n\n'
+    yield 'event: end\ndata: {}\n\n'
+
+
 def play():
     """
     Build a mathematical interval from a difficulty level. The difficulty level is represented by an
         integer which in turn is mapped to a tuple that contains the interval's limits.
 
-    :return: A template containing either the interval in the form of a question or a custom error.
+    :return: A template containing either the interval in the form of a question or a custom error,
+        or the same content as api_play if the client prefers JSON.
     :rtype: str
     """
-    level = flask.request.form.get('level')
-    data = number_distance.play(level)
+    if _wants_json():
+        return api_play()
+
+    level, data = _play_data()
     if not data:
         flask.abort(status=500, description=f'Unable to use: {level} as a game level.')
     else:
@@ -86,24 +251,186 @@ def play():
 
 def result():
     """
-    Produce a result based on the user's input. Besides the user's answer, the input contains
-        meta-data about the mathematical interval as well as the current game level. This is used
-        both for validation purposes as well as for building further questions based on the same
-        degree of difficulty.
+    Produce a result based on the user's input. Besides the user's answer, the input contains the
+        signed token of the question (see knowlift.tokens), which describes the mathematical
+        interval as well as the current game level. This is used both for grading the answer as
+        well as for building further questions based on the same degree of difficulty.
 
-    :return: A template containing either the appropriate result_data page or a custom error.
+    :return: A template containing either the appropriate result_data page or a custom error, or
+        the same content as api_result if the client prefers JSON.
     :rtype: str
     """
-    raw_data = flask.request.form.get('data')
-    if not raw_data:
-        data = {}
-    else:
-        data = json.loads(raw_data)
+    if _wants_json():
+        return api_result()
 
-    result_data = number_distance.generate_result(data)
+    raw_data, result_data = _result_data()
     if not result_data:
         flask.abort(status=500, description=f'Unable to generate results from {raw_data}.')
     elif result_data['outcome']:
         return flask.render_template('result_correct.html', data=result_data)
     else:
         return flask.render_template('result_incorrect.html', data=result_data)
+
+
+def api_play():
+    """
+    Build a mathematical interval from a difficulty level, without rendering any template.
+
+    The level is read from a JSON body of the form {"level": 0} or from the "level" form field.
+
+    :return: The metadata of the interval, including the signed token expected back by api_result,
+        or an error.
+    :rtype: flask.Response
+    """
+    level, data = _play_data()
+    if not data:
+        return _json_error(f'Unable to use: {level} as a game level.')
+    return flask.jsonify(data)
+
+
+def api_result():
+    """
+    Produce a result based on the user's input, without rendering any template.
+
+    The input is the token returned by api_play (under "token") plus the user's answer (under
+        "answer"), sent either as a JSON body or JSON encoded within the "data" form field.
+
+    :return: The interval, the user's answer, the expected answer and the outcome, or an error.
+    :rtype: flask.Response
+    """
+    raw_data, result_data = _result_data()
+    if not result_data:
+        return _json_error(f'Unable to generate results from {raw_data}.')
+    return flask.jsonify(result_data)
+
+
+def play_stream():
+    """
+    Stream the questions of a drill, i.e mathematical intervals of the same difficulty level, over
+        a single long-lived response, as Server-Sent Events.
+
+    The query string holds the level, the number of questions (count, DRILL_QUESTIONS by default)
+        and the number of seconds between two questions (interval, 0 by default). Each question is
+        sent as a question event whose data is the same as the one returned by api_play, the end of
+        the drill is marked by an end event. Answers are graded by api_answer.
+
+    A client reconnecting with a Last-Event-ID header resumes the drill after that question. Note
+        that a paced drill (interval > 0) holds on to a worker for its whole duration.
+
+    :return: The event stream, or an error.
+    :rtype: flask.Response
+    """
+    config = flask.current_app.config
+    level = flask.request.args.get('level')
+    count = _number_arg('count', config['DRILL_QUESTIONS'], int)
+    interval = _number_arg('interval', 0, float)
+    last_event_id = flask.request.headers.get('Last-Event-ID', -1, type=int)
+
+    game_level = number_distance.fetch_game_level(str(level))
+    if game_level is None:
+        return _json_error(f'Unable to use: {level} as a game level.')
+    elif count is None or not 0 < count <= config['DRILL_MAX_QUESTIONS']:
+        return _json_error(f'The count must range from 1 to {config["DRILL_MAX_QUESTIONS"]}.')
+    elif interval is None or not 0 <= interval <= config['DRILL_MAX_INTERVAL']:
+        return _json_error(f'The interval must range from 0 to {config["DRILL_MAX_INTERVAL"]}.')
+
+    events = _question_events(
+        game_level, max(last_event_id + 1, 0), count, interval, config['SECRET_KEY']
+    )
+    return flask.Response(
+        events, mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def api_answer():
+    """
+    Grade an answer to a question issued by api_play or play_stream, without building the result.
+
+    The input is a JSON body of the form {"token": <question token>, "answer": <user's answer>}.
+
+    :return: The outcome and the expected answer, or an error.
+    :rtype: flask.Response
+    """
+    verified = _verify_answer(flask.request.get_json(silent=True))
+    if verified is None:
+        return _json_error(f'Unable to grade {flask.request.get_data(as_text=True)}.')
+
+    question, answer = verified
+    expected = number_distance.count_integers(
+        question.left_glyph, question.right_glyph, question.start, question.stop
+    )
+    _count_outcome(question.game_level, expected == answer)
+
+    user_id = flask.session.get('user_id')
+    if user_id is not None:
+        progress.record_answer(user_id, question.game_level, expected == answer)
+    return flask.jsonify(outcome=expected == answer, cpu_internal=expected)
+
+
+def api_result_batch():
+    """
+    Grade a whole answer sheet at once, e.g the answers to an exam, and store its answers.
+
+    The input is a JSON array of the form [{"token": <question token>, "answer": <user's answer>}]
+        holding at most BATCH_MAX_ANSWERS answers, each to a different question. A single invalid
+        answer fails the whole sheet, nothing is stored in that case.
+
+    :return: The outcome & the expected answer of each answer (in the order they were sent) plus
+        the statistics of the whole sheet, or an error.
+    :rtype: flask.Response
+    """
+    sheet = flask.request.get_json(silent=True)
+    max_answers = flask.current_app.config['BATCH_MAX_ANSWERS']
+    if not isinstance(sheet, list) or not 0 < len(sheet) <= max_answers:
+        return _json_error(f'Expected a JSON array of 1 to {max_answers} answers.')
+
+    verified = [_verify_answer(item) for item in sheet]
+    for index, item in enumerate(verified):
+        if item is None:
+            return _json_error(f'Unable to grade answer {index}: {sheet[index]!r}.')
+    if len({item['token'] for item in sheet}) < len(sheet):
+        return _json_error('Each question can only be answered once.')
+
+    user_id = flask.session.get('user_id')
+    rows = [
+        {
+            'user_id': user_id,
+            'game_level': question.game_level,
+            'left_glyph': question.left_glyph,
+            'right_glyph': question.right_glyph,
+            'start': question.start,
+            'stop': question.stop,
+            'answer': answer,
+            'cpu_internal': number_distance.count_integers(
+                question.left_glyph, question.right_glyph, question.start, question.stop
+            ),
+        }
+        for question, answer in verified
+    ]
+    for row in rows:
+        row['outcome'] = row['cpu_internal'] == row['answer']
+    repository.insert_answers(db.get_connection(), rows)
+
+    outcomes = collections.Counter((row['game_level'], row['outcome']) for row in rows)
+    for (game_level, outcome), count in outcomes.items():
+        _count_outcome(game_level, outcome, count)
+
+    if user_id is not None:
+        for row in rows:
+            progress.record_answer(user_id, row['game_level'], row['outcome'])
+
+    correct = sum(row['outcome'] for row in rows)
+    correct_percentage, incorrect_percentage = number_distance.calculate_statistics(
+        correct, len(rows) - correct
+    )
+    return flask.jsonify(
+        results=[
+            {key: row[key] for key in ('game_level', 'answer', 'cpu_internal', 'outcome')}
+            for row in rows
+        ],
+        correct=correct,
+        incorrect=len(rows) - correct,
+        correct_percentage=correct_percentage,
+        incorrect_percentage=incorrect_percentage,
+    )
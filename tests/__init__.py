@@ -8,9 +8,29 @@ CONSTANTS:
 Modules:
 ========
     factories: Implement model factories.
+    test_assets: Test knowlift.assets functionality.
+    test_auth: Test knowlift.auth functionality.
+    test_bulk_import: Test knowlift.bulk_import functionality.
+    test_cli: Test knowlift.cli functionality.
+    test_compression: Test knowlift.compression functionality.
+    test_countries: Test knowlift.countries functionality.
+    test_db: Test knowlift.db functionality.
     test_lexicon: Test knowlift.lexicon functionality.
+    test_log_aggregation: Test knowlift.log_aggregation functionality.
+    test_log_queue: Test knowlift.log_queue functionality.
+    test_metrics: Test knowlift.metrics functionality.
+    test_migrations: Test knowlift.migrations functionality.
     test_models: Test knowlift.models functionality.
     test_number_distance: Test knowlift.number_distance functionality.
+    test_page_cache: Test knowlift.page_cache functionality.
+    test_partitions: Test knowlift.partitions functionality.
+    test_profiling: Test knowlift.profiling functionality.
+    test_progress: Test knowlift.progress functionality.
+    test_rate_limit: Test knowlift.rate_limit functionality.
+    test_repository: Test knowlift.repository functionality.
+    test_startup: Test how long importing knowlift and creating an application take.
+    test_templating: Test knowlift.templating functionality.
+    test_tokens: Test knowlift.tokens functionality.
     test_web: Test bin.webapp functionality.
 
 Miscellaneous objects:
@@ -28,6 +28,7 @@ from sqlalchemy import exc
 
 # Project specific
 from knowlift import models
+from knowlift import repository
 
 logger = logging.getLogger(__name__)
 
@@ -49,8 +50,7 @@ def create_user(connection, **kwargs):
         country = create_country(connection, **kwargs)
     except exc.IntegrityError as ex:
         logger.debug(f'Duplicate entry for country "{ex.params[0]}". Fetching the existing one.')
-        select_country = models.country.select(models.country.c.english_short_name == ex.params[0])
-        country = connection.execute(select_country).fetchone()
+        country = repository.get_country_by_name(connection, ex.params[0])
 
     current_user = next(infinite_sequence)
     user_values = {
@@ -0,0 +1,196 @@
+"""
+Test knowlift.assets functionality.
+
+Classes:
+========
+    BuildTests: Test writing content hashed, precompressed copies of static assets.
+    ServeTests: Test resolving and serving content hashed static assets.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# Third party
+import flask
+
+# Project specific
+from knowlift import assets
+
+
+def create_static_folder():
+    """Create a temporary static folder holding a few assets."""
+    static_folder = tempfile.mkdtemp()
+    files = {
+        'css/style.css': b'body { margin: 0; }\n' * 100,
+        'css/style.css.map': b'{"version": 3}',
+        'images/logo.jpg': b'\xff\xd8\xff\xe0' + bytes(range(256)),
+    }
+    for relative_path, content in files.items():
+        path = os.path.join(static_folder, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as asset:
+            asset.write(content)
+    return static_folder
+
+
+class BuildTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_build()
+        test_build_is_repeatable()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.static_folder = create_static_folder()
+        self.build_folder = os.path.join(self.static_folder, assets.BUILD_FOLDER)
+
+    def test_build(self):
+        manifest = assets.build(self.static_folder)
+        self.assertEqual(
+            sorted(manifest), ['css/style.css', 'css/style.css.map', 'images/logo.jpg']
+        )
+        self.assertRegex(manifest['css/style.css'], r'^dist/css/style\.[0-9a-f]{12}\.css$')
+        self.assertEqual(manifest['css/style.css.map'], 'dist/css/style.css.map')
+
+        with open(os.path.join(self.build_folder, 'manifest.json')) as manifest_file:
+            self.assertEqual(json.load(manifest_file), manifest)
+
+        style = os.path.join(self.static_folder, manifest['css/style.css'])
+        with open(f'{style}.gz', 'rb') as compressed, open(style, 'rb') as original:
+            self.assertEqual(gzip.decompress(compressed.read()), original.read())
+        logo = os.path.join(self.static_folder, manifest['images/logo.jpg'])
+        self.assertTrue(os.path.isfile(logo))
+        self.assertFalse(os.path.exists(f'{logo}.gz'))
+
+    def test_build_is_repeatable(self):
+        first = assets.build(self.static_folder)
+        with open(os.path.join(self.static_folder, 'css', 'style.css'), 'ab') as style:
+            style.write(b'p { color: red; }\n')
+        second = assets.build(self.static_folder)
+
+        self.assertEqual(first['images/logo.jpg'], second['images/logo.jpg'])
+        self.assertNotEqual(first['css/style.css'], second['css/style.css'])
+        self.assertFalse(os.path.exists(os.path.join(self.static_folder, first['css/style.css'])))
+        self.assertFalse(os.path.exists(os.path.join(self.build_folder, assets.BUILD_FOLDER)))
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        shutil.rmtree(self.static_folder)
+        super().tearDown()
+
+
+class ServeTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_url_for_resolves_through_manifest()
+        test_serve_precompressed()
+        test_serve_uncompressed()
+        test_serve_original()
+        test_serve_source_map()
+        test_missing_manifest()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.static_folder = create_static_folder()
+        self.manifest = assets.build(self.static_folder)
+        self.app = flask.Flask(
+            __name__, static_folder=self.static_folder, static_url_path='/static'
+        )
+        self.app.config['ASSET_MANIFEST'] = os.path.join(
+            self.static_folder, assets.BUILD_FOLDER, 'manifest.json'
+        )
+        assets.load_manifest(self.app)
+        self.app.url_defaults(assets.fingerprint_url)
+        self.app.view_functions['static'] = assets.send_static_file
+        self.client = self.app.test_client()
+
+    def test_url_for_resolves_through_manifest(self):
+        with self.app.test_request_context():
+            self.assertEqual(
+                flask.url_for('static', filename='css/style.css'),
+                f'/static/{self.manifest["css/style.css"]}',
+            )
+            self.assertEqual(
+                flask.url_for('static', filename='css/unknown.css'), '/static/css/unknown.css'
+            )
+
+    def test_serve_precompressed(self):
+        url = f'/static/{self.manifest["css/style.css"]}'
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/css')
+        self.assertEqual(response.headers['Cache-Control'], assets.CACHE_CONTROL)
+        self.assertEqual(gzip.decompress(response.data), b'body { margin: 0; }\n' * 100)
+        response.close()
+
+    def test_serve_uncompressed(self):
+        for filename in ('css/style.css', 'images/logo.jpg'):
+            url = f'/static/{self.manifest[filename]}'
+            response = self.client.get(url, headers={'Accept-Encoding': 'br'})
+            self.assertNotIn('Content-Encoding', response.headers)
+            self.assertEqual(response.headers['Cache-Control'], assets.CACHE_CONTROL)
+            with open(os.path.join(self.static_folder, filename), 'rb') as original:
+                self.assertEqual(response.data, original.read())
+            response.close()
+
+    def test_serve_original(self):
+        response = self.client.get('/static/css/style.css', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+        self.assertEqual(self.client.get('/static/dist/../../etc/passwd').status_code, 404)
+
+    def test_serve_source_map(self):
+        source_map = self.manifest['css/style.css.map']
+        self.assertNotIn(source_map, self.app.config['STATIC_FINGERPRINTED'])
+        response = self.client.get(f'/static/{source_map}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'{"version": 3}')
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+
+    def test_missing_manifest(self):
+        self.app.config['ASSET_MANIFEST'] = os.path.join(self.static_folder, 'missing.json')
+        assets.load_manifest(self.app)
+        with self.app.test_request_context():
+            self.assertEqual(
+                flask.url_for('static', filename='css/style.css'), '/static/css/style.css'
+            )
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        shutil.rmtree(self.static_folder)
+        super().tearDown()
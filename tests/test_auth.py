@@ -0,0 +1,175 @@
+"""
+Test knowlift.auth functionality.
+
+Classes:
+========
+    PasswordHashingTests: Test hashing and verifying passwords on the hashing pool.
+    AuthenticateTests: Test checking credentials and upgrading outdated hashes on login.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import threading
+import unittest
+
+from unittest import mock
+
+# Project specific
+import tests
+
+from knowlift import auth
+from knowlift import db
+from knowlift import models
+from knowlift import repository
+from tests import factories
+
+
+class PasswordHashingTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_hash_and_verify_password()
+        test_hash_and_verify_with_every_algorithm()
+        test_hash_passwords()
+        test_verify_malformed_hash()
+        test_needs_rehash()
+        test_pool_busy()
+        test_pool_timeout()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.app_context = tests.TEST_APPLICATION.app_context()
+        self.app_context.push()
+
+    def test_hash_and_verify_password(self):
+        encoded = auth.hash_password('Yggdrasil')
+        self.assertTrue(encoded.startswith('scrypt$256$8$1$'))
+        self.assertNotEqual(encoded, auth.hash_password('Yggdrasil'))
+        self.assertTrue(auth.verify_password('Yggdrasil', encoded))
+        self.assertFalse(auth.verify_password('yggdrasil', encoded))
+
+    def test_hash_and_verify_with_every_algorithm(self):
+        for algorithm in auth.ALGORITHMS:
+            with mock.patch.dict(tests.TEST_APPLICATION.config, PASSWORD_HASHER=algorithm):
+                encoded = auth.hash_password('Yggdrasil')
+                self.assertTrue(encoded.startswith(f'{algorithm}$'))
+                self.assertTrue(auth.verify_password('Yggdrasil', encoded))
+
+    def test_hash_passwords(self):
+        hashes = auth.hash_passwords(['first', 'second'])
+        self.assertTrue(auth.verify_password('first', hashes[0]))
+        self.assertTrue(auth.verify_password('second', hashes[1]))
+        self.assertEqual(auth.hash_passwords([]), [])
+
+    def test_verify_malformed_hash(self):
+        malformed = (
+            'plain text', 'md5$1$c2FsdA==$ZGlnZXN0', 'scrypt$n$r$p$$',
+            'scrypt$16384$8$c2FsdA==$ZGlnZXN0', 'pbkdf2_sha256$c2FsdA==$ZGlnZXN0',
+        )
+        for encoded in malformed:
+            self.assertFalse(auth.verify_password('plain text', encoded), encoded)
+
+    def test_needs_rehash(self):
+        encoded = auth.hash_password('Yggdrasil')
+        self.assertFalse(auth.needs_rehash(encoded))
+        self.assertTrue(auth.needs_rehash('plain text'))
+        with mock.patch.dict(tests.TEST_APPLICATION.config, PASSWORD_SCRYPT_N=2**9):
+            self.assertTrue(auth.needs_rehash(encoded))
+
+    def test_pool_busy(self):
+        auth.hash_password('warm up')
+        semaphore = threading.BoundedSemaphore(1)
+        semaphore.acquire()
+        with mock.patch.object(auth, '_pool_semaphore', semaphore):
+            self.assertRaises(auth.PoolBusyError, auth.hash_password, 'Yggdrasil')
+
+    def test_pool_timeout(self):
+        config = {'PASSWORD_SCRYPT_N': 2**16, 'PASSWORD_POOL_TIMEOUT': 0}
+        with mock.patch.dict(tests.TEST_APPLICATION.config, config):
+            self.assertRaises(auth.PoolTimeoutError, auth.hash_password, 'Yggdrasil')
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.app_context.pop()
+        super().tearDown()
+
+    @classmethod
+    def tearDownClass(cls):
+        auth.shutdown_pool()
+        super().tearDownClass()
+
+
+class AuthenticateTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_authenticate()
+        test_authenticate_wrong_credentials()
+        test_authenticate_upgrades_outdated_hash()
+        test_methods_in_docstring()
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
+
+    def setUp(self):
+        super().setUp()
+        self.app_context = tests.TEST_APPLICATION.app_context()
+        self.app_context.push()
+        self.connection = self.engine.connect()
+        self.user = factories.create_user(self.connection, password=auth.hash_password('Ygg'))
+
+    def test_authenticate(self):
+        user = auth.authenticate(self.connection, self.user.username, 'Ygg')
+        self.assertEqual(user.id, self.user.id)
+        self.assertIsNotNone(user.last_login)
+        self.assertEqual(user.password, self.user.password)
+
+    def test_authenticate_wrong_credentials(self):
+        self.assertIsNone(auth.authenticate(self.connection, self.user.username, 'ygg'))
+        self.assertIsNone(auth.authenticate(self.connection, 'nobody', 'Ygg'))
+
+    def test_authenticate_upgrades_outdated_hash(self):
+        with mock.patch.dict(tests.TEST_APPLICATION.config, PASSWORD_HASHER='pbkdf2_sha256'):
+            user = auth.authenticate(self.connection, self.user.username, 'Ygg')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(
+            repository.get_user_by_id(self.connection, user.id).password, user.password
+        )
+        self.assertIsNotNone(auth.authenticate(self.connection, self.user.username, 'Ygg'))
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.connection.execute(models.user.delete())
+        self.connection.execute(models.country.delete())
+        self.connection.close()
+        self.app_context.pop()
+        super().tearDown()
+
+    @classmethod
+    def tearDownClass(cls):
+        auth.shutdown_pool()
+        super().tearDownClass()
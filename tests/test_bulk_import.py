@@ -0,0 +1,171 @@
+"""
+Test knowlift.bulk_import functionality.
+
+Classes:
+========
+    ReadRowsTests: Test streaming rows out of CSV and JSON-lines sources.
+    ImportUsersTests: Test validating and inserting users in chunks.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import io
+import json
+import unittest
+
+# Third party
+import sqlalchemy
+
+# Project specific
+import tests
+
+from knowlift import auth
+from knowlift import bulk_import
+from knowlift import countries
+from knowlift import db
+from knowlift import models
+from knowlift import repository
+from tests import factories
+
+
+class ReadRowsTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_read_csv()
+        test_read_jsonl()
+        test_read_unknown_format()
+        test_methods_in_docstring()
+    """
+
+    def test_read_csv(self):
+        source = io.StringIO('username,email\nada,ada@knowlift.com\nbob,bob@knowlift.com\n')
+        rows = list(bulk_import.read_rows(source, 'csv'))
+        self.assertEqual([line_number for line_number, _ in rows], [2, 3])
+        self.assertEqual(rows[0][1]['email'], 'ada@knowlift.com')
+
+    def test_read_jsonl(self):
+        source = io.StringIO('{"username": "ada"}\n\nnot json\n[1, 2]\n')
+        rows = list(bulk_import.read_rows(source, 'jsonl'))
+        self.assertEqual(rows, [(1, {'username': 'ada'}), (3, None), (4, None)])
+
+    def test_read_unknown_format(self):
+        self.assertRaises(ValueError, list, bulk_import.read_rows(io.StringIO(''), 'xml'))
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+
+class ImportUsersTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_import_in_chunks()
+        test_reject_invalid_rows()
+        test_reject_non_string_values()
+        test_reject_duplicates()
+        test_methods_in_docstring()
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
+
+    def setUp(self):
+        super().setUp()
+        self.app_context = tests.TEST_APPLICATION.app_context()
+        self.app_context.push()
+        self.connection = self.engine.connect()
+        self.user = factories.create_user(self.connection)
+        self.country_cache = countries.load_cache(self.connection)
+
+    def build_rows(self, count, start=0):
+        return [
+            (line_number, {
+                'username': f'student{line_number}',
+                'email': f'student{line_number}@knowlift.com',
+                'password': 'secret',
+                'country': 'RO',
+            })
+            for line_number in range(start, start + count)
+        ]
+
+    def count_users(self):
+        select_query = sqlalchemy.select([sqlalchemy.func.count()]).select_from(models.user)
+        return self.connection.execute(select_query).scalar()
+
+    def test_import_in_chunks(self):
+        report = bulk_import.import_users(
+            self.connection, self.build_rows(25), self.country_cache, chunk_size=10
+        )
+        self.assertEqual(report.imported, 25)
+        self.assertEqual(report.rejected, [])
+        self.assertGreater(report.rows_per_second, 0)
+        self.assertEqual(self.count_users(), 26)
+
+        student = repository.get_user_by_username(self.connection, 'student0')
+        self.assertTrue(auth.verify_password('secret', student.password))
+
+    def test_reject_invalid_rows(self):
+        rows = self.build_rows(3)
+        rows[0][1]['country'] = 'Atlantis'
+        rows[1][1]['password'] = ''
+        rows.append((3, None))
+        report = bulk_import.import_users(self.connection, rows, self.country_cache)
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(
+            report.rejected,
+            [(0, 'unknown country Atlantis'), (1, 'missing password'), (3, 'malformed row')],
+        )
+
+    def test_reject_non_string_values(self):
+        lines = [
+            {'username': 123, 'email': 'ada@knowlift.com', 'password': 'secret'},
+            {'username': 'ada', 'email': 'ada@knowlift.com', 'password': None},
+            {'username': 'bob', 'email': 'bob@knowlift.com', 'password': 42},
+            {'username': 'eve', 'email': 'eve@knowlift.com', 'password': 'secret'},
+        ]
+        source = io.StringIO(''.join(json.dumps(dict(line, country='RO')) + '\n' for line in lines))
+        rows = bulk_import.read_rows(source, 'jsonl')
+        report = bulk_import.import_users(self.connection, rows, self.country_cache)
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(
+            report.rejected,
+            [(1, 'invalid username'), (2, 'missing password'), (3, 'invalid password')],
+        )
+        self.assertIsNotNone(repository.get_user_by_username(self.connection, 'eve'))
+
+    def test_reject_duplicates(self):
+        rows = self.build_rows(3)
+        rows[0][1]['username'] = self.user.username
+        rows[2][1]['email'] = rows[1][1]['email'].upper()
+        report = bulk_import.import_users(self.connection, rows, self.country_cache)
+        self.assertEqual(report.imported, 1)
+        self.assertEqual([line_number for line_number, _ in report.rejected], [0, 2])
+        self.assertEqual(self.count_users(), 2)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.connection.execute(models.user.delete())
+        self.connection.execute(models.country.delete())
+        self.connection.close()
+        self.app_context.pop()
+        super().tearDown()
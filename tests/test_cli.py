@@ -0,0 +1,165 @@
+"""
+Test knowlift.cli functionality.
+
+Classes:
+========
+    CommandTests: Test the maintenance commands, as invoked through the flask command.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+# Project specific
+import knowlift
+
+from knowlift import assets
+from knowlift import cli
+from knowlift import db
+from knowlift import iso3166
+from knowlift import models
+from knowlift import partitions
+from knowlift import repository
+
+
+class CommandTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_seed_countries()
+        test_import_users()
+        test_import_missing_file()
+        test_rollup_answers()
+        test_build_assets()
+        test_measure_templates()
+        test_top_profiles()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.app = knowlift.create_app()  # its own caches, e.g the country cache
+        self.runner = self.app.test_cli_runner()
+        self.connection = db.get_engine(self.app).connect()
+
+    def invoke(self, group, *args):
+        return self.runner.invoke(group, args, catch_exceptions=False)
+
+    def test_seed_countries(self):
+        total = len(iso3166.COUNTRIES)
+        result = self.invoke(cli.countries_cli, 'seed')
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output, f'Inserted {total} countries, skipped 0 already present.\n')
+
+        result = self.invoke(cli.countries_cli, 'seed')
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output, f'Inserted 0 countries, skipped {total} already present.\n')
+
+    def test_import_users(self):
+        self.invoke(cli.countries_cli, 'seed')
+        source = os.path.join(self.directory, 'students.csv')
+        with open(source, 'w', encoding='utf-8') as students:
+            students.write(
+                'username,email,password,first_name,last_name,country\n'
+                'Freya,freya@knowlift.com,Yggdrasil,Freya,Vanir,Romania\n'
+                'Odin,odin@knowlift.com,Yggdrasil,Odin,Aesir,Asgard\n'
+            )
+
+        result = self.invoke(cli.users_cli, 'import', source, '--chunk-size', '1')
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Rejected line 3: unknown country Asgard', result.output)
+        self.assertRegex(result.output, r'Imported 1 users, rejected 1 in \d+\.\d{2}s')
+        self.assertEqual(repository.get_user_by_username(self.connection, 'Freya').first_name,
+                         'Freya')
+        self.assertIsNone(repository.get_user_by_username(self.connection, 'Odin'))
+
+    def test_import_missing_file(self):
+        result = self.invoke(cli.users_cli, 'import', os.path.join(self.directory, 'missing.csv'))
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('No such file or directory', result.output)
+
+    def test_rollup_answers(self):
+        repository.insert_answers(self.connection, [{
+            'game_level': 0, 'left_glyph': '[', 'right_glyph': ']', 'start': 0, 'stop': 9,
+            'answer': 10, 'outcome': True, 'date_created': datetime.datetime(2019, 1, 2),
+        }])
+
+        result = self.invoke(cli.answers_cli, 'rollup', '--keep', '1')
+        self.assertEqual(result.exit_code, 0)
+        self.assertRegex(result.output, r'^Compacted \d+ partitions: .*answer_2019_01')
+        self.assertNotIn('answer_2019_01', partitions.list_partitions(self.connection))
+
+        result = self.invoke(cli.answers_cli, 'rollup', '--keep', '1')
+        self.assertEqual(result.output, 'Compacted 0 partitions: -.\n')
+        self.assertEqual(self.invoke(cli.answers_cli, 'rollup', '--keep', '0').exit_code, 2)
+
+    def test_build_assets(self):
+        static_folder = os.path.join(self.directory, 'static')
+        shutil.copytree(self.app.static_folder, static_folder,
+                        ignore=shutil.ignore_patterns(assets.BUILD_FOLDER))
+        self.app.static_folder = static_folder
+
+        result = self.invoke(cli.assets_cli, 'build')
+        self.assertEqual(result.exit_code, 0)
+        self.assertRegex(result.output, r'^Built [1-9]\d* static assets into ')
+        manifest = os.path.join(static_folder, assets.BUILD_FOLDER, 'manifest.json')
+        self.assertTrue(os.path.isfile(manifest))
+
+    def test_measure_templates(self):
+        result = self.invoke(cli.templates_cli, 'measure', '/legal', '/about')
+        self.assertEqual(result.exit_code, 0)
+        lines = result.output.splitlines()
+        self.assertEqual(lines[0].split(), ['path', 'cold', 'bytecode', 'warm'])
+        self.assertEqual([line.split()[0] for line in lines[1:]], ['/legal', '/about'])
+        self.assertTrue(all(line.endswith('ms') for line in lines[1:]))
+
+    def test_top_profiles(self):
+        self.app.config.update(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_DIRECTORY=self.directory
+        )
+        result = self.invoke(cli.profiles_cli, 'top')
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output, f'No profiles found in {self.directory}.\n')
+
+        client = self.app.test_client()
+        for _ in range(2):
+            client.post('/play', data={'level': 1})
+        client.get('/legal')
+
+        result = self.invoke(cli.profiles_cli, 'top', '--limit', '3', '--endpoint', 'play')
+        self.assertEqual(result.exit_code, 0)
+        lines = result.output.splitlines()
+        self.assertRegex(lines[0], r'^play: 2 requests, mean latency \d+\.\d{3}ms$')
+        self.assertEqual(len(lines), 4)
+        self.assertNotIn('legal', result.output)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.connection.execute(
+            models.answer_rollup.delete().where(
+                models.answer_rollup.c.day == datetime.date(2019, 1, 2)
+            )
+        )
+        self.connection.execute(models.user.delete())
+        self.connection.execute(models.country.delete())
+        self.connection.close()
+        self.app.config['DATABASE_ENGINE'].dispose()
+        shutil.rmtree(self.directory)
+        super().tearDown()
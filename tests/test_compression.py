@@ -0,0 +1,179 @@
+"""
+Test knowlift.compression functionality.
+
+Classes:
+========
+    GzipMiddlewareTests: Test negotiating, skipping and incrementally compressing responses.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import gzip
+import unittest
+import zlib
+
+# Third party
+import flask
+
+from werkzeug import test
+from werkzeug import wrappers
+
+# Project specific
+import tests
+
+from knowlift import compression
+
+BODY = b'How many integers are within this interval ?\n' * 50
+
+
+def build_app(chunks=(BODY,), headers=None):
+    """Build a WSGI application that streams the given chunks."""
+    def app(environ, start_response):
+        response_headers = [('Content-Type', 'text/html; charset=utf-8')]
+        response_headers.extend((headers or {}).items())
+        start_response('200 OK', response_headers)
+        for chunk in chunks:
+            yield chunk
+    return app
+
+
+class GzipMiddlewareTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_compress_when_accepted()
+        test_compress_incrementally()
+        test_skip_when_not_accepted()
+        test_skip_small_encoded_and_excluded_responses()
+        test_etag_of_compressed_responses()
+        test_not_modified_cached_pages()
+        test_stats()
+        test_application_is_wrapped()
+        test_methods_in_docstring()
+    """
+
+    def get(self, middleware, accept_encoding='gzip, deflate', method='GET'):
+        client = test.Client(middleware, wrappers.BaseResponse)
+        return client.open('/', method=method, headers={'Accept-Encoding': accept_encoding})
+
+    def test_compress_when_accepted(self):
+        response = self.get(compression.GzipMiddleware(build_app(), level=9))
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.data), BODY)
+        self.assertLess(len(response.data), len(BODY))
+
+    def test_compress_incrementally(self):
+        chunks = [BODY[:100], b'', BODY[100:300], BODY[300:]]
+        middleware = compression.GzipMiddleware(build_app(chunks))
+        environ = test.EnvironBuilder(headers={'Accept-Encoding': 'gzip'}).get_environ()
+        app_iter = middleware(environ, lambda status, headers, exc_info=None: None)
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        received = b''
+        for chunk, expected in zip(app_iter, (BODY[:100], BODY[:300], BODY)):
+            # Each chunk is flushed, hence it can be decompressed as soon as it's received.
+            received += decompressor.decompress(chunk)
+            self.assertEqual(received, expected)
+        app_iter.close()
+
+    def test_skip_when_not_accepted(self):
+        for accept_encoding in ('', 'br', 'gzip;q=0'):
+            response = self.get(compression.GzipMiddleware(build_app()), accept_encoding)
+            self.assertNotIn('Content-Encoding', response.headers)
+            self.assertEqual(response.data, BODY)
+        response = self.get(compression.GzipMiddleware(build_app()), method='HEAD')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_skip_small_encoded_and_excluded_responses(self):
+        apps = (
+            build_app(headers={'Content-Length': '10'}),
+            build_app(headers={'Content-Encoding': 'gzip'}),
+            build_app(headers={'Cache-Control': 'no-transform'}),
+        )
+        for app in apps:
+            response = self.get(compression.GzipMiddleware(app, minimum_size=500))
+            self.assertEqual(response.data, BODY)
+
+        middleware = compression.GzipMiddleware(build_app(), excluded_types=('text/',))
+        self.assertNotIn('Content-Encoding', self.get(middleware).headers)
+        self.assertEqual(middleware.get_stats()['responses_compressed'], 0)
+
+    def test_etag_of_compressed_responses(self):
+        middleware = compression.GzipMiddleware(build_app(headers={'ETag': '"abc"'}))
+        self.assertEqual(self.get(middleware).headers['ETag'], '"abc-gz"')
+        self.assertEqual(self.get(middleware, accept_encoding='').headers['ETag'], '"abc"')
+        middleware = compression.GzipMiddleware(build_app(headers={'ETag': 'W/"abc"'}))
+        self.assertEqual(self.get(middleware).headers['ETag'], 'W/"abc"')
+
+        client = tests.TEST_APPLICATION.test_client()
+        headers = {'Accept-Encoding': 'gzip'}
+        response = client.get('/static/css/style.css', headers=headers)
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(etag.endswith('-gz"'))
+        response.close()
+
+        headers['If-None-Match'] = etag
+        response = client.get('/static/css/style.css', headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        response.close()
+
+        response = client.get('/static/css/style.css', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        response.close()
+
+    def test_not_modified_cached_pages(self):
+        # knowlift.page_cache compresses its own pages, and tags them with the suffix already.
+        client = tests.TEST_APPLICATION.test_client()
+        headers = {'Accept-Encoding': 'gzip'}
+        response = client.get('/', headers=headers)
+        etag = response.headers['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(etag.endswith('-gz"'))
+
+        headers['If-None-Match'] = etag
+        response = client.get('/', headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_stats(self):
+        middleware = compression.GzipMiddleware(build_app())
+        first, second = self.get(middleware).data, self.get(middleware).data
+        stats = middleware.get_stats()
+        self.assertEqual(stats['responses_compressed'], 2)
+        self.assertEqual(stats['bytes_in'], 2 * len(BODY))
+        self.assertEqual(stats['bytes_out'], len(first) + len(second))
+        self.assertEqual(stats['bytes_saved'], stats['bytes_in'] - stats['bytes_out'])
+
+    def test_application_is_wrapped(self):
+        app = tests.TEST_APPLICATION
+        self.assertIsInstance(app.wsgi_app, compression.GzipMiddleware)
+        response = app.test_client().post(
+            '/play', data={'level': 0}, headers={'Accept-Encoding': 'gzip'}
+        )
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn(b'How many integers', gzip.decompress(response.data))
+
+        with app.test_request_context():
+            static_url = flask.url_for('static', filename='images/coming_soon.jpg')
+        response = app.test_client().get(static_url, headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        response.close()
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
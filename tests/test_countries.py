@@ -0,0 +1,122 @@
+"""
+Test knowlift.countries functionality.
+
+Classes:
+========
+    CountryCacheTests: Test the in-memory country store along with its indexes.
+    SeedTests: Test the bulk seeding of the ISO 3166-1 countries.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import unittest
+
+# Project specific
+import tests
+
+from knowlift import countries
+from knowlift import db
+from knowlift import iso3166
+from knowlift import models
+
+
+class CountryCacheTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_lookup_by_indexes()
+        test_lookup_missing_values()
+        test_resolve()
+        test_cache_is_immutable()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.rows = (
+            (2, 'Australia', 'AU', 'AUS'),
+            (1, 'Romania', 'RO', 'ROU'),
+        )
+        self.cache = countries.CountryCache(self.rows)
+
+    def test_lookup_by_indexes(self):
+        romania = countries.Country(*self.rows[1])
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get(1), romania)
+        self.assertEqual(self.cache.by_alpha2('ro'), romania)
+        self.assertEqual(self.cache.by_alpha3('ROU'), romania)
+        self.assertEqual(self.cache.by_name('romania'), romania)
+        self.assertEqual([country.id for country in self.cache], [1, 2])
+
+    def test_lookup_missing_values(self):
+        self.assertIsNone(self.cache.get(3))
+        self.assertIsNone(self.cache.by_alpha2('US'))
+        self.assertIsNone(self.cache.by_alpha3('USA'))
+        self.assertIsNone(self.cache.by_name('United States of America'))
+
+    def test_resolve(self):
+        for value in ('AU', 'aus', ' Australia '):
+            self.assertEqual(self.cache.resolve(value).id, 2)
+        self.assertIsNone(self.cache.resolve('Atlantis'))
+
+    def test_cache_is_immutable(self):
+        self.assertRaises(AttributeError, setattr, self.cache, '_countries', ())
+        self.assertRaises(AttributeError, delattr, self.cache, '_by_id')
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+
+class SeedTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_seed_all_countries()
+        test_seed_is_idempotent()
+        test_methods_in_docstring()
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
+
+    def setUp(self):
+        super().setUp()
+        self.connection = self.engine.connect()
+
+    def test_seed_all_countries(self):
+        inserted = countries.seed(self.connection)
+        country_cache = countries.load_cache(self.connection)
+        self.assertEqual(inserted, len(iso3166.COUNTRIES))
+        self.assertEqual(len(country_cache), len(iso3166.COUNTRIES))
+        self.assertEqual(country_cache.by_alpha3('ROU').english_short_name, 'Romania')
+
+    def test_seed_is_idempotent(self):
+        countries.seed(self.connection, iso3166.COUNTRIES[:10])
+        inserted = countries.seed(self.connection)
+        self.assertEqual(inserted, len(iso3166.COUNTRIES) - 10)
+        self.assertEqual(countries.seed(self.connection), 0)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.connection.execute(models.country.delete())
+        self.connection.close()
+        super().tearDown()
@@ -0,0 +1,107 @@
+"""
+Test knowlift.db functionality.
+
+Classes:
+========
+    InstrumentationTests: Test the timing of statements and the per-request database statistics.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import unittest
+
+from unittest import mock
+
+# Third party
+import flask
+import sqlalchemy
+
+# Project specific
+import tests
+
+from knowlift import db
+
+
+class InstrumentationTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_statements_are_counted_per_request()
+        test_slow_queries_are_logged()
+        test_slow_queries_are_sampled()
+        test_failed_statements_are_forgotten()
+        test_get_connection_records_checkout_time()
+        test_report_request_stats()
+        test_methods_in_docstring()
+    """
+
+    def build_engine(self, threshold, sample_rate=1.0):
+        engine = sqlalchemy.create_engine('sqlite://')
+        db.instrument_engine(engine, threshold, sample_rate)
+        return engine
+
+    def test_statements_are_counted_per_request(self):
+        engine = self.build_engine(threshold=60)
+        with tests.TEST_APPLICATION.test_request_context('/'):
+            engine.execute('SELECT 1')
+            engine.execute('SELECT 2')
+            self.assertEqual(flask.g.db_query_count, 2)
+            self.assertGreater(flask.g.db_time, 0)
+
+        with tests.TEST_APPLICATION.test_request_context('/'):
+            self.assertNotIn('db_query_count', flask.g)
+
+    def test_slow_queries_are_logged(self):
+        engine = self.build_engine(threshold=0)
+        with tests.TEST_APPLICATION.test_request_context('/'):
+            with self.assertLogs('knowlift.db.slow', 'WARNING') as logs:
+                engine.execute('SELECT 1')
+        self.assertIn('view: index', logs.output[0])
+        self.assertIn('SELECT 1', logs.output[0])
+
+    def test_slow_queries_are_sampled(self):
+        engine = self.build_engine(threshold=0, sample_rate=0)
+        with mock.patch.object(db.slow_query_logger, 'warning') as warning:
+            engine.execute('SELECT 1')
+        warning.assert_not_called()
+
+    def test_failed_statements_are_forgotten(self):
+        engine = self.build_engine(threshold=60)
+        with engine.connect() as connection:
+            for _ in range(3):
+                self.assertRaises(
+                    sqlalchemy.exc.OperationalError, connection.execute, 'SELECT * FROM missing'
+                )
+            self.assertEqual(connection.info['query_start_time'], {})
+            connection.execute('SELECT 1')
+            self.assertEqual(connection.info['query_start_time'], {})
+
+    def test_get_connection_records_checkout_time(self):
+        with tests.TEST_APPLICATION.app_context():
+            connection = db.get_connection()
+            self.assertIs(db.get_connection(), connection)
+            self.assertGreaterEqual(flask.g.db_checkout_time, 0)
+
+    def test_report_request_stats(self):
+        config = {'DB_TIMING_HEADER': True}
+        with mock.patch.dict(tests.TEST_APPLICATION.config, config):
+            with tests.TEST_APPLICATION.test_request_context('/'):
+                flask.g.db_query_count, flask.g.db_time = 3, 0.002
+                response = db.report_request_stats(flask.Response())
+        self.assertEqual(
+            response.headers.get_all('Server-Timing'),
+            ['db;dur=2.000;desc="3 queries"', 'db-checkout;dur=0.000'],
+        )
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
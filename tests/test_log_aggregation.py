@@ -0,0 +1,171 @@
+"""
+Test knowlift.log_aggregation functionality.
+
+Classes:
+========
+    AggregatingFilterTests: Test deduplicating, sampling & summarizing log messages.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import gc
+import logging
+import unittest
+import weakref
+
+from logging import handlers
+from unittest import mock
+
+# Project specific
+import tests
+
+from knowlift import log_aggregation
+
+
+class AggregatingFilterTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_log_first_occurrence()
+        test_summarize_after_window()
+        test_summarize_on_sweep()
+        test_sample_repeated_occurrences()
+        test_shared_between_handlers()
+        test_max_keys()
+        test_flush()
+        test_flush_at_exit()
+        test_compact_not_found_line()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        self.clock = mock.patch('time.monotonic', lambda: self.now)
+        self.clock.start()
+        self.filter = log_aggregation.AggregatingFilter(window=60)
+        self.logger = logging.getLogger('knowlift.tests.aggregation')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.handler = handlers.BufferingHandler(capacity=1000)
+        self.handler.addFilter(self.filter)
+        self.logger.addHandler(self.handler)
+
+    def messages(self, handler=None):
+        return [record.getMessage() for record in (handler or self.handler).buffer]
+
+    def test_log_first_occurrence(self):
+        for _ in range(3):
+            self.logger.error('404 %s', '/wp-admin')
+        self.logger.error('404 %s', '/phpmyadmin')
+        self.logger.warning('404 %s', '/wp-admin')
+        self.assertEqual(self.messages(), ['404 /wp-admin', '404 /phpmyadmin', '404 /wp-admin'])
+
+    def test_summarize_after_window(self):
+        for _ in range(1342):
+            self.logger.error('404 %s', '/wp-admin')
+        self.now += 59
+        self.logger.error('404 %s', '/wp-admin')
+        self.assertEqual(self.messages(), ['404 /wp-admin'])
+
+        self.now += 1
+        self.logger.error('404 %s', '/wp-admin')
+        self.assertEqual(
+            self.messages(), ['404 /wp-admin', '404 /wp-admin x 1,343 in 60s', '404 /wp-admin']
+        )
+        self.assertEqual(self.handler.buffer[1].levelno, logging.ERROR)
+        self.assertEqual(self.handler.buffer[1].name, self.logger.name)
+
+    def test_summarize_on_sweep(self):
+        self.logger.info('Invalid answer: %r', 1.5)
+        self.logger.info('Invalid answer: %r', 1.5)
+        self.logger.info('Invalid answer: %r', True)
+        self.now += 61
+        self.logger.info('Unrelated')
+        self.assertEqual(self.messages(), [
+            'Invalid answer: 1.5', 'Invalid answer: True', 'Invalid answer: 1.5 x 2 in 60s',
+            'Unrelated',
+        ])
+
+    def test_sample_repeated_occurrences(self):
+        self.filter.sample_rates = {'knowlift.tests': 1}
+        self.assertEqual(self.filter.sample_rate('knowlift.tests.aggregation'), 1)
+        self.assertEqual(self.filter.sample_rate('knowlift'), 0)
+        self.assertEqual(self.filter.sample_rate('werkzeug'), 0)
+
+        with mock.patch('random.random', side_effect=[0.5, 1.0]):
+            for _ in range(3):
+                self.logger.error('Bad signature')
+        self.now += 60
+        self.filter.flush()
+        self.assertEqual(
+            self.messages(),
+            ['Bad signature', 'Bad signature', 'Bad signature x 3 in 60s (1 not logged)'],
+        )
+
+    def test_shared_between_handlers(self):
+        other_handler = handlers.BufferingHandler(capacity=1000)
+        other_handler.addFilter(self.filter)
+        self.logger.addHandler(other_handler)
+        try:
+            for _ in range(2):
+                self.logger.error('500 /result')
+            self.filter.flush()
+        finally:
+            self.logger.removeHandler(other_handler)
+
+        expected = ['500 /result', '500 /result x 2 in 60s']
+        self.assertEqual(self.messages(), expected)
+        self.assertEqual(self.messages(other_handler), expected)
+
+    def test_max_keys(self):
+        self.filter.max_keys = 1
+        for _ in range(2):
+            self.logger.error('404 /a')
+            self.logger.error('404 /b')
+        self.assertEqual(self.messages(), ['404 /a', '404 /b', '404 /b'])
+
+    def test_flush(self):
+        self.logger.error('404 /a')
+        self.filter.flush()
+        self.assertEqual(self.messages(), ['404 /a'])
+        self.logger.error('404 /a')
+        self.assertEqual(self.messages(), ['404 /a', '404 /a'])
+
+    def test_flush_at_exit(self):
+        self.logger.error('404 /a')
+        self.logger.error('404 /a')
+        log_aggregation._flush_filters()
+        self.assertEqual(self.messages(), ['404 /a', '404 /a x 2 in 60s'])
+
+        # Filters are tracked weakly, discarded ones aren't kept around until the interpreter exits.
+        discarded = log_aggregation.AggregatingFilter()
+        self.assertIn(discarded, log_aggregation._filters)
+        reference = weakref.ref(discarded)
+        del discarded
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_compact_not_found_line(self):
+        with self.assertLogs('knowlift.views', 'ERROR') as logs:
+            tests.TEST_APPLICATION.test_client().get('/wp-admin?x=1')
+        self.assertEqual(logs.output, ['ERROR:knowlift.views:404 /wp-admin'])
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        log_aggregation._filters.discard(self.filter)  # not flushed when the interpreter exits
+        self.logger.removeHandler(self.handler)
+        self.clock.stop()
+        super().tearDown()
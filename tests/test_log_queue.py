@@ -0,0 +1,215 @@
+"""
+Test knowlift.log_queue functionality.
+
+Classes:
+========
+    LogQueueTests: Test queueing, routing, dropping & formatting log records.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import unittest
+
+from unittest import mock
+
+# Project specific
+import default_settings
+import tests
+
+from knowlift import log_aggregation
+from knowlift import log_queue
+from knowlift import metrics
+
+
+class LogQueueTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_queue_records()
+        test_route_records()
+        test_synchronous_logging()
+        test_drop_records_when_full()
+        test_json_output()
+        test_aggregation_settings()
+        test_restart_listener_in_forked_worker()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.console_path = os.path.join(self.directory, 'console.log')
+        self.errors_path = os.path.join(self.directory, 'errors.log')
+        self.app = mock.Mock(config={
+            'LOG_QUEUE_SIZE': 100,
+            'LOG_JSON': False,
+            'LOG_AGGREGATION_WINDOW': 60,
+            'LOG_SAMPLE_RATES': {},
+            'LOGGING_CONFIG': {
+                'version': 1,
+                'formatters': {'default': {'format': '%(levelname)s %(threadName)s %(message)s'}},
+                'filters': {
+                    'console_filter': {'()': default_settings.ConsoleFilter},
+                    'file_filter': {'()': default_settings.FileFilter},
+                },
+                'handlers': {
+                    'console': {
+                        'class': 'logging.FileHandler',
+                        'filename': self.console_path,
+                        'formatter': 'default',
+                        'filters': ['console_filter'],
+                    },
+                    'file': {
+                        'class': 'logging.FileHandler',
+                        'filename': self.errors_path,
+                        'formatter': 'default',
+                        'filters': ['file_filter'],
+                    },
+                },
+                'loggers': {'knowlift': {'level': 'INFO'}},
+                'root': {'level': 'INFO', 'handlers': ['console', 'file']},
+            },
+        })
+        self.logger = logging.getLogger('knowlift.tests.queue')
+
+    def read(self, path):
+        with open(path) as log_file:
+            return log_file.read().splitlines()
+
+    def test_queue_records(self):
+        log_queue.init_logging(self.app)
+        root_handlers = logging.getLogger().handlers
+        self.assertEqual(len(root_handlers), 1)
+        self.assertIsInstance(root_handlers[0], log_queue.DroppingQueueHandler)
+
+        emitted = []
+
+        def emit(handler, record):
+            emitted.append((threading.current_thread(), record))
+
+        with mock.patch.object(logging.FileHandler, 'emit', autospec=True, side_effect=emit):
+            self.logger.info('Arguments: %s', {'answer': 42})
+            log_queue.stop_logging()
+
+        # The record is handed over as is, & handled by the listener thread.
+        [(thread, record)] = emitted
+        self.assertNotEqual(thread, threading.current_thread())
+        self.assertEqual((record.msg, record.args), ('Arguments: %s', {'answer': 42}))
+
+    def test_route_records(self):
+        log_queue.init_logging(self.app)
+        self.logger.info('Served /play')
+        self.logger.warning('Slow query')
+        self.logger.error('500 /result')
+        log_queue.stop_logging()
+
+        self.assertEqual(
+            [line.split(' ', 1)[0] for line in self.read(self.console_path)], ['INFO', 'WARNING']
+        )
+        self.assertEqual(len(self.read(self.errors_path)), 1)
+        self.assertTrue(self.read(self.errors_path)[0].endswith('500 /result'))
+
+    def test_synchronous_logging(self):
+        self.app.config['LOG_QUEUE_SIZE'] = 0
+        log_queue.init_logging(self.app)
+        self.assertEqual(len(logging.getLogger().handlers), 2)
+        self.logger.info('Served /play')
+        self.assertEqual(
+            self.read(self.console_path), [f'INFO {threading.current_thread().name} Served /play']
+        )
+
+    def test_drop_records_when_full(self):
+        metrics.reset()
+        handler = log_queue.DroppingQueueHandler(queue.Queue(1))
+        for message in ('first', 'second', 'third'):
+            handler.handle(logging.makeLogRecord({'msg': message}))
+
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual(handler.queue.get_nowait().msg, 'first')
+        self.assertEqual(metrics._collect_local()[('knowlift_log_records_dropped_total', ())], 2)
+        metrics.reset()
+
+    def test_json_output(self):
+        self.app.config['LOG_JSON'] = True
+        log_queue.init_logging(self.app)
+        self.logger.info('Served %s', '/play')
+        try:
+            raise ValueError('Bad answer')
+        except ValueError:
+            self.logger.exception('Unable to grade')
+        log_queue.stop_logging()
+
+        served, failed = (json.loads(line) for line in self.read(self.console_path)[:1] +
+                          self.read(self.errors_path))
+        self.assertEqual(
+            {key: served[key] for key in ('level', 'logger', 'module', 'message')},
+            {'level': 'INFO', 'logger': 'knowlift.tests.queue', 'module': 'test_log_queue',
+             'message': 'Served /play'},
+        )
+        self.assertRegex(served['time'], r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}\+00:00$')
+        self.assertEqual(failed['message'], 'Unable to grade')
+        self.assertIn('ValueError: Bad answer', failed['exception'])
+
+    def test_aggregation_settings(self):
+        logging_config = self.app.config['LOGGING_CONFIG']
+        logging_config['filters']['aggregate'] = {'()': log_aggregation.AggregatingFilter}
+        logging_config['filters']['custom'] = {
+            '()': 'knowlift.log_aggregation.AggregatingFilter', 'window': 1,
+        }
+        logging_config['handlers']['console']['filters'] += ['aggregate', 'custom']
+        self.app.config.update(
+            LOG_QUEUE_SIZE=0, LOG_AGGREGATION_WINDOW=5, LOG_SAMPLE_RATES={'knowlift': 0.5}
+        )
+        log_queue.init_logging(self.app)
+
+        console = next(
+            handler for handler in logging.getLogger().handlers
+            if handler.baseFilename == self.console_path
+        )
+        aggregate, custom = console.filters[1:]
+        self.assertEqual((aggregate.window, aggregate.sample_rates), (5, {'knowlift': 0.5}))
+        self.assertEqual((custom.window, custom.sample_rates), (1, {'knowlift': 0.5}))
+        self.assertNotIn('window', logging_config['filters']['aggregate'])
+
+    def test_restart_listener_in_forked_worker(self):
+        log_queue.init_logging(self.app)
+        pid = os.fork()
+        if pid == 0:  # worker process
+            try:
+                self.logger.info('Logged by the worker')
+                log_queue.stop_logging()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        self.logger.info('Logged by the parent')
+        log_queue.stop_logging()
+        self.assertEqual(
+            sorted(line.split(' ', 2)[2] for line in self.read(self.console_path)),
+            ['Logged by the parent', 'Logged by the worker'],
+        )
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        log_queue.init_logging(tests.TEST_APPLICATION)
+        shutil.rmtree(self.directory)
+        super().tearDown()
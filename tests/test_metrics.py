@@ -0,0 +1,187 @@
+"""
+Test knowlift.metrics functionality.
+
+Classes:
+========
+    MetricsTests: Test recording, merging & rendering the metrics.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from unittest import mock
+
+# Project specific
+import tests
+
+from knowlift import db
+from knowlift import metrics
+from knowlift import number_distance
+
+HTTP_CLIENT = tests.TEST_APPLICATION.test_client()
+
+
+class MetricsTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_count_requests()
+        test_latency_histogram()
+        test_count_questions_and_answers()
+        test_db_pool_usage()
+        test_merge_threads()
+        test_merge_ended_threads()
+        test_merge_processes()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.directory = tempfile.mkdtemp()
+
+    def scrape(self):
+        response = HTTP_CLIENT.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, metrics.CONTENT_TYPE)
+        return response.get_data(as_text=True).splitlines()
+
+    def test_count_requests(self):
+        HTTP_CLIENT.get('/')
+        HTTP_CLIENT.get('/')
+        HTTP_CLIENT.get('/bogus')
+        lines = self.scrape()
+        self.assertIn('# TYPE knowlift_requests_total counter', lines)
+        self.assertIn(
+            'knowlift_requests_total{endpoint="index",method="GET",status="200"} 2', lines
+        )
+        self.assertIn(
+            'knowlift_requests_total{endpoint="unmatched",method="GET",status="404"} 1', lines
+        )
+
+    def test_latency_histogram(self):
+        for value in (0.001, 0.02, 0.02, 30):
+            metrics.observe('knowlift_request_duration_seconds', value, (('endpoint', 'ladder'),))
+        lines = self.scrape()
+        self.assertIn('# TYPE knowlift_request_duration_seconds histogram', lines)
+
+        series = 'knowlift_request_duration_seconds_bucket{endpoint="ladder",le="%s"}'
+        self.assertIn(f'{series % "0.005"} 1', lines)
+        self.assertIn(f'{series % "0.01"} 1', lines)
+        self.assertIn(f'{series % "0.025"} 3', lines)
+        self.assertIn(f'{series % "10.0"} 3', lines)
+        self.assertIn(f'{series % "+Inf"} 4', lines)
+        self.assertIn('knowlift_request_duration_seconds_sum{endpoint="ladder"} 30.041', lines)
+        self.assertIn('knowlift_request_duration_seconds_count{endpoint="ladder"} 4', lines)
+
+    def test_count_questions_and_answers(self):
+        response = HTTP_CLIENT.post('/api/v1/play', json={'level': 2})
+        question = response.get_json()
+        expected = number_distance.count_integers(
+            question['left_glyph'], question['right_glyph'], question['start_internal'],
+            question['stop_internal'],
+        )
+        for answer in (expected, expected + 1):
+            HTTP_CLIENT.post('/api/v1/result', json={'token': question['token'], 'answer': answer})
+        HTTP_CLIENT.post('/api/v1/result', json={'token': 'forged', 'answer': 1})
+
+        lines = self.scrape()
+        self.assertIn('knowlift_questions_total{game_level="2"} 1', lines)
+        self.assertIn('knowlift_questions_total{game_level="0"} 0', lines)
+        self.assertIn('knowlift_answers_total{game_level="2",outcome="correct"} 1', lines)
+        self.assertIn('knowlift_answers_total{game_level="2",outcome="incorrect"} 1', lines)
+        self.assertEqual(len([line for line in lines if line.startswith('knowlift_answers')]), 2)
+
+    def test_db_pool_usage(self):
+        engine = db.get_engine(tests.TEST_APPLICATION)
+        connection = engine.connect()
+        try:
+            self.assertIn('knowlift_db_pool_connections_in_use 1', self.scrape())
+        finally:
+            connection.close()
+
+        lines = self.scrape()
+        self.assertIn('knowlift_db_pool_connections_in_use 0', lines)
+        self.assertIn('knowlift_db_pool_checkouts_total 1', lines)
+
+    def test_merge_threads(self):
+        def count():
+            for _ in range(1000):
+                metrics.inc('knowlift_questions_total', (('game_level', '5'),))
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIn('knowlift_questions_total{game_level="5"} 4000', self.scrape())
+
+    def test_merge_ended_threads(self):
+        def count():
+            metrics.inc('knowlift_questions_total', (('game_level', '6'),))
+
+        for _ in range(200):  # i.e a thread per request
+            thread = threading.Thread(target=count)
+            thread.start()
+            thread.join()
+        count()
+
+        self.assertLessEqual(len(metrics._registry), 2)
+        self.assertIn('knowlift_questions_total{game_level="6"} 201', self.scrape())
+
+    def test_merge_processes(self):
+        config = {
+            'METRICS_DIRECTORY': self.directory,
+            'METRICS_FILE_SIZE': 4096,
+            'METRICS_PUBLISH_INTERVAL': 60,
+        }
+        metrics.inc('knowlift_questions_total', (('game_level', '1'),), 2)
+
+        pid = os.fork()
+        if pid == 0:  # worker process, whose values are reset upon forking
+            try:
+                metrics.inc('knowlift_questions_total', (('game_level', '1'),), 3)
+                metrics.inc('knowlift_questions_total', (('game_level', '7'),))
+                metrics._start_publisher(config)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        with open(os.path.join(self.directory, 'metrics_1.mmap'), 'wb'):
+            pass  # not published yet
+        with mock.patch.dict(tests.TEST_APPLICATION.config, config):
+            lines = self.scrape()
+        self.assertIn('knowlift_questions_total{game_level="1"} 5', lines)
+        self.assertIn('knowlift_questions_total{game_level="7"} 1', lines)
+
+        shared_file = os.path.join(self.directory, f'metrics_{pid}.mmap')
+        self.assertEqual(os.path.getsize(shared_file), 4096)
+        with open(shared_file, 'rb') as shared:
+            sequence, length = metrics._HEADER.unpack(shared.read(metrics._HEADER.size))
+            self.assertEqual(sequence, 2)
+            self.assertIn(['knowlift_questions_total', [['game_level', '7']], 1.0],
+                          json.loads(shared.read(length)))
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        metrics.reset()
+        super().tearDown()
@@ -0,0 +1,172 @@
+"""
+Test knowlift.migrations functionality.
+
+Classes:
+========
+    MigrateTests: Test bringing empty, outdated and up to date databases to the latest schema.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import datetime
+import os
+import tempfile
+import threading
+import unittest
+
+from unittest import mock
+
+# Third party
+import sqlalchemy
+
+from sqlalchemy import exc
+
+# Project specific
+from knowlift import migrations
+from knowlift import models
+from knowlift import partitions
+
+
+class MigrateTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_migrate_empty_database()
+        test_migrate_up_to_date_database_issues_a_single_query()
+        test_migrate_outdated_database()
+        test_migrate_newer_database_forbidden()
+        test_migrate_legacy_answers_into_partitions()
+        test_failed_migration_is_rolled_back()
+        test_migrate_concurrently()
+        test_get_version_of_locked_database()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        descriptor, self.database = tempfile.mkstemp(suffix='.db')
+        os.close(descriptor)
+        self.engine = sqlalchemy.create_engine(f'sqlite:///{self.database}')
+        self.statements = []
+        sqlalchemy.event.listen(self.engine, 'before_cursor_execute', self.record_statement)
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_migrate_empty_database(self):
+        self.assertEqual(migrations.migrate(self.engine), migrations.SCHEMA_VERSION)
+        for table in models.metadata.tables:
+            self.assertTrue(self.engine.has_table(table), f'{table} was not created.')
+
+    def test_migrate_up_to_date_database_issues_a_single_query(self):
+        migrations.migrate(self.engine)
+        self.statements.clear()
+        self.assertEqual(migrations.migrate(self.engine), migrations.SCHEMA_VERSION)
+        self.assertEqual(len(self.statements), 1)
+
+    def test_migrate_outdated_database(self):
+        applied = []
+        extra_migration = (migrations.SCHEMA_VERSION + 1, lambda connection: applied.append(1))
+        migrations.migrate(self.engine)
+        with mock.patch.multiple(
+            migrations,
+            MIGRATIONS=migrations.MIGRATIONS + (extra_migration,),
+            SCHEMA_VERSION=extra_migration[0],
+        ):
+            self.assertEqual(migrations.migrate(self.engine), extra_migration[0])
+            self.assertEqual(migrations.migrate(self.engine), extra_migration[0])
+        self.assertEqual(applied, [1])
+
+    def test_migrate_newer_database_forbidden(self):
+        migrations.migrate(self.engine)
+        self.engine.execute(
+            models.schema_version.insert(), version=migrations.SCHEMA_VERSION + 1
+        )
+        self.assertRaises(RuntimeError, migrations.migrate, self.engine)
+
+    def test_migrate_legacy_answers_into_partitions(self):
+        with mock.patch.object(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:1]):
+            migrations.migrate(self.engine)
+        self.engine.execute(migrations._legacy_answer.insert(), [
+            {'game_level': 0, 'left_glyph': '[', 'right_glyph': ']', 'start': 0, 'stop': 9,
+             'answer': 10, 'outcome': True, 'date_created': datetime.datetime(2019, month, 2)}
+            for month in (9, 10, 10)
+        ])
+
+        self.assertEqual(migrations.migrate(self.engine), migrations.SCHEMA_VERSION)
+        self.assertFalse(self.engine.has_table('answer'))
+        with self.engine.connect() as connection:
+            self.assertEqual(partitions.list_partitions(connection),
+                             ['answer_2019_09', 'answer_2019_10'])
+            self.assertEqual(len(partitions.get_answers(connection)), 3)
+
+    def test_failed_migration_is_rolled_back(self):
+        def failing_migration(connection):
+            connection.execute('CREATE TABLE scratch (id INTEGER)')
+            raise RuntimeError('Migration failed.')
+
+        extra_migration = (migrations.SCHEMA_VERSION + 1, failing_migration)
+        migrations.migrate(self.engine)
+        with mock.patch.multiple(
+            migrations,
+            MIGRATIONS=migrations.MIGRATIONS + (extra_migration,),
+            SCHEMA_VERSION=extra_migration[0],
+        ):
+            self.assertRaises(RuntimeError, migrations.migrate, self.engine)
+        self.assertFalse(self.engine.has_table('scratch'))
+        with self.engine.connect() as connection:
+            self.assertEqual(migrations.get_version(connection), migrations.SCHEMA_VERSION)
+
+    def test_migrate_concurrently(self):
+        engines = [sqlalchemy.create_engine(f'sqlite:///{self.database}') for _ in range(4)]
+        versions, errors = [], []
+
+        def boot(engine):
+            try:
+                versions.append(migrations.migrate(engine))
+            except Exception as ex:
+                errors.append(ex)
+            finally:
+                engine.dispose()
+
+        threads = [threading.Thread(target=boot, args=(engine,)) for engine in engines]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(versions, [migrations.SCHEMA_VERSION] * len(engines))
+
+    def test_get_version_of_locked_database(self):
+        migrations.migrate(self.engine)
+        impatient = sqlalchemy.create_engine(
+            f'sqlite:///{self.database}', connect_args={'timeout': 0}
+        )
+        with self.engine.connect() as connection:
+            connection.execute('BEGIN EXCLUSIVE')
+            try:
+                with impatient.connect() as impatient_connection:
+                    self.assertRaises(
+                        exc.OperationalError, migrations.get_version, impatient_connection
+                    )
+            finally:
+                connection.execute('ROLLBACK')
+                impatient.dispose()
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.unlink(self.database)
+        super().tearDown()
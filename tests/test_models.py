@@ -24,6 +24,7 @@ from sqlalchemy import exc
 # Project specific
 import tests
 
+from knowlift import db
 from knowlift import models
 from tests import factories
 
@@ -44,7 +45,7 @@ class UserModelTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        cls.engine = tests.TEST_APPLICATION.config['DATABASE_ENGINE']
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
 
     def setUp(self):
         super().setUp()
@@ -144,7 +145,7 @@ class CountryModelTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        cls.engine = tests.TEST_APPLICATION.config['DATABASE_ENGINE']
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
 
     def setUp(self):
         super().setUp()
@@ -3,8 +3,10 @@ Test knowlift.number_distance functionality.
 
 Functions:
 ==========
+    test_build_result: Test knowlift.number_distance.build_result functionality.
     test_calculate_statistics: Test knowlift.number_distance.calculate_statistics functionality.
     test_change_game_level: Test knowlift.number_distance.change_game_level functionality.
+    test_count_integers: Test knowlift.number_distance.count_integers functionality.
     test_fetch_game_level: Test knowlift.number_distance.fetch_game_level functionality.
     test_generate_result: Test knowlift.number_distance.generate_result functionality.
     test_prettify_number: Test knowlift.number_distance.prettify_number functionality.
@@ -35,6 +37,21 @@ class TestIntervalOperations(unittest.TestCase):
             'stop_internal',
         )
 
+    def test_build_result(self):
+        result = number_distance.build_result('[', ')', 1000, 1999, 4, 999)
+        self.assertEqual(sorted(result), sorted(self.metadata))
+        self.assertTrue(result['outcome'])
+        self.assertEqual(result['start_representation'], '1 000')
+        self.assertEqual(result['cpu_representation'], '999')
+        self.assertFalse(number_distance.build_result('(', ')', -5, 5, 1, 11)['outcome'])
+
+    def test_count_integers(self):
+        self.assertEqual(number_distance.count_integers('[', ']', -2, 2), 5)
+        self.assertEqual(number_distance.count_integers('[', ')', -2, 2), 4)
+        self.assertEqual(number_distance.count_integers('(', ']', -2, 2), 4)
+        self.assertEqual(number_distance.count_integers('(', ')', -2, 2), 3)
+        self.assertEqual(number_distance.count_integers('(', ')', 2, 2), 0)
+
     def test_calculate_statistics(self):
         self.assertEqual(number_distance.calculate_statistics(3, 20), (13.04, 86.96))
         self.assertEqual(number_distance.calculate_statistics(3, 20), (13.04, 86.96))
@@ -0,0 +1,108 @@
+"""
+Test knowlift.page_cache functionality.
+
+Classes:
+========
+    RenderTests: Test serving, revalidating and invalidating cached pages.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import gzip
+import os
+import time
+import unittest
+
+from unittest import mock
+
+# Third party
+import flask
+
+# Project specific
+import tests
+
+from knowlift import page_cache
+
+HTTP_CLIENT = tests.TEST_APPLICATION.test_client()
+
+
+class RenderTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_render_once()
+        test_gzip_variant()
+        test_not_modified()
+        test_invalidate_on_template_change()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        with tests.TEST_APPLICATION.app_context():
+            page_cache.clear()
+
+    def test_render_once(self):
+        with mock.patch.object(flask, 'render_template', wraps=flask.render_template) as render:
+            first = HTTP_CLIENT.get('/legal')
+            second = HTTP_CLIENT.get('/legal')
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first.data, second.data)
+        self.assertIn('legal__license', first.get_data(as_text=True))
+        self.assertIsNotNone(first.headers.get('ETag'))
+        self.assertFalse(first.headers['ETag'].startswith('W/'))
+        self.assertIn('max-age=3600', first.headers['Cache-Control'])
+        self.assertIn('public', first.headers['Cache-Control'])
+
+    def test_gzip_variant(self):
+        plain = HTTP_CLIENT.get('/about')
+        compressed = HTTP_CLIENT.get('/about', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(compressed.data), plain.data)
+        self.assertNotEqual(compressed.headers['ETag'], plain.headers['ETag'])
+
+    def test_not_modified(self):
+        etag = HTTP_CLIENT.get('/grade').headers['ETag']
+        with mock.patch.object(flask, 'render_template') as render:
+            response = HTTP_CLIENT.get('/grade', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            self.assertEqual(response.headers['ETag'], etag)
+
+            response = HTTP_CLIENT.get(
+                '/grade', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'}
+            )
+            self.assertEqual(response.status_code, 200)
+        render.assert_not_called()
+
+    def test_invalidate_on_template_change(self):
+        template = os.path.join(tests.TEST_APPLICATION.root_path, 'templates', 'layout.html')
+        stat = os.stat(template)
+        etag = HTTP_CLIENT.get('/ladder').headers['ETag']
+        with mock.patch.object(tests.TEST_APPLICATION.jinja_env, 'auto_reload', True):
+            with mock.patch.object(flask, 'render_template', wraps=flask.render_template) as render:
+                HTTP_CLIENT.get('/ladder')
+                HTTP_CLIENT.get('/ladder')
+                self.assertEqual(render.call_count, 1)
+                try:
+                    os.utime(template, ns=(stat.st_atime_ns, time.time_ns() + 10**9))
+                    response = HTTP_CLIENT.get('/ladder', headers={'If-None-Match': etag})
+                finally:
+                    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                self.assertEqual(render.call_count, 2)
+        # The content is the same, hence so is the ETag.
+        self.assertEqual(response.status_code, 304)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
@@ -0,0 +1,178 @@
+"""
+Test knowlift.partitions functionality.
+
+Classes:
+========
+    PartitionNamingTests: Test mapping points in time onto partitions.
+    PartitionStorageTests: Test storing, reading and compacting partitioned answers.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import datetime
+import unittest
+
+# Third party
+import sqlalchemy
+
+# Project specific
+import tests
+
+from knowlift import db
+from knowlift import models
+from knowlift import partitions
+
+
+def build_answer(date_created, outcome=True, user_id=1, game_level=0):
+    """Build the values of an answer created at a given moment."""
+    return {
+        'user_id': user_id,
+        'game_level': game_level,
+        'left_glyph': '[',
+        'right_glyph': ']',
+        'start': 0,
+        'stop': 9,
+        'answer': 10 if outcome else 9,
+        'outcome': outcome,
+        'date_created': date_created,
+    }
+
+
+class PartitionNamingTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_partition_name()
+        test_partitions_between()
+        test_methods_in_docstring()
+    """
+
+    def test_partition_name(self):
+        self.assertEqual(partitions.partition_name(datetime.date(2019, 1, 31)), 'answer_2019_01')
+        self.assertEqual(
+            partitions.partition_name(datetime.datetime(2019, 12, 1, 23, 59)), 'answer_2019_12'
+        )
+
+    def test_partitions_between(self):
+        names = partitions.partitions_between(
+            datetime.date(2018, 11, 30), datetime.date(2019, 2, 1)
+        )
+        self.assertEqual(names, ['answer_2018_11', 'answer_2018_12', 'answer_2019_01',
+                                 'answer_2019_02'])
+        self.assertEqual(
+            partitions.partitions_between(datetime.date(2019, 2, 1), datetime.date(2019, 1, 1)), []
+        )
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+
+class PartitionStorageTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_insert_answers_into_monthly_partitions()
+        test_get_answers_prunes_partitions()
+        test_get_daily_stats()
+        test_rollup()
+        test_methods_in_docstring()
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
+
+    def setUp(self):
+        super().setUp()
+        self.connection = self.engine.connect()
+        self.statements = []
+        sqlalchemy.event.listen(self.engine, 'before_cursor_execute', self.record_statement)
+        partitions.insert_answers(self.connection, [
+            build_answer(datetime.datetime(2019, 1, 15, 10)),
+            build_answer(datetime.datetime(2019, 1, 15, 11), outcome=False),
+            build_answer(datetime.datetime(2019, 2, 1, 9), user_id=2),
+            build_answer(datetime.datetime(2019, 3, 3, 8), game_level=1),
+        ])
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_insert_answers_into_monthly_partitions(self):
+        self.assertEqual(
+            partitions.list_partitions(self.connection),
+            ['answer_2019_01', 'answer_2019_02', 'answer_2019_03'],
+        )
+        inserted = partitions.insert_answers(
+            self.connection, [build_answer(None)], now=datetime.datetime(2019, 3, 4)
+        )
+        self.assertEqual(inserted, 1)
+        self.assertEqual(len(partitions.get_answers(
+            self.connection, start=datetime.datetime(2019, 3, 1), end=datetime.datetime(2019, 4, 1)
+        )), 2)
+
+    def test_get_answers_prunes_partitions(self):
+        self.statements.clear()
+        answers = partitions.get_answers(
+            self.connection, datetime.datetime(2019, 2, 1), datetime.datetime(2019, 2, 28)
+        )
+        self.assertEqual([answer.user_id for answer in answers], [2])
+        self.assertIn('answer_2019_02', self.statements[-1])
+        self.assertNotIn('answer_2019_01', self.statements[-1])
+        self.assertNotIn('answer_2019_03', self.statements[-1])
+
+        answers = partitions.get_answers(self.connection, user_id=1)
+        self.assertEqual([answer.date_created.month for answer in answers], [3, 1, 1])
+        self.assertEqual(partitions.get_answers(self.connection, end=datetime.datetime(2018, 1, 1)),
+                         [])
+
+    def test_get_daily_stats(self):
+        stats = partitions.get_daily_stats(self.connection, datetime.date(2019, 1, 1),
+                                           datetime.date(2019, 2, 28))
+        self.assertEqual(
+            [tuple(row) for row in stats],
+            [(datetime.date(2019, 1, 15), 0, 1, 1), (datetime.date(2019, 2, 1), 0, 1, 0)],
+        )
+        stats = partitions.get_daily_stats(
+            self.connection, datetime.date(2019, 1, 1), datetime.date(2019, 3, 31), user_id=2
+        )
+        self.assertEqual([tuple(row) for row in stats], [(datetime.date(2019, 2, 1), 0, 1, 0)])
+
+    def test_rollup(self):
+        stats_before = partitions.get_daily_stats(self.connection, datetime.date(2019, 1, 1),
+                                                  datetime.date(2019, 3, 31))
+        compacted = partitions.rollup(self.connection, keep=2, now=datetime.datetime(2019, 3, 10))
+        self.assertEqual(compacted, ['answer_2019_01'])
+        self.assertEqual(partitions.list_partitions(self.connection),
+                         ['answer_2019_02', 'answer_2019_03'])
+
+        stats_after = partitions.get_daily_stats(self.connection, datetime.date(2019, 1, 1),
+                                                 datetime.date(2019, 3, 31))
+        self.assertEqual([tuple(row) for row in stats_after], [tuple(row) for row in stats_before])
+        self.assertEqual(partitions.rollup(self.connection, keep=2,
+                                           now=datetime.datetime(2019, 3, 10)), [])
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        sqlalchemy.event.remove(self.engine, 'before_cursor_execute', self.record_statement)
+        partitions.rollup(self.connection, keep=1, now=datetime.datetime(2100, 1, 1))
+        self.connection.execute(models.answer_rollup.delete())
+        self.connection.close()
+        super().tearDown()
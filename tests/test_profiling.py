@@ -0,0 +1,122 @@
+"""
+Test knowlift.profiling functionality.
+
+Classes:
+========
+    ProfilingTests: Test sampling requests, storing & rotating profiles and finding hotspots.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+# Project specific
+import tests
+
+from knowlift import profiling
+
+HTTP_CLIENT = tests.TEST_APPLICATION.test_client()
+
+
+class ProfilingTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_disabled_by_default()
+        test_profile_sampled_requests()
+        test_profile_privileged_requests()
+        test_rotate_profiles()
+        test_find_hotspots()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.config = {
+            'PROFILING_ENABLED': True,
+            'PROFILING_SAMPLE_RATE': 1.0,
+            'PROFILING_DIRECTORY': self.directory,
+            'PROFILING_TOKEN': 'Yggdrasil',
+        }
+
+    def profiles(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(tests.TEST_APPLICATION.config, PROFILING_DIRECTORY=self.directory):
+            HTTP_CLIENT.get('/')
+        self.assertEqual(self.profiles(), [])
+
+    def test_profile_sampled_requests(self):
+        with mock.patch.dict(tests.TEST_APPLICATION.config, self.config):
+            HTTP_CLIENT.post('/play', data={'level': 1})
+            HTTP_CLIENT.get('/bogus')
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertRegex(profiles[0], r'^play\.\d+\.\d{3}ms\.\d+\.\d+\.pstats$')
+        self.assertTrue(profiles[1].startswith('unmatched.'))
+
+    def test_profile_privileged_requests(self):
+        self.config['PROFILING_SAMPLE_RATE'] = 0
+        with mock.patch.dict(tests.TEST_APPLICATION.config, self.config):
+            HTTP_CLIENT.get('/')
+            HTTP_CLIENT.get('/', headers={'X-Profile': 'guess'})
+            self.assertEqual(self.profiles(), [])
+            HTTP_CLIENT.get('/', headers={'X-Profile': 'Yggdrasil'})
+            self.assertEqual(len(self.profiles()), 1)
+
+            tests.TEST_APPLICATION.config['PROFILING_TOKEN'] = None
+            HTTP_CLIENT.get('/', headers={'X-Profile': ''})
+            self.assertEqual(len(self.profiles()), 1)
+
+    def test_rotate_profiles(self):
+        self.config['PROFILING_MAX_FILES'] = 2
+        with mock.patch.dict(tests.TEST_APPLICATION.config, self.config):
+            for path in ('/', '/about', '/grade'):
+                HTTP_CLIENT.get(path)
+        self.assertEqual([name.split('.')[0] for name in self.profiles()], ['about', 'grade'])
+
+    def test_find_hotspots(self):
+        with mock.patch.dict(tests.TEST_APPLICATION.config, self.config):
+            for _ in range(2):
+                HTTP_CLIENT.post('/play', data={'level': 1})
+            HTTP_CLIENT.get('/legal')
+        with open(os.path.join(self.directory, 'not_a_profile.txt'), 'w'):
+            pass
+
+        routes = profiling.find_hotspots(self.directory, limit=5)
+        self.assertEqual(sorted(routes), ['legal', 'play'])
+        self.assertEqual(routes['play'].requests, 2)
+        self.assertGreater(routes['play'].mean_latency, 0)
+        hotspots = routes['play'].hotspots
+        self.assertEqual(len(hotspots), 5)
+        self.assertEqual(
+            [hotspot.cumulative_time for hotspot in hotspots],
+            sorted((hotspot.cumulative_time for hotspot in hotspots), reverse=True),
+        )
+
+        self.assertEqual(list(profiling.find_hotspots(self.directory, endpoint='legal')), ['legal'])
+        self.assertEqual(profiling.find_hotspots(os.path.join(self.directory, 'missing')), {})
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
@@ -0,0 +1,218 @@
+"""
+Test knowlift.progress functionality.
+
+Classes:
+========
+    ProgressCacheTests: Test the in-memory progress of the users and how it's written back.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import json
+import time
+import unittest
+
+from unittest import mock
+
+# Project specific
+import tests
+
+from knowlift import db
+from knowlift import metrics
+from knowlift import models
+from knowlift import number_distance
+from knowlift import progress
+from knowlift import repository
+from knowlift import tokens
+
+
+class ProgressCacheTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_get_queries_once()
+        test_record_answer()
+        test_flush_in_batches()
+        test_read_your_writes_after_eviction()
+        test_failed_flush_is_retried()
+        test_flusher_thread()
+        test_result_records_progress()
+        test_result_batch_records_progress()
+        test_answer_records_progress()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.engine = db.get_engine(tests.TEST_APPLICATION)
+        self.cache = progress.ProgressCache(self.engine.connect, max_entries=2, batch_size=2)
+        metrics.reset()
+
+    def _saved(self):
+        with self.engine.connect() as connection:
+            rows = connection.execute(models.user_progress.select()).fetchall()
+        return {row.user_id: (row.correct, row.incorrect, row.streak) for row in rows}
+
+    def _update(self, user_id, correct=1):
+        return self.cache.update(
+            user_id, lambda current: current._replace(correct=current.correct + correct)
+        )
+
+    def test_get_queries_once(self):
+        with mock.patch.object(
+            repository, 'get_progress', wraps=repository.get_progress
+        ) as get_progress:
+            self.assertEqual(self.cache.get(1), progress.Progress(0, 0, 0, 0, 0))
+            self.assertEqual(self.cache.get(1), progress.Progress(0, 0, 0, 0, 0))
+        self.assertEqual(get_progress.call_count, 1)
+
+        samples = metrics._collect_local()
+        self.assertEqual(samples[('knowlift_progress_cache_hits_total', ())], 1)
+        self.assertEqual(samples[('knowlift_progress_cache_misses_total', ())], 1)
+
+    def test_record_answer(self):
+        with tests.TEST_APPLICATION.app_context():
+            cache = progress.get_cache()
+            progress.record_answer(7, 2, True)
+            progress.record_answer(7, 3, True)
+            self.assertEqual(progress.record_answer(7, 3, False), progress.Progress(3, 2, 1, 0, 2))
+            self.assertEqual(progress.record_answer(7, 4, True), progress.Progress(4, 3, 1, 1, 2))
+            self.assertEqual(self._saved(), {})
+
+            self.assertEqual(cache.flush(), 1)
+            self.assertEqual(self._saved(), {7: (3, 1, 1)})
+            self.assertEqual(cache.flush(), 0)
+
+    def test_flush_in_batches(self):
+        for user_id in range(1, 6):
+            self._update(user_id)
+
+        with mock.patch.object(
+            repository, 'save_progress', wraps=repository.save_progress
+        ) as save_progress:
+            self.assertEqual(self.cache.flush(), 5)
+        self.assertEqual([len(c.args[1]) for c in save_progress.call_args_list], [2, 2, 1])
+        self.assertEqual(self._saved(), {user_id: (1, 0, 0) for user_id in range(1, 6)})
+        self.assertEqual(metrics._collect_local()[('knowlift_progress_rows_flushed_total', ())], 5)
+
+    def test_read_your_writes_after_eviction(self):
+        self._update(1, correct=3)
+        self._update(2)
+        self._update(3)  # evicts user 1, before it was written back
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(
+            metrics._collect_local()[('knowlift_progress_cache_evictions_total', ())], 1
+        )
+
+        with mock.patch.object(repository, 'get_progress') as get_progress:
+            self.assertEqual(self.cache.get(1).correct, 3)
+        get_progress.assert_not_called()
+
+        self.cache.flush()
+        self.assertEqual(self._saved(), {1: (3, 0, 0), 2: (1, 0, 0), 3: (1, 0, 0)})
+        self._update(4)
+        self._update(5)  # evicts clean entries, which are read back from the database
+        self.assertEqual(self._update(1).correct, 4)
+
+    def test_failed_flush_is_retried(self):
+        self._update(1)
+        self._update(2)
+        self._update(3)
+        with mock.patch.object(repository, 'save_progress', side_effect=RuntimeError('locked')):
+            self.assertRaises(RuntimeError, self.cache.flush)
+        self.assertEqual(self._saved(), {})
+
+        self.assertEqual(self.cache.flush(), 3)
+        self.assertEqual(self._saved(), {1: (1, 0, 0), 2: (1, 0, 0), 3: (1, 0, 0)})
+
+    def test_flusher_thread(self):
+        self.cache.flush_interval = 0.01
+        self._update(1)
+        try:
+            for _ in range(500):
+                if self._saved():
+                    break
+                time.sleep(0.01)
+        finally:
+            self.cache.stop_flusher()
+        self.assertEqual(self._saved(), {1: (1, 0, 0)})
+
+    def test_result_records_progress(self):
+        question = number_distance.generate_interval(number_distance.GAME_LEVELS[2])
+        answer = number_distance.count_integers(
+            question['left_glyph'], question['right_glyph'],
+            question['start_internal'], question['stop_internal'],
+        )
+        token = tokens.issue(question, tests.TEST_APPLICATION.config['SECRET_KEY'])
+        form = {'data': json.dumps({'token': token, 'answer': answer})}
+
+        client = tests.TEST_APPLICATION.test_client()
+        self.assertEqual(client.post('/result', data=form).status_code, 200)
+        with client.session_transaction() as session:
+            session['user_id'] = 9
+        self.assertEqual(client.post('/result', data=form).status_code, 200)
+
+        with tests.TEST_APPLICATION.app_context():
+            self.assertEqual(progress.get_progress(9), progress.Progress(2, 1, 0, 1, 1))
+            progress.get_cache().flush()
+        self.assertEqual(self._saved(), {9: (1, 0, 1)})
+
+    def test_result_batch_records_progress(self):
+        sheet = {}
+        while len(sheet) < 4:  # each question can only be answered once per sheet
+            question = number_distance.generate_interval(number_distance.GAME_LEVELS[1])
+            token = tokens.issue(question, tests.TEST_APPLICATION.config['SECRET_KEY'])
+            if token in sheet:
+                continue
+            sheet[token] = number_distance.count_integers(
+                question['left_glyph'], question['right_glyph'],
+                question['start_internal'], question['stop_internal'],
+            ) + (len(sheet) == 2)  # the third answer is incorrect
+        sheet = [{'token': token, 'answer': answer} for token, answer in sheet.items()]
+
+        client = tests.TEST_APPLICATION.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 9
+        self.assertEqual(client.post('/api/v1/result/batch', json=sheet).status_code, 200)
+
+        with tests.TEST_APPLICATION.app_context():
+            self.assertEqual(progress.get_progress(9), progress.Progress(1, 3, 1, 1, 2))
+
+    def test_answer_records_progress(self):
+        question = number_distance.generate_interval(number_distance.GAME_LEVELS[3])
+        answer = number_distance.count_integers(
+            question['left_glyph'], question['right_glyph'],
+            question['start_internal'], question['stop_internal'],
+        )
+        token = tokens.issue(question, tests.TEST_APPLICATION.config['SECRET_KEY'])
+
+        client = tests.TEST_APPLICATION.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 9
+        for sent in (answer, answer + 1, answer):
+            response = client.post('/api/v1/answer', json={'token': token, 'answer': sent})
+            self.assertEqual(response.status_code, 200)
+
+        with tests.TEST_APPLICATION.app_context():
+            self.assertEqual(progress.get_progress(9), progress.Progress(3, 2, 1, 1, 1))
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.cache.stop_flusher()
+        progress.init_progress(tests.TEST_APPLICATION)  # forget what the application cached
+        with self.engine.connect() as connection:
+            connection.execute(models.user_progress.delete())
+        metrics.reset()
+        super().tearDown()
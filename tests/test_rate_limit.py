@@ -0,0 +1,251 @@
+"""
+Test knowlift.rate_limit functionality.
+
+Classes:
+========
+    BackendTests: Test the token buckets of both backends.
+    SharedBackendTests: Test sharing the buckets across processes & evicting them.
+    RateLimitTests: Test throttling requests per IP & per client.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+# Project specific
+import tests
+
+from knowlift import rate_limit
+
+
+class BackendTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_burst()
+        test_refill()
+        test_buckets_are_independent()
+        test_memory_backend_drops_least_recently_used()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.backends = (
+            rate_limit.MemoryBackend(),
+            rate_limit.SharedBackend(os.path.join(self.directory, 'buckets.mmap'), slots=64),
+        )
+
+    def test_burst(self):
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                waits = [backend.take('ip:10.0.0.1', 2, 3, now=100) for _ in range(4)]
+                self.assertEqual(waits, [0, 0, 0, 0.5])
+
+    def test_refill(self):
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                for _ in range(3):
+                    backend.take('ip:10.0.0.1', 2, 3, now=100)
+                self.assertEqual(backend.take('ip:10.0.0.1', 2, 3, now=100.25), 0.25)
+                self.assertEqual(backend.take('ip:10.0.0.1', 2, 3, now=100.5), 0)
+                # A bucket never holds more than its burst, however long it's left alone.
+                waits = [backend.take('ip:10.0.0.1', 2, 3, now=1000) for _ in range(4)]
+                self.assertEqual(waits, [0, 0, 0, 0.5])
+
+    def test_buckets_are_independent(self):
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                backend.take('ip:10.0.0.1', 1, 1, now=100)
+                self.assertGreater(backend.take('ip:10.0.0.1', 1, 1, now=100), 0)
+                self.assertEqual(backend.take('ip:10.0.0.2', 1, 1, now=100), 0)
+
+    def test_memory_backend_drops_least_recently_used(self):
+        backend = rate_limit.MemoryBackend(max_keys=2)
+        backend.take('a', 1, 1, now=100)
+        backend.take('b', 1, 1, now=100)
+        backend.take('a', 1, 1, now=100)
+        backend.take('c', 1, 1, now=100)
+        self.assertEqual(list(backend._buckets), ['a', 'c'])
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+
+class SharedBackendTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_shared_across_processes()
+        test_full_group_evicts_stalest_slot()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'buckets.mmap')
+
+    def test_shared_across_processes(self):
+        backend = rate_limit.SharedBackend(self.path, slots=64)
+        self.assertEqual(os.path.getsize(self.path), 64 * 24)
+
+        pid = os.fork()
+        if pid == 0:  # another worker, mapping the same file
+            try:
+                worker_backend = rate_limit.SharedBackend(self.path, slots=64)
+                worker_backend.take('ip:10.0.0.1', 1, 2, now=100)
+                worker_backend.take('ip:10.0.0.1', 1, 2, now=100)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(backend.take('ip:10.0.0.1', 1, 2, now=100), 1)
+
+    def test_full_group_evicts_stalest_slot(self):
+        backend = rate_limit.SharedBackend(self.path, slots=1)
+        self.assertEqual(backend.groups, 1)
+        for index in range(backend.GROUP_SIZE):
+            backend.take(f'ip:10.0.0.{index}', 1, 1, now=100 + index)
+
+        self.assertGreater(backend.take('ip:10.0.0.1', 1, 1, now=100.5), 0)
+        backend.take('ip:10.0.1.1', 1, 1, now=101)  # takes over the slot of 10.0.0.0
+        self.assertGreater(backend.take('ip:10.0.1.1', 1, 1, now=101), 0)
+        self.assertEqual(backend.take('ip:10.0.0.0', 1, 1, now=100.5), 0)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+
+class RateLimitTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_disabled()
+        test_limit_per_ip()
+        test_limit_per_client()
+        test_unlimited_endpoints()
+        test_init_rate_limiter()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.http_client = tests.TEST_APPLICATION.test_client()
+        self.config = mock.patch.dict(tests.TEST_APPLICATION.config, {
+            'RATE_LIMIT_ENABLED': True,
+            'RATE_LIMITER': rate_limit.MemoryBackend(),
+            'RATE_LIMIT_IP_RATE': 0.01,
+            'RATE_LIMIT_IP_BURST': 2,
+            'RATE_LIMIT_CLIENT_RATE': 0.5,
+            'RATE_LIMIT_CLIENT_BURST': 1,
+        })
+        self.config.start()
+
+    def test_disabled(self):
+        tests.TEST_APPLICATION.config['RATE_LIMIT_ENABLED'] = False
+        for _ in range(5):
+            response = self.http_client.post('/api/v1/play', json={'level': 1})
+            self.assertEqual(response.status_code, 200)
+
+    def test_limit_per_ip(self):
+        statuses = [
+            self.http_client.post('/api/v1/play', json={'level': 1}).status_code,
+            tests.TEST_APPLICATION.test_client().post('/play', data={'level': 1}).status_code,
+        ]
+        self.assertEqual(statuses, [200, 200])
+
+        response = tests.TEST_APPLICATION.test_client().post('/api/v1/play', json={'level': 1})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.get_json(), {'error': 'Too many requests, slow down.'})
+        self.assertEqual(response.headers['Retry-After'], '100')
+
+        response = self.http_client.post('/play', data={'level': 1})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.mimetype, 'text/html')
+        self.assertEqual(response.headers['Retry-After'], '100')
+
+        response = self.http_client.post(
+            '/play', data={'level': 1}, environ_base={'REMOTE_ADDR': '10.0.0.1'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_limit_per_client(self):
+        tests.TEST_APPLICATION.config['RATE_LIMIT_IP_BURST'] = 100
+        response = self.http_client.post('/api/v1/play', json={'level': 1})
+        cookie = response.headers['Set-Cookie']
+        self.assertTrue(cookie.startswith('knowlift_client='))
+        self.assertIn('HttpOnly', cookie)
+
+        for status in (200, 429):  # the cookie is sent back from now on
+            response = self.http_client.post('/api/v1/play', json={'level': 1})
+            self.assertEqual(response.status_code, status)
+            self.assertNotIn('Set-Cookie', response.headers)
+        self.assertEqual(response.headers['Retry-After'], '2')
+
+        response = tests.TEST_APPLICATION.test_client().post('/api/v1/play', json={'level': 1})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unlimited_endpoints(self):
+        tests.TEST_APPLICATION.config['RATE_LIMIT_IP_BURST'] = 0
+        self.assertEqual(self.http_client.get('/').status_code, 200)
+        self.assertEqual(self.http_client.post('/play', data={'level': 1}).status_code, 429)
+
+    def test_init_rate_limiter(self):
+        directory = tempfile.mkdtemp()
+        try:
+            app = mock.Mock(config={
+                'RATE_LIMIT_BACKEND': 'shared',
+                'RATE_LIMIT_SHARED_FILE': os.path.join(directory, 'limits', 'buckets.mmap'),
+                'RATE_LIMIT_MAX_KEYS': 16,
+            })
+            rate_limit.init_rate_limiter(app)
+            self.assertIsInstance(app.config['RATE_LIMITER'], rate_limit.SharedBackend)
+            self.assertEqual(app.config['RATE_LIMITER'].groups, 2)
+
+            app.config['RATE_LIMIT_BACKEND'] = 'redis'
+            with self.assertRaises(ValueError):
+                rate_limit.init_rate_limiter(app)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.config.stop()
+        super().tearDown()
@@ -0,0 +1,146 @@
+"""
+Test knowlift.repository functionality.
+
+Classes:
+========
+    RepositoryTests: Test the precompiled hot queries against the test database.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import datetime
+import unittest
+
+# Project specific
+import tests
+
+from knowlift import db
+from knowlift import models
+from knowlift import partitions
+from knowlift import repository
+from tests import factories
+
+
+def build_answer(user_id, outcome):
+    """Build the values of an answer for a given user."""
+    return {
+        'user_id': user_id,
+        'game_level': 0,
+        'left_glyph': '[',
+        'right_glyph': ')',
+        'start': 0,
+        'stop': 99,
+        'answer': 99 if outcome else 98,
+        'outcome': outcome,
+    }
+
+
+class RepositoryTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_get_user()
+        test_get_missing_user()
+        test_get_countries()
+        test_get_leaderboard()
+        test_get_leaderboard_includes_rollups()
+        test_insert_answers()
+        test_statements_are_compiled_once()
+        test_methods_in_docstring()
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = db.get_engine(tests.TEST_APPLICATION)
+
+    def setUp(self):
+        super().setUp()
+        self.connection = self.engine.connect()
+        self.user = factories.create_user(self.connection)
+
+    def test_get_user(self):
+        lookups = (
+            (repository.get_user_by_id, self.user.id),
+            (repository.get_user_by_username, self.user.username),
+            (repository.get_user_by_email, self.user.email),
+        )
+        for lookup, value in lookups:
+            self.assertEqual(lookup(self.connection, value).id, self.user.id)
+
+    def test_get_missing_user(self):
+        self.assertIsNone(repository.get_user_by_id(self.connection, -1))
+        self.assertIsNone(repository.get_user_by_username(self.connection, 'nobody'))
+
+    def test_get_countries(self):
+        countries = repository.get_countries(self.connection)
+        country_ids = [country.id for country in countries]
+        self.assertEqual(country_ids, sorted(country_ids))
+        self.assertIn(self.user.country_id, country_ids)
+        country = repository.get_country_by_name(self.connection, 'Romania')
+        self.assertEqual(country.alpha3_code, 'ROU')
+
+    def test_get_leaderboard(self):
+        runner_up = factories.create_user(self.connection)
+        answers = [build_answer(self.user.id, True), build_answer(self.user.id, True)]
+        answers += [build_answer(runner_up.id, True), build_answer(None, True)]
+        repository.insert_answers(self.connection, answers)
+
+        first_page = repository.get_leaderboard(self.connection, page=1, per_page=1)
+        second_page = repository.get_leaderboard(self.connection, page=2, per_page=1)
+        self.assertEqual([(row.id, row.correct, row.total) for row in first_page],
+                         [(self.user.id, 2, 2)])
+        self.assertEqual([row.id for row in second_page], [runner_up.id])
+        self.assertEqual(repository.get_leaderboard(self.connection, page=3, per_page=1), [])
+
+    def test_get_leaderboard_includes_rollups(self):
+        runner_up = factories.create_user(self.connection)
+        repository.insert_answers(self.connection, [build_answer(self.user.id, True)])
+        self.connection.execute(
+            models.answer_rollup.insert(),
+            user_id=runner_up.id, game_level=0, day=datetime.date(2019, 1, 1), correct=2,
+            incorrect=1,
+        )
+        leaderboard = repository.get_leaderboard(self.connection)
+        self.assertEqual([(row.id, row.correct, row.total) for row in leaderboard],
+                         [(runner_up.id, 2, 3), (self.user.id, 1, 1)])
+
+    def test_insert_answers(self):
+        self.assertEqual(repository.insert_answers(self.connection, []), 0)
+        inserted = repository.insert_answers(
+            self.connection, [build_answer(self.user.id, True), build_answer(self.user.id, False)]
+        )
+        rows = partitions.get_answers(self.connection)[::-1]
+        self.assertEqual(inserted, 2)
+        self.assertEqual([row.outcome for row in rows], [True, False])
+        self.assertTrue(all(row.date_created for row in rows))
+
+    def test_statements_are_compiled_once(self):
+        repository.get_user_by_id(self.connection, self.user.id)
+        calls, compile_time, _ = repository.get_stats()['user_by_id']
+        repository.get_user_by_id(self.connection, self.user.id)
+        stats = repository.get_stats()['user_by_id']
+        self.assertEqual(stats[0], calls + 1)
+        self.assertLess(stats[1] - compile_time, 0.001)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        for name in partitions.list_partitions(self.connection):
+            self.connection.execute(partitions.get_partition(name).delete())
+        self.connection.execute(models.answer_rollup.delete())
+        self.connection.execute(models.user.delete())
+        self.connection.execute(models.country.delete())
+        self.connection.close()
+        super().tearDown()
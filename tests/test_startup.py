@@ -0,0 +1,169 @@
+"""
+Test how long it takes to import knowlift and to create an application, and what's deferred.
+
+Classes:
+========
+    StartupTests: Test the startup budgets, the subsystems initialized on first use & preloading.
+
+CONSTANTS:
+==========
+    CREATE_APP_TIME_BUDGET: The number of seconds create_app may take, imports excluded.
+    IMPORT_TIME_BUDGET: The number of seconds importing knowlift may take, as per -X importtime.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Project specific
+import default_settings
+import knowlift
+
+from knowlift import countries
+from knowlift import db
+from knowlift import views
+
+# Measured at ~0.015s & ~0.35s (flask ~0.24s, sqlalchemy ~0.11s of it), plus some headroom.
+CREATE_APP_TIME_BUDGET = 0.05
+IMPORT_TIME_BUDGET = 0.5
+
+_CREATE_APP_SCRIPT = '''
+import json, time
+import knowlift
+start = time.perf_counter()
+app = knowlift.create_app()
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'engine_created': app.config['DATABASE_ENGINE'] is not None,
+    'commands': sorted(app.cli.commands),
+}))
+'''
+
+
+def _run(script):
+    environment = dict(os.environ, FLASK_ENV='test')
+    environment.pop('FLASK_RUN_FROM_CLI', None)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=default_settings.Config.BASE_DIR, env=environment, capture_output=True, text=True,
+        check=True,
+    )
+    # Each import is reported as: import time: self [us] | cumulative | imported package
+    imports = {}
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imports[name.strip()] = int(cumulative) / 1e6
+    return imports, process.stdout
+
+
+class StartupTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_import_time_budget()
+        test_create_app_time_budget()
+        test_engine_created_on_first_use()
+        test_country_cache_loaded_on_first_use()
+        test_warm_up()
+        test_preload()
+        test_serve_from_forked_worker()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.app = knowlift.create_app()
+        self.app.config['DATABASE'] = os.path.join(self.directory, 'startup.db')
+
+    def test_import_time_budget(self):
+        imports, _ = _run('import knowlift')
+        self.assertLess(imports['knowlift'], IMPORT_TIME_BUDGET)
+        for module in ('knowlift.cli', 'knowlift.bulk_import', 'knowlift.iso3166', 'pstats'):
+            self.assertNotIn(module, imports)
+
+    def test_create_app_time_budget(self):
+        _, output = _run(_CREATE_APP_SCRIPT)
+        report = json.loads(output.splitlines()[-1])
+        self.assertLess(report['seconds'], CREATE_APP_TIME_BUDGET)
+        self.assertFalse(report['engine_created'])
+        self.assertEqual(report['commands'], [])
+
+    def test_engine_created_on_first_use(self):
+        self.assertIsNone(self.app.config['DATABASE_ENGINE'])
+        self.assertFalse(os.path.exists(self.app.config['DATABASE']))
+
+        engine = db.get_engine(self.app)
+        self.assertIs(db.get_engine(self.app), engine)
+        self.assertIn('schema_version', engine.table_names())
+        with self.app.app_context():
+            self.assertIs(db.get_connection().engine, engine)
+
+    def test_country_cache_loaded_on_first_use(self):
+        self.assertNotIn('COUNTRY_CACHE', self.app.config)
+        with db.get_engine(self.app).connect() as connection:
+            countries.seed(connection)
+
+        with self.app.app_context():
+            country_cache = countries.get_cache()
+            self.assertIs(countries.get_cache(), country_cache)
+        self.assertEqual(country_cache.by_alpha2('RO').english_short_name, 'Romania')
+
+    def test_warm_up(self):
+        knowlift.warm_up(self.app)
+        self.assertIsNotNone(self.app.config['DATABASE_ENGINE'])
+        self.assertEqual(len(self.app.config['COUNTRY_CACHE']), 0)
+
+    def test_preload(self):
+        knowlift.preload(self.app)
+        self.assertIsNotNone(self.app.config['DATABASE_ENGINE'])
+        self.assertEqual(sorted(self.app.config['PAGE_CACHE']), sorted(views.CACHED_PAGES))
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_serve_from_forked_worker(self):
+        knowlift.preload(self.app)
+        master_engine = self.app.config['DATABASE_ENGINE']
+        pid = os.fork()
+        if pid == 0:  # worker
+            status = 1
+            try:
+                client = self.app.test_client()
+                responses = [client.get('/'), client.post('/api/v1/play', json={'level': 1})]
+                with self.app.app_context():
+                    db.get_connection().execute('SELECT 1')
+                if all(response.status_code == 200 for response in responses):
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertTrue(os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0)
+        self.assertIs(self.app.config['DATABASE_ENGINE'], master_engine)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        gc.unfreeze()
+        engine = self.app.config['DATABASE_ENGINE']
+        if engine is not None:
+            engine.dispose()
+        shutil.rmtree(self.directory)
+        super().tearDown()
@@ -0,0 +1,91 @@
+"""
+Test knowlift.templating functionality.
+
+Classes:
+========
+    TemplatingTests: Test the bytecode cache, warming templates up and measuring first requests.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+# Third party
+import jinja2
+
+# Project specific
+import tests
+
+from knowlift import templating
+
+
+class TemplatingTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_init_templates()
+        test_warm_up()
+        test_measure_first_request()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.app = tests.TEST_APPLICATION
+        self.cache_directory = tempfile.mkdtemp()
+        config = {'TEMPLATE_BYTECODE_CACHE': self.cache_directory, 'TEMPLATE_WARM_UP': True}
+        self.config = mock.patch.dict(self.app.config, config)
+        self.config.start()
+
+    def test_init_templates(self):
+        self.app.jinja_env.cache.clear()
+        templating.init_templates(self.app)
+        self.assertIsInstance(self.app.jinja_env.bytecode_cache, jinja2.FileSystemBytecodeCache)
+        self.assertEqual(
+            len(os.listdir(self.cache_directory)),
+            len(self.app.jinja_env.list_templates(extensions=('html',))),
+        )
+
+    def test_warm_up(self):
+        self.app.jinja_env.cache.clear()
+        loaded, elapsed = templating.warm_up(self.app)
+        self.assertEqual(loaded, len(os.listdir(os.path.join(self.app.root_path, 'templates'))))
+        self.assertGreater(elapsed, 0)
+        self.assertEqual(len(self.app.jinja_env.cache), loaded)
+
+    def test_measure_first_request(self):
+        templating.init_templates(self.app)
+        rows = templating.measure_first_request(self.app, ['/', '/legal'])
+        self.assertEqual([row[0] for row in rows], ['/', '/legal'])
+        for _, cold, cached, warm in rows:
+            self.assertGreater(cold, 0)
+            self.assertGreater(cached, 0)
+            self.assertGreater(warm, 0)
+        self.assertIsNotNone(self.app.jinja_env.bytecode_cache)
+
+        self.app.jinja_env.bytecode_cache = None
+        self.assertIsNone(templating.measure_first_request(self.app, ['/'])[0][2])
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
+
+    def tearDown(self):
+        self.config.stop()
+        self.app.jinja_env.bytecode_cache = None
+        shutil.rmtree(self.cache_directory)
+        super().tearDown()
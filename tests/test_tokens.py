@@ -0,0 +1,99 @@
+"""
+Test knowlift.tokens functionality.
+
+Classes:
+========
+    TokenTests: Test issuing and verifying signed question tokens.
+
+Miscellaneous objects:
+======================
+    Except for the public objects exported by this module and their public APIs (if applicable),
+        everything else is an implementation detail, and shouldn't be relied upon as it may change
+        over time.
+"""
+
+# Standard library
+import unittest
+
+# Project specific
+from knowlift import tokens
+
+SECRET_KEY = 'Yggdrasil'
+
+
+class TokenTests(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_issue_and_verify()
+        test_every_glyph()
+        test_tampered_tokens()
+        test_expired_token()
+        test_methods_in_docstring()
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.question = {
+            'left_glyph': '(',
+            'right_glyph': ']',
+            'start_internal': -512,
+            'stop_internal': 998,
+            'start_representation': '-512',
+            'stop_representation': '998',
+            'game_level': 3,
+        }
+
+    def test_issue_and_verify(self):
+        token = tokens.issue(self.question, SECRET_KEY, now=1571490000)
+        self.assertTrue(token.startswith('3.-512.998.oc.1571490000.'))
+        self.assertLess(len(token), 64)
+        self.assertEqual(
+            tokens.verify(token, SECRET_KEY),
+            tokens.Question(3, '(', ']', -512, 998, 1571490000),
+        )
+
+    def test_every_glyph(self):
+        for left_glyph in ('[', '('):
+            for right_glyph in (']', ')'):
+                self.question.update(left_glyph=left_glyph, right_glyph=right_glyph)
+                question = tokens.verify(tokens.issue(self.question, SECRET_KEY), SECRET_KEY)
+                self.assertEqual((question.left_glyph, question.right_glyph),
+                                 (left_glyph, right_glyph))
+
+    def test_tampered_tokens(self):
+        token = tokens.issue(self.question, SECRET_KEY)
+        payload, mac = token.rsplit('.', 1)
+        tampered_tokens = (
+            None,
+            42,
+            '',
+            mac,
+            payload,
+            f'{payload}.',
+            token.replace('3.-512.998', '3.0.998', 1),
+            token.replace('.oc.', '.cc.', 1),
+            f'{payload}.{mac[::-1]}',
+            f'{token}é',
+        )
+        for tampered_token in tampered_tokens:
+            self.assertRaises(
+                tokens.InvalidTokenError, tokens.verify, tampered_token, SECRET_KEY
+            )
+        self.assertRaises(tokens.InvalidTokenError, tokens.verify, token, 'another key')
+
+    def test_expired_token(self):
+        token = tokens.issue(self.question, SECRET_KEY, now=1000)
+        self.assertEqual(tokens.verify(token, SECRET_KEY, max_age=60, now=1060).issued, 1000)
+        self.assertRaises(
+            tokens.InvalidTokenError, tokens.verify, token, SECRET_KEY, max_age=60, now=1061
+        )
+        self.assertEqual(tokens.verify(token, SECRET_KEY, now=10**10).issued, 1000)
+
+    def test_methods_in_docstring(self):
+        methods_to_check = [
+            method_name for method_name in dir(self) if method_name.startswith('test')
+        ]
+        for method_to_check in methods_to_check:
+            msg = f'{method_to_check} not found in docstring.'
+            self.assertIn(method_to_check, self.__doc__, msg)
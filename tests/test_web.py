@@ -8,6 +8,7 @@ CONSTANTS:
 Functions:
 ==========
     check_membership: Check if all the elements of a given array are found in a target string.
+    issue_token: Issue a signed token for a question, as /play does.
 
 Classes:
 ========
@@ -20,18 +21,43 @@ Classes:
     TestLegalPage: Test the requests going under /legal
     TestPlayPage: Test the requests going under /play
     TestResultPage: Test the requests going under /result
+    TestPlayApi: Test the requests going under /api/v1/play
+    TestResultApi: Test the requests going under /api/v1/result
+    TestPlayStream: Test the requests going under /play/stream
+    TestAnswerApi: Test the requests going under /api/v1/answer
+    TestResultBatchApi: Test the requests going under /api/v1/result/batch
 """
 
 # Standard library
+import html
 import json
+import re
+import time
 import unittest
 
+from unittest import mock
+
 # Project specific
 import tests
 
+from knowlift import db
+from knowlift import models
+from knowlift import number_distance
+from knowlift import partitions
+from knowlift import progress
+from knowlift import repository
+from knowlift import tokens
+from tests import factories
+
 HTTP_CLIENT = tests.TEST_APPLICATION.test_client()
 
 
+def issue_token(question, secret_key=None, now=None):
+    """Issue a signed token for a question, as /play does."""
+    secret_key = secret_key or tests.TEST_APPLICATION.config['SECRET_KEY']
+    return tokens.issue(question, secret_key, now=now)
+
+
 def check_membership(text, *strings):
     """Check whether all elements of a sequence are in a given text."""
     for element in strings:
@@ -257,6 +283,8 @@ class TestPlayPage(unittest.TestCase):
         test_get_not_allowed()
         test_play_post_with_incorrect_values()
         test_play_post_valid_data()
+        test_play_metadata_is_json()
+        test_play_negotiates_json()
     """
 
     def test_get_not_allowed(self):
@@ -310,6 +338,26 @@ class TestPlayPage(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(expected_items_in_body)
 
+    def test_play_metadata_is_json(self):
+        response = HTTP_CLIENT.post('/play', data={'level': 3})
+        metadata = re.search(r"id=\"metadata\".*value='([^']*)'", response.get_data(as_text=True))
+        data = json.loads(html.unescape(metadata.group(1)))
+        self.assertEqual(data['game_level'], 3)
+
+    def test_play_negotiates_json(self):
+        response = HTTP_CLIENT.post(
+            '/play', data={'level': 0}, headers={'Accept': 'application/json'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_json()['game_level'], 0)
+
+        response = HTTP_CLIENT.post(
+            '/play', data={'level': 'a'}, headers={'Accept': 'application/json'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+
 
 class TestResultPage(unittest.TestCase):
     """
@@ -319,19 +367,20 @@ class TestResultPage(unittest.TestCase):
         test_result_get_not_allowed()
         test_post_result_incorrect_answer()
         test_post_erroneous_data()
+        test_post_forged_question()
+        test_post_expired_question()
+        test_post_result_negotiates_json()
     """
 
     def setUp(self):
-        self.post_data = {
+        self.question = {
             'left_glyph': '[',
             'right_glyph': ')',
             'start_internal': 0,
             'stop_internal': 99,
-            'start_representation': '0',
-            'stop_representation': '99',
-            'answer': 99,
             'game_level': 0,
         }
+        self.post_data = {'token': issue_token(self.question), 'answer': 99}
 
     def test_post_result_correct_answer(self):
         data = {'data': json.dumps(self.post_data)}
@@ -352,13 +401,8 @@ class TestResultPage(unittest.TestCase):
         self.assertEqual(response.status_code, 405)
 
     def test_post_result_incorrect_answer(self):
-        incorrect_values = {
-            'start_internal': 299792458,
-            'stop_internal': 299792459,
-            'start_representation': '299 792 458',
-            'stop_representation': '299 792 459',
-        }
-        self.post_data.update(incorrect_values)
+        self.question.update({'start_internal': 299792458, 'stop_internal': 299792459})
+        self.post_data['token'] = issue_token(self.question)
         data = {'data': json.dumps(self.post_data)}
         response = HTTP_CLIENT.post('/result', data=data)
         response_body = response.get_data(as_text=True)
@@ -379,11 +423,8 @@ class TestResultPage(unittest.TestCase):
 
     def test_post_erroneous_data(self):
         erroneous_values = {
-            'left_glyph': ']',
-            'right_glyph': '(',
-            'start_representation': '5',
+            'token': 'bogus',
             'answer': 'bogus',
-            'game_level': '',
         }
         self.post_data.update(erroneous_values)
         data = {'data': json.dumps(self.post_data)}
@@ -402,3 +443,310 @@ class TestResultPage(unittest.TestCase):
         expected_items_in_body = check_membership(response_body, *expected_items)
         self.assertEqual(response.status_code, 500)
         self.assertTrue(expected_items_in_body)
+
+    def test_post_forged_question(self):
+        # A question whose size matches a made up answer, sent in the clear or within a token.
+        forged_question = dict(self.question, start_internal=0, stop_internal=5)
+        forged_token = issue_token(forged_question).rsplit('.', 1)[0] + '.' + 'A' * 22
+        forged_data = (
+            dict(forged_question, answer=5, start_representation='0', stop_representation='5'),
+            {'token': forged_token, 'answer': 5},
+            {'token': issue_token(self.question, secret_key='guessed'), 'answer': 99},
+        )
+        for post_data in forged_data:
+            response = HTTP_CLIENT.post('/result', data={'data': json.dumps(post_data)})
+            self.assertEqual(response.status_code, 500)
+
+    def test_post_expired_question(self):
+        max_age = tests.TEST_APPLICATION.config['QUESTION_TOKEN_MAX_AGE']
+        self.post_data['token'] = issue_token(self.question, now=time.time() - max_age - 1)
+        response = HTTP_CLIENT.post('/result', data={'data': json.dumps(self.post_data)})
+        self.assertEqual(response.status_code, 500)
+
+    def test_post_result_negotiates_json(self):
+        data = {'data': json.dumps(self.post_data)}
+        response = HTTP_CLIENT.post('/result', data=data, headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertTrue(response.get_json()['outcome'])
+
+
+class TestPlayApi(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_get_not_allowed()
+        test_play_valid_level()
+        test_play_invalid_level()
+    """
+
+    def test_get_not_allowed(self):
+        response = HTTP_CLIENT.get('/api/v1/play')
+        self.assertEqual(response.status_code, 405)
+
+    def test_play_valid_level(self):
+        for request_data in ({'json': {'level': 2}}, {'data': {'level': '2'}}):
+            response = HTTP_CLIENT.post('/api/v1/play', **request_data)
+            data = response.get_json()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(data['game_level'], 2)
+            self.assertLessEqual(data['start_internal'], data['stop_internal'])
+            self.assertNotIn(b'<', response.data)
+            self.assertNotIn(b'\n ', response.data)
+
+    def test_play_invalid_level(self):
+        for request_data in ({'json': {'level': 12}}, {'json': ['level']}, {'data': {}}):
+            response = HTTP_CLIENT.post('/api/v1/play', **request_data)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.get_json())
+
+
+class TestResultApi(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_result_round_trip()
+        test_result_incorrect_answer()
+        test_result_invalid_data()
+    """
+
+    def setUp(self):
+        question = {'left_glyph': '[', 'right_glyph': ']', 'start_internal': 0, 'stop_internal': 9,
+                    'game_level': 0}
+        self.token = issue_token(question)
+
+    def test_result_round_trip(self):
+        question = HTTP_CLIENT.post('/api/v1/play', json={'level': 0}).get_json()
+        expected = len(range(question['start_internal'], question['stop_internal'] + 1))
+        if question['left_glyph'] == '(' and question['right_glyph'] == ')':
+            expected -= 2
+        elif question['left_glyph'] != '[' or question['right_glyph'] != ']':
+            expected -= 1
+
+        post_data = {'token': question['token'], 'answer': max(expected, 0)}
+        response = HTTP_CLIENT.post('/api/v1/result', json=post_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['outcome'])
+        self.assertEqual(response.get_json()['start_internal'], question['start_internal'])
+
+    def test_result_incorrect_answer(self):
+        question = {
+            'left_glyph': '[',
+            'right_glyph': ']',
+            'start_internal': 1000,
+            'stop_internal': 1001,
+            'game_level': 2,
+        }
+        post_data = {'token': issue_token(question), 'answer': '1'}
+        response = HTTP_CLIENT.post('/api/v1/result', json=post_data)
+        data = response.get_json()
+        self.assertFalse(data['outcome'])
+        self.assertEqual(data['cpu_internal'], 2)
+        self.assertEqual(data['game_level'], 2)
+        self.assertEqual(data['start_representation'], '1 000')
+
+    def test_result_invalid_data(self):
+        invalid_requests = (
+            {'json': {'answer': 1}},
+            {'json': [1, 2]},
+            {'data': {'data': 'not json'}},
+            {'json': {'token': 'bogus', 'answer': 10}},
+            {'json': {'token': self.token, 'answer': 1.5}},
+            {'json': {'token': self.token, 'answer': True}},
+            {'json': {'token': self.token[:-1], 'answer': 10}},
+            {'json': {'token': self.token + 'é', 'answer': 10}},
+        )
+        for request_data in invalid_requests:
+            response = HTTP_CLIENT.post('/api/v1/result', **request_data)
+            self.assertEqual(response.status_code, 400, request_data)
+            self.assertIn('error', response.get_json())
+
+
+class TestPlayStream(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_stream_questions()
+        test_resume_stream()
+        test_paced_stream()
+        test_stream_invalid_parameters()
+    """
+
+    def parse_events(self, body):
+        events = []
+        for block in body.strip().split('\n\n'):
+            events.append(dict(line.split(': ', 1) for line in block.splitlines()))
+        return events
+
+    def test_stream_questions(self):
+        response = HTTP_CLIENT.get(
+            '/play/stream?level=3&count=5', headers={'Accept-Encoding': 'gzip'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        events = self.parse_events(response.get_data(as_text=True))
+        self.assertEqual(events[0], {'retry': '3000'})
+        self.assertEqual(events[-1], {'event': 'end', 'data': '{}'})
+        questions = events[1:-1]
+        self.assertEqual([event['id'] for event in questions], ['0', '1', '2', '3', '4'])
+        for event in questions:
+            self.assertEqual(event['event'], 'question')
+            data = json.loads(event['data'])
+            self.assertEqual(data['game_level'], 3)
+            tokens.verify(data['token'], tests.TEST_APPLICATION.config['SECRET_KEY'])
+
+    def test_resume_stream(self):
+        response = HTTP_CLIENT.get('/play/stream?level=0&count=5', headers={'Last-Event-ID': '2'})
+        events = self.parse_events(response.get_data(as_text=True))
+        self.assertEqual([event.get('id') for event in events[1:-1]], ['3', '4'])
+
+    def test_paced_stream(self):
+        with mock.patch('time.sleep') as sleep:
+            response = HTTP_CLIENT.get('/play/stream?level=0&count=3&interval=1.5')
+            self.assertEqual(len(self.parse_events(response.get_data(as_text=True))), 5)
+        self.assertEqual(sleep.call_args_list, [mock.call(1.5)] * 2)
+
+    def test_stream_invalid_parameters(self):
+        invalid_query_strings = (
+            'level=12', 'level=x', '', 'level=1&count=0', 'level=1&count=201', 'level=1&count=x',
+            'level=1&interval=-1', 'level=1&interval=61', 'level=1&interval=nan',
+        )
+        for query_string in invalid_query_strings:
+            response = HTTP_CLIENT.get(f'/play/stream?{query_string}')
+            self.assertEqual(response.status_code, 400, query_string)
+            self.assertIn('error', response.get_json())
+
+
+class TestAnswerApi(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_answer_outcome()
+        test_answer_invalid_data()
+    """
+
+    def test_answer_outcome(self):
+        question = {'left_glyph': '(', 'right_glyph': ']', 'start_internal': -5, 'stop_internal': 5,
+                    'game_level': 1}
+        expected = number_distance.count_integers('(', ']', -5, 5)
+        for answer, outcome in ((expected, True), (str(expected), True), (expected - 1, False)):
+            response = HTTP_CLIENT.post(
+                '/api/v1/answer', json={'token': issue_token(question), 'answer': answer}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json(), {'outcome': outcome, 'cpu_internal': 10})
+
+    def test_answer_invalid_data(self):
+        question = {'left_glyph': '[', 'right_glyph': ']', 'start_internal': 0, 'stop_internal': 9,
+                    'game_level': 0}
+        invalid_requests = (
+            {'json': {'answer': 1}},
+            {'json': [1, 2]},
+            {'data': {'token': issue_token(question), 'answer': 10}},
+            {'json': {'token': issue_token(question), 'answer': 1.5}},
+            {'json': {'token': issue_token(question) + 'x', 'answer': 10}},
+        )
+        for request_data in invalid_requests:
+            response = HTTP_CLIENT.post('/api/v1/answer', **request_data)
+            self.assertEqual(response.status_code, 400, request_data)
+            self.assertIn('error', response.get_json())
+
+
+class TestResultBatchApi(unittest.TestCase):
+    """
+    Methods:
+    ========
+        test_grade_answer_sheet()
+        test_signed_in_answer_sheet()
+        test_invalid_answer_sheets()
+    """
+
+    def setUp(self):
+        self.questions = [
+            {'left_glyph': '[', 'right_glyph': ']', 'start_internal': 0, 'stop_internal': 9,
+             'game_level': 0},
+            {'left_glyph': '(', 'right_glyph': ')', 'start_internal': -50, 'stop_internal': 50,
+             'game_level': 1},
+            {'left_glyph': '[', 'right_glyph': ')', 'start_internal': 7, 'stop_internal': 7,
+             'game_level': 2},
+        ]
+        self.connection = db.get_engine(tests.TEST_APPLICATION).connect()
+
+    def stored_answers(self):
+        return len(partitions.get_answers(self.connection))
+
+    def test_grade_answer_sheet(self):
+        stored_answers = self.stored_answers()
+        sheet = [
+            {'token': issue_token(question), 'answer': answer}
+            for question, answer in zip(self.questions, (10, '99', 1))
+        ]
+        response = HTTP_CLIENT.post('/api/v1/result/batch', json=sheet)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {
+            'results': [
+                {'game_level': 0, 'answer': 10, 'cpu_internal': 10, 'outcome': True},
+                {'game_level': 1, 'answer': 99, 'cpu_internal': 99, 'outcome': True},
+                {'game_level': 2, 'answer': 1, 'cpu_internal': 0, 'outcome': False},
+            ],
+            'correct': 2,
+            'incorrect': 1,
+            'correct_percentage': 66.67,
+            'incorrect_percentage': 33.33,
+        })
+
+        answers = partitions.get_answers(self.connection)
+        self.assertEqual(len(answers), stored_answers + 3)
+        self.assertEqual(
+            [(answer.start, answer.stop, answer.answer, answer.outcome) for answer in answers[:3]],
+            [(7, 7, 1, False), (-50, 50, 99, True), (0, 9, 10, True)],  # most recent first
+        )
+
+    def test_signed_in_answer_sheet(self):
+        user = factories.create_user(self.connection)
+        self.addCleanup(self.delete_user, user.id)
+        sheet = [
+            {'token': issue_token(question), 'answer': answer}
+            for question, answer in zip(self.questions, (10, 99, 1))
+        ]
+        client = tests.TEST_APPLICATION.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user.id
+        self.assertEqual(client.post('/api/v1/result/batch', json=sheet).status_code, 200)
+
+        answers = partitions.get_answers(self.connection, user_id=user.id)
+        self.assertEqual([answer.outcome for answer in answers], [False, True, True])
+        leaderboard = repository.get_leaderboard(self.connection, per_page=1000)
+        self.assertIn((user.id, 2, 3), [(row.id, row.correct, row.total) for row in leaderboard])
+
+    def delete_user(self, user_id):
+        progress.init_progress(tests.TEST_APPLICATION)  # forget the progress of the user
+        with db.get_engine(tests.TEST_APPLICATION).connect() as connection:
+            for name in partitions.list_partitions(connection):
+                table = partitions.get_partition(name)
+                connection.execute(table.delete().where(table.c.user_id == user_id))
+            connection.execute(models.user.delete().where(models.user.c.id == user_id))
+
+    def test_invalid_answer_sheets(self):
+        stored_answers = self.stored_answers()
+        token = issue_token(self.questions[0])
+        invalid_sheets = (
+            [],
+            {'token': token, 'answer': 10},
+            [{'token': token, 'answer': 10}] * 2,
+            [{'token': token, 'answer': 10}, {'token': token + 'x', 'answer': 10}],
+            [{'token': token, 'answer': 10}, {'token': issue_token(self.questions[1])}],
+            [{'token': issue_token(self.questions[0], now=index), 'answer': 1}
+             for index in range(201)],
+        )
+        for sheet in invalid_sheets:
+            response = HTTP_CLIENT.post('/api/v1/result/batch', json=sheet)
+            self.assertEqual(response.status_code, 400, sheet)
+            self.assertIn('error', response.get_json())
+        self.assertEqual(self.stored_answers(), stored_answers)
+
+    def tearDown(self):
+        self.connection.close()
@@ -5,6 +5,11 @@ Notes:
 ======
     This file contains the code mod_wsgi is executing on startup to get the application object.
 
+    The application is fully initialized as soon as it's created (see knowlift.preload), hence
+        pre-forking servers should import this file in their master process, e.g:
+        gunicorn --preload wsgi:application
+        Compare preloaded workers with cold ones via: python -m benchmarks.prefork
+
 Global variables:
 =================
     application: The Flask application. Acts as a central registry for views, URLs, templates, etc.
@@ -22,3 +27,4 @@ __author__ = 'Marius Mucenicu <marius_mucenicu@yahoo.com>'
 import knowlift
 
 application = knowlift.create_app()
+knowlift.preload(application)